@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import atexit
 import os
+import threading
 from contextlib import contextmanager
 
 import psycopg
 
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    # Pooling is optional: without psycopg_pool each db_conn() connects.
+    ConnectionPool = None
+
 
 def get_database_url() -> str | None:
     url = (os.getenv("DATABASE_URL") or "").strip()
@@ -18,12 +26,151 @@ def get_database_url() -> str | None:
     return url
 
 
+_pool = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def _forget_pool_after_fork() -> None:
+    # The child shares the parent's sockets: never close them from here,
+    # just drop the reference and let the child open its own pool.
+    global _pool, _pool_pid
+    _pool = None
+    _pool_pid = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def _pool_enabled() -> bool:
+    if ConnectionPool is None:
+        return False
+    return (os.getenv("DB_POOL") or "1").strip().lower() not in {"0", "false", "no"}
+
+
+def _get_pool(url: str):
+    """Process-wide pool, created on first use (once per forked worker).
+
+    Env vars:
+    - DB_POOL: set to 0/false/no to connect per request instead.
+    - DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE: pool bounds (default 1 / 5).
+    - DB_POOL_MAX_IDLE: seconds before an idle extra connection is closed (default 300).
+    - DB_POOL_TIMEOUT: seconds to wait for a free connection (default 30).
+    - DB_POOL_CHECK: set to 0 to skip the health check on checkout.
+    """
+
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            check = (os.getenv("DB_POOL_CHECK") or "1").strip().lower() not in {"0", "false", "no"}
+            _pool = ConnectionPool(
+                url,
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", "5")),
+                max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+                timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                check=ConnectionPool.check_connection if check else None,
+                name="paca-incendies",
+                open=True,
+            )
+            _pool_pid = pid
+    return _pool
+
+
+@atexit.register
+def _close_pool() -> None:
+    if _pool is not None and _pool_pid == os.getpid():
+        try:
+            _pool.close()
+        except Exception:
+            pass
+
+
+def pool_stats() -> dict | None:
+    """Counters of the current process pool (None when not pooling)."""
+
+    if _pool is None or _pool_pid != os.getpid():
+        return None
+    return dict(_pool.get_stats())
+
+
+# Alert year of a fires row, as used by the CSV mode year filter.
+FIRE_YEAR_SQL = "coalesce(extract(year from date_alerte at time zone 'UTC')::int, annee)"
+
+# Timestamp a fires row is listed by, as in CSV mode: the alert date, else
+# Jan 1st of annee (null when neither is known). FIRE_SORT_SQL puts those
+# last in newest-first order; fires_sort_idx indexes it (sql/schema.sql).
+FIRE_TS_SQL = (
+    "coalesce(date_alerte, case when annee between 1 and 9999 "
+    "then make_timestamp(annee, 1, 1, 0, 0, 0) at time zone 'UTC' end)"
+)
+FIRE_SORT_SQL = f"coalesce({FIRE_TS_SQL}, '-infinity'::timestamptz)"
+
+# Alert class of a fires row from surface_ha: the thresholds of the CSV
+# mode (fire_store._alerte_codes). Shared by the API queries and
+# refresh_fires_insee_agg so both classify fires the same way.
+ALERTE_CASE_SQL = (
+    "case "
+    "when surface_ha is null then '?' "
+    "when surface_ha < 1 then 'Jaune' "
+    "when surface_ha < 10 then 'Orange' "
+    "when surface_ha < 50 then 'Rouge' "
+    "else 'Noir' end"
+)
+
+
+def refresh_fires_insee_agg(cur, years: list[int] | None = None) -> None:
+    """Rebuild fires_insee_agg from fires, for all years or only ``years``.
+
+    Runs in the caller's transaction, so readers switch to the new
+    aggregates at commit.
+    """
+
+    where = ""
+    params: list[object] = []
+    if years is not None:
+        where = f"and coalesce({FIRE_YEAR_SQL}, 0) = any(%s)"
+        params.append(list(years))
+        cur.execute("delete from fires_insee_agg where annee = any(%s)", params)
+    else:
+        cur.execute("delete from fires_insee_agg")
+
+    cur.execute(
+        f"""
+        insert into fires_insee_agg (insee, annee, departement, alerte, fires, surface_ha)
+        select
+          insee,
+          coalesce({FIRE_YEAR_SQL}, 0),
+          coalesce(departement, ''),
+          {ALERTE_CASE_SQL},
+          count(*)::int,
+          coalesce(sum(coalesce(surface_ha,0)),0)::double precision
+        from fires
+        where insee is not null and insee <> '' {where}
+        group by 1, 2, 3, 4
+        """,
+        params,
+    )
+
+
 @contextmanager
 def db_conn():
     url = get_database_url()
     if not url:
         raise RuntimeError("DATABASE_URL is not set")
 
+    if _pool_enabled():
+        # Committed on success, rolled back on error, then returned to the pool.
+        with _get_pool(url).connection() as conn:
+            yield conn
+        return
+
     conn = psycopg.connect(url)
     try:
         yield conn
@@ -0,0 +1,730 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from fires_csv import MISSING_INT, _to_us, read_fires_csv
+
+# Alert classes, indexed by the codes stored in FireStore.alerte.
+ALERTES = ("Jaune", "Orange", "Rouge", "Noir", "?")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _utc_iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _alerte_codes(surface_ha: np.ndarray) -> np.ndarray:
+    """ALERTES codes from surfaces: < 1 ha Jaune, < 10 Orange, < 50 Rouge, else Noir; NaN is "?"."""
+
+    codes = np.searchsorted(np.array([1.0, 10.0, 50.0]), surface_ha, side="right").astype(np.uint8)
+    codes[np.isnan(surface_ha)] = ALERTES.index("?")
+    return codes
+
+
+def _allowed_departements() -> set[str]:
+    allowed_deps = os.getenv("DEPARTEMENTS", "04,05,06,13,83,84")
+    return {x.strip() for x in allowed_deps.split(",") if x.strip()}
+
+
+class FireStore:
+    """Columnar, read-only view of the Prométhée fires CSV.
+
+    One row per fire kept after the DEPARTEMENTS filter, in file order. String
+    columns are stored as integer codes into the matching ``*_values`` pool
+    (code 0 is the empty string). Missing surfaces are NaN and unknown years 0.
+    ``ts_us`` is MISSING_INT for fires with neither an alert date nor an
+    annee: they are listed last, dated at request time.
+    """
+
+    def __init__(
+        self,
+        *,
+        fire_id: np.ndarray,
+        year: np.ndarray,
+        ts_us: np.ndarray,
+        surface_ha: np.ndarray,
+        alerte: np.ndarray,
+        departement: np.ndarray,
+        insee: np.ndarray,
+        commune: np.ndarray,
+        origine: np.ndarray,
+        departement_values: list[str],
+        insee_values: list[str],
+        commune_values: list[str],
+        origine_values: list[str],
+    ) -> None:
+        self.fire_id = fire_id
+        self.year = year
+        self.ts_us = ts_us
+        self.surface_ha = surface_ha
+        self.alerte = alerte
+        self.departement = departement
+        self.insee = insee
+        self.commune = commune
+        self.origine = origine
+        self.departement_values = departement_values
+        self.insee_values = insee_values
+        self.commune_values = commune_values
+        self.origine_values = origine_values
+
+        # Missing surfaces count as 0 ha in sums and min_surface filters.
+        self.surface_or_zero = np.nan_to_num(surface_ha, nan=0.0)
+
+        # Built on first use, so a store mapped from a snapshot is ready at once.
+        self._cube: FireCube | None = None
+        self._cube_by_year: FireCube | None = None
+        self._stats: dict | None = None
+        self._by_date: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return int(self.fire_id.shape[0])
+
+    @property
+    def cube(self) -> FireCube:
+        if self._cube is None:
+            self._cube = FireCube(self, by_year=False)
+        return self._cube
+
+    @property
+    def cube_by_year(self) -> FireCube:
+        if self._cube_by_year is None:
+            self._cube_by_year = FireCube(self, by_year=True)
+        return self._cube_by_year
+
+    def newest(self, limit: int) -> np.ndarray:
+        """Row indices of the ``limit`` most recent fires, newest first.
+
+        Ties keep file order, like the stable sort the API always used; fires
+        without a timestamp come last.
+        """
+
+        k = min(max(limit, 0), len(self))
+        if k == 0:
+            return np.zeros(0, dtype=np.intp)
+
+        # Select the k-th newest timestamp in O(n), then only sort the rows at
+        # or above it (ties included, so the cut matches a full stable sort).
+        neg_ts = ~self.ts_us
+        threshold = np.partition(neg_ts, k - 1)[k - 1]
+        rows = np.flatnonzero(neg_ts <= threshold)
+        return rows[np.argsort(neg_ts[rows], kind="stable")][:k]
+
+    def _date_index(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(rows newest first, their sort keys, position of each row).
+
+        The key is ~ts_us (-ts_us - 1): it reverses the order without
+        overflowing, and sends MISSING_INT to the end.
+        """
+
+        if self._by_date is None:
+            order = np.argsort(~self.ts_us, kind="stable")
+            position = np.empty_like(order)
+            position[order] = np.arange(len(order))
+            self._by_date = (order, ~self.ts_us[order], position)
+        return self._by_date
+
+    def query(
+        self,
+        *,
+        limit: int,
+        before: tuple[datetime, int] | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        departement: str | None = None,
+        insee: str | None = None,
+        insee_in: list[str] | None = None,
+        alerte: str | None = None,
+    ) -> tuple[np.ndarray, bool]:
+        """One page of fires, newest first, and whether more rows follow.
+
+        ``before`` is a keyset cursor (alert date, row) taken from the last row
+        of the previous page, the date None after a fire without timestamp;
+        ``date_from``/``date_to`` are inclusive bounds that leave those out;
+        ``insee_in`` keeps the fires of those communes only.
+        Rows are ordered like newest(): by alert date, ties in file order.
+        """
+
+        order, sorted_keys, position = self._date_index()
+
+        lo, hi = 0, len(order)
+        if date_to is not None:
+            lo = int(np.searchsorted(sorted_keys, ~_to_us(date_to), side="left"))
+        if date_from is not None:
+            hi = int(np.searchsorted(sorted_keys, ~_to_us(date_from), side="right"))
+        if date_from is not None or date_to is not None:
+            hi = min(hi, int(np.searchsorted(sorted_keys, ~MISSING_INT, side="left")))
+        if before is not None:
+            before_ts, before_row = before
+            key = ~(_to_us(before_ts) if before_ts is not None else MISSING_INT)
+            start = int(np.searchsorted(sorted_keys, key, side="left"))
+            end = int(np.searchsorted(sorted_keys, key, side="right"))
+            # Same-date rows are in file order: resume after the cursor row.
+            start += int(np.searchsorted(order[start:end], before_row, side="right"))
+            lo = max(lo, start)
+
+        mask = None
+        if departement:
+            mask = self.departement == self._code(self.departement_values, departement)
+        if insee:
+            m = self.insee == self._code(self.insee_values, insee)
+            mask = m if mask is None else mask & m
+        if insee_in is not None:
+            wanted = set(insee_in)
+            codes = [c for c, v in enumerate(self.insee_values) if v and v in wanted]
+            m = np.isin(self.insee, codes)
+            mask = m if mask is None else mask & m
+        if alerte:
+            m = self.alerte == (ALERTES.index(alerte) if alerte in ALERTES else -1)
+            mask = m if mask is None else mask & m
+
+        limit = max(limit, 0)
+        if mask is None:
+            selected = np.arange(lo, min(hi, lo + limit + 1))
+        else:
+            # Positions (in date order) of matching rows, then the same window.
+            matches = np.sort(position[mask])
+            a = int(np.searchsorted(matches, lo, side="left"))
+            b = int(np.searchsorted(matches, hi, side="left"))
+            selected = matches[a : min(b, a + limit + 1)]
+
+        return order[selected[:limit]], len(selected) > limit
+
+    def records(self, rows: np.ndarray) -> list[dict]:
+        now_iso = _utc_iso(datetime.now(timezone.utc))
+        out: list[dict] = []
+        for i in rows.tolist():
+            ts = int(self.ts_us[i])
+            surface_ha = float(self.surface_ha[i])
+            origine = self.origine_values[self.origine[i]]
+            dep = self.departement_values[self.departement[i]]
+            insee = self.insee_values[self.insee[i]]
+            out.append(
+                {
+                    "id": int(self.fire_id[i]),
+                    "commune": self.commune_values[self.commune[i]] or "-",
+                    "latitude": None,
+                    "longitude": None,
+                    "surface_ha": None if np.isnan(surface_ha) else round(surface_ha, 2),
+                    "alerte": ALERTES[self.alerte[i]],
+                    "cause": f"Origine {origine}" if origine else "Inconnue",
+                    "date": _utc_iso(_EPOCH + timedelta(microseconds=ts)) if ts != MISSING_INT else now_iso,
+                    "departement": dep or None,
+                    "insee": insee or None,
+                }
+            )
+        return out
+
+    def stats(self) -> dict:
+        """Totals over the whole dataset for /api/stats.
+
+        Same semantics as the Postgres path: missing surfaces count as 0 ha and
+        fires without a commune are grouped under "?".
+        """
+
+        if self._stats is None:
+            by_alerte = np.bincount(self.cube.alerte, weights=self.cube.count, minlength=len(ALERTES))
+            by_commune_codes = np.bincount(self.commune, minlength=len(self.commune_values))
+            by_commune: dict[str, int] = {}
+            for c, n in zip(self.commune_values, by_commune_codes.tolist()):
+                if n:
+                    by_commune[c or "?"] = by_commune.get(c or "?", 0) + n
+            self._stats = {
+                "count": len(self),
+                "total_surface_ha": round(float(self.surface_or_zero.sum()), 2),
+                "by_alerte": {a: int(n) for (a, n) in zip(ALERTES, by_alerte.tolist()) if n},
+                "by_commune": by_commune,
+            }
+        return dict(self._stats)
+
+    def metrics_by_insee(self, filters: dict | None = None) -> dict[str, dict]:
+        """Aggregate fire count and burnt surface by INSEE code.
+
+        Accepts the ``departement``/``alerte``/``year``/``min_surface`` filters
+        of ``/api/metrics/insee``; empty values and ``"all"`` disable a filter.
+        """
+
+        filters = filters or {}
+        dep_filter = (filters.get("departement") or "").strip()
+        alerte_filter = (filters.get("alerte") or "").strip()
+        year_filter = (filters.get("year") or "").strip()
+        min_surface = filters.get("min_surface")
+
+        try:
+            min_surface_f = float(min_surface) if min_surface not in (None, "") else None
+        except (TypeError, ValueError):
+            min_surface_f = None
+
+        dep = None
+        if dep_filter and dep_filter != "all":
+            dep = self._code(self.departement_values, dep_filter)
+        alerte = None
+        if alerte_filter and alerte_filter != "all":
+            alerte = ALERTES.index(alerte_filter) if alerte_filter in ALERTES else -1
+        year = None
+        if year_filter and year_filter != "all":
+            # Compared as text, like str(dt.year): "1990" matches, "01990" doesn't.
+            year = int(year_filter) if year_filter.isdigit() and str(int(year_filter)) == year_filter else 0
+        if min_surface_f is not None and math.isnan(min_surface_f):
+            min_surface_f = None
+
+        cube = self.cube_by_year if year is not None else self.cube
+        codes, counts, sums = cube.by_insee(
+            departement=dep, alerte=alerte, year=year, min_surface=min_surface_f
+        )
+        insee_values = self.insee_values
+        return {
+            insee_values[c]: {"fires": n, "surface_ha": s}
+            for (c, n, s) in zip(codes.tolist(), counts.tolist(), np.round(sums, 2).tolist())
+            if c != 0
+        }
+
+    @staticmethod
+    def _code(values: list[str], value: str) -> int:
+        """Pool code of ``value``, or -1 (matches no row) if absent."""
+
+        try:
+            return values.index(value)
+        except ValueError:
+            return -1
+
+
+# Lower edges (ha) of the surface buckets FireCube keeps for min_surface
+# queries. 1/10/50 match the alert class thresholds.
+SURFACE_BUCKETS = (0.0, 0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 500.0, 1000.0)
+
+
+class FireCube:
+    """Fire counts and surface sums pre-aggregated per cell.
+
+    A cell is one non-empty (INSEE, departement, alert class, surface bucket)
+    combination, plus the alert year when ``by_year`` is set. Queries mask and
+    sum cells instead of fire rows. A ``min_surface`` that falls inside a
+    bucket is resolved exactly from the rows of that bucket only.
+    """
+
+    def __init__(self, store: FireStore, *, by_year: bool) -> None:
+        self._insee = store.insee
+        self._surface = store.surface_or_zero
+
+        edges = np.asarray(SURFACE_BUCKETS)
+        # Bucket b >= 1 holds [edges[b-1], edges[b]); bucket 0 negative values.
+        bucket = np.searchsorted(edges, store.surface_or_zero, side="right")
+        if by_year:
+            self.years, year_idx = np.unique(store.year, return_inverse=True)
+        else:
+            self.years, year_idx = np.zeros(1, dtype=store.year.dtype), np.zeros(len(store), dtype=np.intp)
+
+        dims = (
+            max(len(store.insee_values), 1),
+            len(self.years),
+            max(len(store.departement_values), 1),
+            len(ALERTES),
+            len(edges) + 1,
+        )
+        key = np.ravel_multi_index(
+            (store.insee, year_idx, store.departement, store.alerte, bucket), dims
+        )
+        cells, cell_of_row, self.count = np.unique(key, return_inverse=True, return_counts=True)
+        self.surface = np.bincount(cell_of_row, weights=store.surface_or_zero, minlength=len(cells))
+        self.insee, year_idx, self.departement, self.alerte, self.bucket = np.unravel_index(cells, dims)
+        self.year = self.years[year_idx]
+        self.by_year = by_year
+
+        # Rows grouped by cell, for the partial-bucket case.
+        self._rows = np.argsort(cell_of_row, kind="stable")
+        self._offsets = np.concatenate(([0], np.cumsum(self.count)[:-1]))
+
+    def __len__(self) -> int:
+        return int(self.count.shape[0])
+
+    def by_insee(
+        self,
+        *,
+        departement: int | None = None,
+        alerte: int | None = None,
+        year: int | None = None,
+        min_surface: float | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(INSEE codes, fire counts, surface sums) matching the filters.
+
+        Filters take pool/alert codes (-1 matches nothing); ``year`` 0 matches
+        nothing since it marks an unknown year. Only codes with fires are
+        returned.
+        """
+
+        mask = np.ones(len(self), dtype=bool)
+        if departement is not None:
+            mask &= self.departement == departement
+        if alerte is not None:
+            mask &= self.alerte == alerte
+        if year is not None:
+            if not self.by_year:
+                raise ValueError("year filter needs a by_year cube")
+            mask &= (self.year == year) & (year != 0)
+
+        n = int(self.insee.max()) + 1 if len(self) else 1
+        extra_codes = np.zeros(0, dtype=np.intp)
+        extra_surface = np.zeros(0)
+        if min_surface is not None:
+            edges = np.asarray(SURFACE_BUCKETS)
+            first_full = int(np.searchsorted(edges, min_surface, side="left")) + 1
+            partial = int(np.searchsorted(edges, min_surface, side="right"))
+            if partial < first_full:
+                rows = self._cell_rows(np.flatnonzero(mask & (self.bucket == partial)))
+                rows = rows[self._surface[rows] >= min_surface]
+                extra_codes = self._insee[rows]
+                extra_surface = self._surface[rows]
+            mask &= self.bucket >= first_full
+
+        codes = np.concatenate((self.insee[mask], extra_codes))
+        counts = np.bincount(
+            codes, weights=np.concatenate((self.count[mask], np.ones(len(extra_codes)))), minlength=n
+        )
+        sums = np.bincount(codes, weights=np.concatenate((self.surface[mask], extra_surface)), minlength=n)
+        present = np.flatnonzero(counts)
+        return present, counts[present].astype(np.int64), sums[present]
+
+    def _cell_rows(self, cells: np.ndarray) -> np.ndarray:
+        lengths = self.count[cells]
+        if not len(cells):
+            return np.zeros(0, dtype=np.intp)
+        # Concatenate the row ranges [offset, offset + length) of each cell.
+        starts = np.repeat(self._offsets[cells] - np.cumsum(lengths) + lengths, lengths)
+        return self._rows[starts + np.arange(int(lengths.sum()))]
+
+
+def load_fire_store(path: str) -> FireStore:
+    """Parse the fires CSV once into a FireStore.
+
+    Parsing (header normalisation, surface/date rules) is shared with the
+    Postgres import in fires_csv; rows are then DEPARTEMENTS-filtered.
+    """
+
+    cols = read_fires_csv(path)
+    allowed = _allowed_departements()
+
+    if allowed:
+        dep_ok = np.asarray([(not v) or v in allowed for v in cols.departement_values], dtype=bool)
+        keep = np.flatnonzero(dep_ok[cols.departement])
+    else:
+        keep = np.arange(len(cols))
+
+    annee = cols.annee[keep]
+    numero = cols.numero[keep]
+    date_us = cols.date_us[keep]
+    surface = cols.surface_ha[keep]
+
+    # The alert year drives /api/metrics/insee filtering: it comes from
+    # the alert date, else Jan 1st of `annee`; it stays unknown (0)
+    # when neither parses. So does the timestamp (MISSING_INT): the
+    # request time stands in for it when records are rendered, never in
+    # the store or its snapshot.
+    has_date = date_us != MISSING_INT
+    has_annee = ~has_date & (annee >= 1) & (annee <= 9999)
+    ts_us = np.full(len(keep), MISSING_INT, dtype=np.int64)
+    ts_us[has_date] = date_us[has_date]
+    ts_us[has_annee] = (annee[has_annee] - 1970).astype("datetime64[Y]").astype("datetime64[us]").astype(np.int64)
+    year = np.zeros(len(keep), dtype=np.int16)
+    year[has_date] = date_us[has_date].astype("datetime64[us]").astype("datetime64[Y]").astype(np.int64) + 1970
+    year[has_annee] = annee[has_annee]
+
+    # Rows without a numeric numero get 1, 2, ... in file order.
+    no_id = numero == MISSING_INT
+    fire_id = numero.copy()
+    fire_id[no_id] = np.arange(1, int(no_id.sum()) + 1)
+
+    return FireStore(
+        fire_id=fire_id,
+        year=year,
+        ts_us=ts_us,
+        surface_ha=surface,
+        alerte=_alerte_codes(surface),
+        departement=cols.departement[keep].astype(np.int16),
+        insee=cols.insee[keep],
+        commune=cols.commune[keep],
+        origine=cols.origine[keep],
+        departement_values=cols.departement_values,
+        insee_values=cols.insee_values,
+        commune_values=cols.commune_values,
+        origine_values=cols.origine_values,
+    )
+
+
+def _csv_fingerprint(path: str, *, with_hash: bool = False) -> tuple:
+    """(mtime_ns, size[, sha256]) of ``path``; raises OSError if missing."""
+
+    st = os.stat(path)
+    if not with_hash:
+        return (st.st_mtime_ns, st.st_size)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return (st.st_mtime_ns, st.st_size, h.hexdigest())
+
+
+SNAPSHOT_VERSION = 2
+
+_SNAPSHOT_COLUMNS = (
+    "fire_id",
+    "year",
+    "ts_us",
+    "surface_ha",
+    "alerte",
+    "departement",
+    "insee",
+    "commune",
+    "origine",
+)
+_SNAPSHOT_POOLS = ("departement_values", "insee_values", "commune_values", "origine_values")
+
+
+def _snapshot_root(path: str) -> str | None:
+    """Directory holding the snapshots of ``path`` (None when disabled).
+
+    Env vars:
+    - FIRE_SNAPSHOT: set to 0/false/no to always parse the CSV.
+    - FIRE_SNAPSHOT_DIR: where to write snapshots (default: next to the CSV).
+    """
+
+    if (os.getenv("FIRE_SNAPSHOT") or "1").strip().lower() in {"0", "false", "no"}:
+        return None
+    base = (os.getenv("FIRE_SNAPSHOT_DIR") or "").strip() or os.path.dirname(os.path.abspath(path))
+    return os.path.join(base, f".{os.path.basename(path)}.snapshot")
+
+
+def _snapshot_manifest(path: str, fingerprint: tuple) -> dict:
+    # With FIRE_CSV_HASH the content hash alone identifies the source, so a
+    # touched but identical file still hits the snapshot.
+    source = [fingerprint[2]] if len(fingerprint) > 2 else list(fingerprint)
+    return {
+        "version": SNAPSHOT_VERSION,
+        "csv": os.path.abspath(path),
+        "fingerprint": source,
+        "departements": sorted(_allowed_departements()),
+    }
+
+
+def _snapshot_key(manifest: dict) -> str:
+    raw = json.dumps(manifest, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def read_fire_store_snapshot(path: str, fingerprint: tuple) -> FireStore | None:
+    """FireStore memory-mapped from the snapshot of ``path`` at ``fingerprint``.
+
+    Returns None when there is no snapshot for exactly this file content and
+    DEPARTEMENTS filter. Columns are mapped read-only, so worker processes
+    share their pages through the OS page cache.
+    """
+
+    root = _snapshot_root(path)
+    if root is None:
+        return None
+    expected = _snapshot_manifest(path, fingerprint)
+    folder = os.path.join(root, _snapshot_key(expected))
+    try:
+        with open(os.path.join(folder, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if {k: manifest.get(k) for k in expected} != expected:
+            return None
+        columns = {
+            name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r").view(np.ndarray)
+            for name in _SNAPSHOT_COLUMNS
+        }
+    except (OSError, ValueError):
+        return None
+    if any(len(col) != manifest["rows"] for col in columns.values()):
+        return None
+    return FireStore(**columns, **{name: manifest[name] for name in _SNAPSHOT_POOLS})
+
+
+def write_fire_store_snapshot(path: str, fingerprint: tuple, store: FireStore) -> None:
+    """Persist ``store`` as the snapshot of ``path`` at ``fingerprint``.
+
+    Files are written to a temporary directory that is renamed into place,
+    so readers never see a partial snapshot. Older snapshots of the same
+    file and DEPARTEMENTS filter are removed afterwards.
+    """
+
+    root = _snapshot_root(path)
+    if root is None:
+        return
+    manifest = _snapshot_manifest(path, fingerprint)
+    key = _snapshot_key(manifest)
+    folder = os.path.join(root, key)
+    if os.path.isdir(folder):
+        return
+
+    os.makedirs(root, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=root)
+    try:
+        for name in _SNAPSHOT_COLUMNS:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(store, name), allow_pickle=False)
+        manifest.update(
+            rows=len(store),
+            created_at=_utc_iso(datetime.now(timezone.utc)),
+            **{name: getattr(store, name) for name in _SNAPSHOT_POOLS},
+        )
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        try:
+            os.rename(tmp, folder)
+        except OSError:
+            # Another worker published the same snapshot first.
+            return
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for other in os.listdir(root):
+        if other == key or other.startswith("."):
+            continue
+        try:
+            with open(os.path.join(root, other, "manifest.json"), "r", encoding="utf-8") as f:
+                old = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if old.get("csv") == manifest["csv"] and old.get("departements") == manifest["departements"]:
+            # Processes still mapping these files keep them alive until unmapped.
+            shutil.rmtree(os.path.join(root, other), ignore_errors=True)
+
+
+def load_fire_store_cached(path: str, fingerprint: tuple) -> FireStore:
+    """FireStore for ``path`` from its snapshot, parsing (and snapshotting) on a miss."""
+
+    store = read_fire_store_snapshot(path, fingerprint)
+    if store is not None:
+        return store
+
+    store = load_fire_store(path)
+    # Only snapshot what was parsed from the fingerprinted file content.
+    if _csv_fingerprint(path)[:2] == fingerprint[:2]:
+        try:
+            write_fire_store_snapshot(path, fingerprint, store)
+        except OSError as e:
+            print(f"[fires] Could not write snapshot for {path}: {e}")
+    return store
+
+
+class FireStoreWatcher:
+    """Keeps a FireStore in sync with its CSV file.
+
+    A daemon thread polls the file fingerprint every FIRE_CSV_POLL_SECONDS
+    (default 5, 0 disables polling) and rebuilds the store in the background
+    when it changes. Readers keep getting the previous snapshot until the new
+    one is fully built, then the reference is swapped in one assignment.
+
+    With FIRE_CSV_HASH=1 the fingerprint also includes a SHA-256 of the
+    content, so a touched or re-copied but identical file is not reparsed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.with_hash = (os.getenv("FIRE_CSV_HASH") or "").strip().lower() in {"1", "true", "yes"}
+        self.poll_seconds = float(os.getenv("FIRE_CSV_POLL_SECONDS", "5"))
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._pid: int | None = None
+
+        self.fingerprint = _csv_fingerprint(path, with_hash=self.with_hash)
+        self.store = load_fire_store_cached(path, self.fingerprint)
+        self.loaded_at = datetime.now(timezone.utc)
+
+    def current(self) -> FireStore:
+        # Threads do not survive fork(): (re)start the poller in each worker.
+        if self.poll_seconds > 0 and self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._reloading = False
+                    threading.Thread(
+                        target=self._poll_forever, name="fire-csv-watcher", daemon=True
+                    ).start()
+        return self.store
+
+    def _poll_forever(self) -> None:
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.check()
+            except Exception as e:  # noqa: BLE001
+                print(f"[fires] CSV watcher error for {self.path}: {e}")
+
+    def check(self) -> bool:
+        """Start a background rebuild if the file changed. Returns True if started."""
+
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            # File being replaced or removed: keep serving the last snapshot.
+            return False
+        if (st.st_mtime_ns, st.st_size) == self.fingerprint[:2]:
+            return False
+
+        with self._lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+        threading.Thread(target=self._rebuild, name="fire-csv-reload", daemon=True).start()
+        return True
+
+    def _rebuild(self) -> None:
+        try:
+            before = _csv_fingerprint(self.path, with_hash=self.with_hash)
+            if self.with_hash and len(self.fingerprint) > 2 and before[2] == self.fingerprint[2]:
+                self.fingerprint = before
+                return
+
+            store = load_fire_store_cached(self.path, before)
+
+            # A copy still in progress changes under our feet: drop this build
+            # and let the next poll pick up the finished file.
+            if _csv_fingerprint(self.path)[:2] != before[:2]:
+                return
+
+            self.store = store
+            self.fingerprint = before
+            self.loaded_at = datetime.now(timezone.utc)
+            print(f"[fires] Reloaded {self.path}: {len(store)} fires")
+        except Exception as e:  # noqa: BLE001
+            print(f"[fires] Failed to reload {self.path}, keeping previous data: {e}")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+
+_watchers: dict[tuple[str, tuple[str, ...]], FireStoreWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_fire_store_watcher(path: str) -> FireStoreWatcher:
+    """Process-wide watcher for ``path``, parsing the file on first use."""
+
+    key = (os.path.abspath(path), tuple(sorted(_allowed_departements())))
+    watcher = _watchers.get(key)
+    if watcher is not None:
+        return watcher
+
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            watcher = FireStoreWatcher(path)
+            _watchers[key] = watcher
+    return watcher
+
+
+def get_fire_store(path: str) -> FireStore:
+    """Current FireStore snapshot for ``path``."""
+
+    return get_fire_store_watcher(path).current()
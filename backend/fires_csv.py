@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+import multiprocessing
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Iterator
+
+import numpy as np
+
+# Shared reader of the Prométhée fires CSV, used by the in-process fire store
+# and by scripts/import_fires_csv.py.
+#
+# Large files are split on line boundaries into byte ranges that worker
+# processes read and parse themselves; each worker returns typed NumPy
+# columns plus its own string pools, which are merged here. Missing values use sentinels rather
+# than None so that the columns stay typed.
+
+ENCODING = "latin-1"  # legacy export encoding; latin-1 never fails to decode
+DELIMITER = ";"
+
+MISSING_INT = np.iinfo(np.int64).min  # numero / date_us not parseable
+
+# Files smaller than this are parsed in-process: starting spawn workers
+# (a fresh interpreter importing numpy each) costs more than it saves.
+# See scripts/bench_fires_csv.py.
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _strip_accents(s: str) -> str:
+    return "".join(
+        c
+        for c in unicodedata.normalize("NFKD", s)
+        if not unicodedata.combining(c)
+    )
+
+
+def _norm_key(s: str) -> str:
+    s = _strip_accents(s).lower()
+    s = re.sub(r"[^a-z0-9]+", "", s)
+    return s
+
+
+def _parse_dt(value: str) -> datetime | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+
+    # Fast path for the export's own layout, dd/mm/YYYY HH:MM[:SS]: slice it
+    # instead of going through strptime. Anything else (or an invalid date,
+    # which datetime() rejects) falls through to the strptime chain below.
+    n = len(value)
+    if (
+        (n == 16 or (n == 19 and value[16] == ":"))
+        and value[2] == "/"
+        and value[5] == "/"
+        and value[10] == " "
+        and value[13] == ":"
+    ):
+        digits = value[0:2] + value[3:5] + value[6:10] + value[11:13] + value[14:16] + value[17:19]
+        if digits.isascii() and digits.isdigit():
+            try:
+                return datetime(
+                    int(value[6:10]),
+                    int(value[3:5]),
+                    int(value[0:2]),
+                    int(value[11:13]),
+                    int(value[14:16]),
+                    int(value[17:19]) if n == 19 else 0,
+                    tzinfo=timezone.utc,
+                )
+            except ValueError:
+                pass
+
+    # Common formats in your CSV: 09/01/1973 13:50
+    for fmt in ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ"):
+        try:
+            dt = datetime.strptime(value, fmt)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.astimezone(timezone.utc)
+        except ValueError:
+            continue
+
+    return None
+
+
+def _to_us(dt: datetime) -> int:
+    delta = dt - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _parse_float(value: str | None) -> float | None:
+    raw = (value or "").replace(",", ".").strip()
+    try:
+        return float(raw) if raw else None
+    except ValueError:
+        return None
+
+
+class _StringPool:
+    """Interns strings to small integer codes (code 0 is always "")."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = [""]
+        self._codes: dict[str, int] = {"": 0}
+
+    def code(self, value: str) -> int:
+        c = self._codes.get(value)
+        if c is None:
+            c = len(self.values)
+            self._codes[value] = c
+            self.values.append(value)
+        return c
+
+
+# Logical column -> accepted header spellings, compared through _norm_key.
+COLUMN_CANDIDATES = {
+    "annee": ("annee",),
+    "numero": ("numero", "num"),
+    "departement": ("departement",),
+    "insee": ("codeinsee", "insee", "codinsee"),
+    "commune": ("commune",),
+    "date_alerte": ("alerte",),
+    "origine": ("originedelalerte", "originedalerte"),
+    "surf_ha": ("surfha",),
+    "surface_m2": ("surfaceparcouruem2",),
+}
+
+STRING_COLUMNS = ("departement", "insee", "commune", "origine")
+
+
+def _header_columns(fieldnames: list[str]) -> dict[str, int | None]:
+    """Index of each logical column in ``fieldnames`` (None when absent)."""
+
+    # Map normalized header -> index (the last duplicate wins, like DictReader)
+    header_map = {_norm_key(h): i for (i, h) in enumerate(fieldnames)}
+
+    def col(*candidates: str) -> int | None:
+        for c in candidates:
+            key = _norm_key(c)
+            if key in header_map:
+                return header_map[key]
+        return None
+
+    return {name: col(*candidates) for (name, candidates) in COLUMN_CANDIDATES.items()}
+
+
+def _field(row: list[str], i: int | None) -> str:
+    # Short rows read as "" for the missing trailing fields (DictReader restval).
+    return row[i] if i is not None and i < len(row) else ""
+
+
+# Distinct alert dates remembered per reader before the memo starts over.
+_DATE_MEMO_MAX = 1 << 16
+
+
+def _typed_records(rows: Iterator[list[str]], columns: dict[str, int | None]) -> Iterator[tuple]:
+    """(annee, numero, date_us, surface_ha, departement, insee, commune,
+    origine) for each CSV row, with the FireColumns sentinels."""
+
+    c_annee = columns["annee"]
+    c_numero = columns["numero"]
+    c_date = columns["date_alerte"]
+    c_surf_ha = columns["surf_ha"]
+    c_surface_m2 = columns["surface_m2"]
+    c_strings = [columns[name] for name in STRING_COLUMNS]
+    date_memo: dict[str, int] = {}
+
+    for row in rows:
+        if not row:
+            continue  # blank line, skipped like csv.DictReader does
+        try:
+            annee = int(_field(row, c_annee).strip())
+        except ValueError:
+            annee = 0
+
+        try:
+            numero = int(_field(row, c_numero).strip())
+        except ValueError:
+            numero = MISSING_INT
+
+        # Alert dates repeat (same minute, empty cells): memoise them.
+        raw = _field(row, c_date)
+        us = date_memo.get(raw)
+        if us is None:
+            if len(date_memo) >= _DATE_MEMO_MAX:
+                date_memo.clear()
+            dt = _parse_dt(raw)
+            us = date_memo[raw] = _to_us(dt) if dt is not None else MISSING_INT
+
+        surface_ha = _parse_float(_field(row, c_surf_ha)) if c_surf_ha is not None else None
+        if surface_ha is None and c_surface_m2 is not None:
+            m2 = _parse_float(_field(row, c_surface_m2))
+            surface_ha = (m2 / 10000.0) if m2 is not None else None
+
+        yield (
+            annee,
+            numero,
+            us,
+            surface_ha if surface_ha is not None else np.nan,
+            *(_field(row, i).strip() for i in c_strings),
+        )
+
+
+def _parse_chunk(path: str, start: int, end: int, columns: dict[str, int | None]) -> dict:
+    """Parse bytes [start, end) of ``path``, which hold whole CSV records."""
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    pools = [_StringPool() for _name in STRING_COLUMNS]
+    reader = csv.reader(io.StringIO(data.decode(ENCODING), newline=""), delimiter=DELIMITER)
+    records = list(_typed_records(reader, columns))
+    del data, reader
+
+    def column(k: int, dtype) -> np.ndarray:
+        return np.fromiter((r[k] for r in records), dtype=dtype, count=len(records))
+
+    return {
+        "annee": column(0, np.int64),
+        "numero": column(1, np.int64),
+        "date_us": column(2, np.int64),
+        "surface_ha": column(3, np.float64),
+        "codes": {
+            name: np.fromiter((pool.code(r[4 + k]) for r in records), dtype=np.int32, count=len(records))
+            for k, (name, pool) in enumerate(zip(STRING_COLUMNS, pools))
+        },
+        "pools": {name: pool.values for (name, pool) in zip(STRING_COLUMNS, pools)},
+    }
+
+
+def _count_quotes(data, start: int, end: int) -> int:
+    # mmap has no count(): go through bounded slices.
+    step = 1 << 20
+    return sum(data[i : min(i + step, end)].count(b'"') for i in range(start, end, step))
+
+
+def _record_end(data, pos: int, base: int = 0) -> int:
+    """Offset just past the first record-ending newline at or after ``pos``.
+
+    A newline only ends a record outside quotes, i.e. after an even number
+    of '"' bytes since ``base``, a known record start at or before ``pos``
+    (escaped quotes are doubled, which keeps the parity right). Only
+    ``data[base:]`` up to the answer is scanned. Returns -1 when there is
+    none.
+    """
+
+    odd = 0
+    scanned = base
+    pos = data.find(b"\n", pos)
+    while pos != -1:
+        odd ^= _count_quotes(data, scanned, pos) & 1
+        if not odd:
+            return pos + 1
+        scanned = pos
+        pos = data.find(b"\n", pos + 1)
+    return -1
+
+
+def _record_ranges(data, start: int, parts: int) -> list[tuple[int, int]]:
+    """Split ``data[start:]`` into at most ``parts`` byte ranges of whole records."""
+
+    bounds = [start]
+    size = len(data) - start
+    for k in range(1, parts):
+        end = _record_end(data, max(start + size * k // parts, bounds[-1]), bounds[-1])
+        if end == -1 or end >= len(data):
+            break
+        if end > bounds[-1]:
+            bounds.append(end)
+    if bounds[-1] < len(data):
+        bounds.append(len(data))
+    return list(zip(bounds, bounds[1:]))
+
+
+def _cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _workers() -> int:
+    raw = (os.getenv("FIRE_CSV_WORKERS") or "").strip()
+    if raw:
+        return max(1, int(raw))
+    return _cpus()
+
+
+class FireColumns:
+    """Typed columns of every CSV record, in file order.
+
+    - annee: int64, 0 when empty or not an integer.
+    - numero / date_us: int64, MISSING_INT when not parseable; date_us is
+      the alert date in microseconds since the epoch (UTC).
+    - surface_ha: float64, NaN when missing (surf_ha, else m2 / 10000).
+    - departement / insee / commune / origine: int32 codes into the
+      matching ``*_values`` list (code 0 is "").
+    - found: logical names of the columns present in the header.
+    """
+
+    def __init__(self, *, found, annee, numero, date_us, surface_ha, codes, pools) -> None:
+        self.found: set[str] = found
+        self.annee = annee
+        self.numero = numero
+        self.date_us = date_us
+        self.surface_ha = surface_ha
+        self.departement = codes["departement"]
+        self.insee = codes["insee"]
+        self.commune = codes["commune"]
+        self.origine = codes["origine"]
+        self.departement_values: list[str] = pools["departement"]
+        self.insee_values: list[str] = pools["insee"]
+        self.commune_values: list[str] = pools["commune"]
+        self.origine_values: list[str] = pools["origine"]
+
+    def __len__(self) -> int:
+        return len(self.annee)
+
+
+def _merge_chunks(found: set[str], chunks: list[dict]) -> FireColumns:
+    codes = {}
+    pools = {}
+    for name in STRING_COLUMNS:
+        pool = _StringPool()
+        parts = []
+        for chunk in chunks:
+            # Chunk-local codes -> merged codes through a lookup array.
+            remap = np.asarray([pool.code(v) for v in chunk["pools"][name]], dtype=np.int32)
+            parts.append(remap[chunk["codes"][name]])
+        codes[name] = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+        pools[name] = pool.values
+
+    def cat(key: str, dtype) -> np.ndarray:
+        if not chunks:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate([chunk[key] for chunk in chunks])
+
+    return FireColumns(
+        found=found,
+        annee=cat("annee", np.int64),
+        numero=cat("numero", np.int64),
+        date_us=cat("date_us", np.int64),
+        surface_ha=cat("surface_ha", np.float64),
+        codes=codes,
+        pools=pools,
+    )
+
+
+def read_fires_csv(path: str, *, workers: int | None = None) -> FireColumns:
+    """Parse the fires CSV into typed columns, using several processes.
+
+    Files under PARALLEL_MIN_BYTES, and any file on a single CPU, are
+    parsed in-process.
+
+    Env vars:
+    - FIRE_CSV_WORKERS: worker processes (default: CPU count, never more;
+      1 parses in-process).
+    """
+
+    if workers is None:
+        workers = _workers()
+    workers = min(workers, _cpus())
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        # Mapped rather than read: only the header and the bytes around the
+        # split points are touched here, the workers read their own ranges.
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        try:
+            # Header: first record, decoded with the csv module like the rows.
+            header_end = _record_end(data, 0)
+            if header_end == -1:
+                header_end = len(data)
+            header = next(
+                csv.reader(io.StringIO(data[:header_end].decode(ENCODING), newline=""), delimiter=DELIMITER), []
+            )
+            if size < PARALLEL_MIN_BYTES:
+                workers = 1
+            ranges = _record_ranges(data, header_end, workers) if header else []
+        finally:
+            if size:
+                data.close()
+
+    columns = _header_columns(header)
+    found = {name for (name, i) in columns.items() if i is not None}
+    if not header:
+        return _merge_chunks(found, [])
+
+    if len(ranges) <= 1:
+        chunks = [_parse_chunk(path, start, end, columns) for (start, end) in ranges]
+    else:
+        # spawn: the caller may be a threaded web process, where fork is unsafe.
+        ctx = multiprocessing.get_context("spawn")
+        try:
+            with ProcessPoolExecutor(max_workers=len(ranges), mp_context=ctx) as pool:
+                futures = [pool.submit(_parse_chunk, path, start, end, columns) for (start, end) in ranges]
+                chunks = [fut.result() for fut in futures]
+        except BrokenProcessPool:
+            # Workers could not start (e.g. __main__ not importable): parse here.
+            chunks = [_parse_chunk(path, start, end, columns) for (start, end) in ranges]
+
+    return _merge_chunks(found, chunks)
+
+
+def iter_fires_csv(path: str) -> tuple[set[str], Iterator[tuple]]:
+    """Header columns found in ``path`` and its records, read one at a time.
+
+    Records are (annee, numero, date_us, surface_ha, departement, insee,
+    commune, origine) with the same sentinels as FireColumns, strings
+    decoded instead of coded. Memory does not grow with the file: use it
+    where the rows are consumed once, like the Postgres import.
+    """
+
+    with open(path, "r", encoding=ENCODING, newline="") as f:
+        header = next(csv.reader(f, delimiter=DELIMITER), [])
+    columns = _header_columns(header)
+    found = {name for (name, i) in columns.items() if i is not None}
+
+    def records() -> Iterator[tuple]:
+        if not header:
+            return
+        with open(path, "r", encoding=ENCODING, newline="") as f:
+            reader = csv.reader(f, delimiter=DELIMITER)
+            next(reader, None)
+            yield from _typed_records(reader, columns)
+
+    return found, records()
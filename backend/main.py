@@ -1,23 +1,49 @@
 from __future__ import annotations
 
-import csv
+import hashlib
 import json
+import mimetypes
 import os
 import random
 import re
 import shutil
 import tempfile
-from typing import Optional
-import unicodedata
+import threading
+from typing import Iterable, Iterator, Optional
 import zipfile
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from urllib.parse import parse_qs, urlparse
 
-from flask import Flask, Response, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_file, send_from_directory
+from werkzeug.security import safe_join
 from flask_cors import CORS
 
+from fire_store import _allowed_departements, get_fire_store, get_fire_store_watcher
+from fires_csv import MISSING_INT
+from qgis2web_styles import parse_qgis2web_styles
+from response_cache import (
+    COMPRESSIBLE_MIMETYPES,
+    GZIP_MIN_BYTES,
+    CachedBody,
+    ResponseCache,
+    compress,
+    encoded_etag,
+    negotiate_encoding,
+    precompressed_path,
+)
+from spatial import PolygonLayer
+from topology import MAX_LEVEL, Topology, level_tolerance, tolerance_level
+from vector_tiles import (
+    DISK_MAX_ZOOM as TILE_DISK_MAX_ZOOM,
+    MAX_ZOOM,
+    MIME_TYPE as MVT_MIME_TYPE,
+    TileStore,
+    tile_version,
+)
+
 try:
-    from db import get_database_url, db_conn
+    from db import ALERTE_CASE_SQL, FIRE_SORT_SQL, FIRE_TS_SQL, FIRE_YEAR_SQL, get_database_url, db_conn, pool_stats
 except ImportError:
     # Pas de support PostgreSQL : on désactive la base
     def get_database_url():
@@ -26,12 +52,50 @@ except ImportError:
     @contextmanager
     def db_conn():
         raise RuntimeError("DATABASE_URL is not set")
+    def pool_stats():
+        return None
+    ALERTE_CASE_SQL = FIRE_SORT_SQL = FIRE_TS_SQL = FIRE_YEAR_SQL = ""
 
 
 def _utc_iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+def _parse_iso_datetime(value: str, *, end_of_day: bool = False) -> datetime:
+    """Parse an ISO date or datetime query parameter as UTC.
+
+    A bare date (YYYY-MM-DD) means midnight, or the last microsecond of that
+    day with ``end_of_day`` so that ``to=2020-08-31`` includes the whole day.
+    Raises ValueError on malformed input.
+    """
+
+    value = value.strip()
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    if end_of_day and len(value) == 10:
+        dt += timedelta(days=1, microseconds=-1)
+    return dt.astimezone(timezone.utc)
+
+
+# Date part of the cursor after a fire with no known date (listed last).
+NO_DATE_CURSOR = "-infinity"
+
+
+def _parse_fires_cursor(value: str) -> tuple[datetime | None, int]:
+    """Split a ``before=<date>,<key>`` keyset cursor from /api/fires.
+
+    The date is None for NO_DATE_CURSOR.
+    """
+
+    date_s, _, key_s = value.strip().rpartition(",")
+    if not date_s:
+        raise ValueError("before must look like <date>,<id>")
+    if date_s == NO_DATE_CURSOR:
+        return None, int(key_s)
+    return _parse_iso_datetime(date_s), int(key_s)
+
+
 def _get_git_sha_short(base_dir: str) -> str | None:
     """Best-effort git SHA for debugging deployments.
 
@@ -62,255 +126,43 @@ def _get_git_sha_short(base_dir: str) -> str | None:
     return None
 
 
-def _strip_accents(s: str) -> str:
-    return "".join(
-        c
-        for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
-
-
-def _norm_key(s: str) -> str:
-    s = _strip_accents(s).lower()
-    s = re.sub(r"[^a-z0-9]+", "", s)
-    return s
-
-
-def _alerte_from_surface(surface_ha: float | None) -> str:
-    if surface_ha is None:
-        return "?"
-    if surface_ha < 1:
-        return "Jaune"
-    if surface_ha < 10:
-        return "Orange"
-    if surface_ha < 50:
-        return "Rouge"
-    return "Noir"
-
-
-def _parse_dt(value: str) -> datetime | None:
-    value = (value or "").strip()
-    if not value:
-        return None
-
-    # Common formats in your CSV: 09/01/1973 13:50
-    for fmt in ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ"):
-        try:
-            dt = datetime.strptime(value, fmt)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            return dt.astimezone(timezone.utc)
-        except ValueError:
-            continue
-
-    return None
-
-
-def _read_fires_from_csv(path: str) -> list[dict]:
-    # NB: file uses semicolon delimiter and legacy encoding.
-    # We decode with latin-1 to avoid crashes and keep content readable.
-    with open(path, "r", encoding="latin-1", newline="") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        if reader.fieldnames is None:
-            return []
-
-        # Map normalized header -> actual header
-        header_map = {_norm_key(h): h for h in reader.fieldnames}
-
-        def col(*candidates: str) -> str | None:
-            for c in candidates:
-                key = _norm_key(c)
-                if key in header_map:
-                    return header_map[key]
-            return None
-
-        c_annee = col("annee")
-        c_numero = col("numero", "num")
-        c_departement = col("departement")
-        c_insee = col("codeinsee", "insee", "codinsee")
-        c_commune = col("commune")
-        c_date_alerte = col("alerte")
-        c_origine = col("originedelalerte", "originedalerte")
-        c_surf_ha = col("surfha")
-        c_surface_m2 = col("surfaceparcouruem2")
-
-        allowed_deps = os.getenv("DEPARTEMENTS", "04,05,06,13,83,84")
-        allowed = {x.strip() for x in allowed_deps.split(",") if x.strip()}
-
-        fires: list[dict] = []
-        fallback_id = 0
-        for row in reader:
-            dep = (row.get(c_departement) if c_departement else "")
-            dep = (dep or "").strip()
-            if allowed and dep and dep not in allowed:
-                continue
-
-            commune = (row.get(c_commune) if c_commune else "")
-            commune = (commune or "").strip()
-
-            surface_ha = None
-            if c_surf_ha:
-                raw = (row.get(c_surf_ha) or "").replace(",", ".").strip()
-                try:
-                    surface_ha = float(raw) if raw else None
-                except ValueError:
-                    surface_ha = None
-
-            if surface_ha is None and c_surface_m2:
-                raw = (row.get(c_surface_m2) or "").replace(",", ".").strip()
-                try:
-                    m2 = float(raw) if raw else None
-                    surface_ha = (m2 / 10000.0) if m2 is not None else None
-                except ValueError:
-                    surface_ha = None
-
-            dt = _parse_dt(row.get(c_date_alerte, "") if c_date_alerte else "")
-            if dt is None and c_annee:
-                # fallback: use Jan 1st of the year
-                y = (row.get(c_annee) or "").strip()
-                try:
-                    dt = datetime(int(y), 1, 1, tzinfo=timezone.utc)
-                except ValueError:
-                    dt = datetime.now(timezone.utc)
-
-            alerte = _alerte_from_surface(surface_ha)
-
-            origine = (row.get(c_origine) if c_origine else "")
-            origine = (origine or "").strip()
-            cause = f"Origine {origine}" if origine else "Inconnue"
-
-            insee = (row.get(c_insee) if c_insee else "")
-            insee = (insee or "").strip()
-
-            raw_id = (row.get(c_numero) if c_numero else "")
-            raw_id = (raw_id or "").strip()
-            try:
-                fire_id = int(raw_id)
-            except ValueError:
-                fallback_id += 1
-                fire_id = fallback_id
-
-            fires.append(
-                {
-                    "id": fire_id,
-                    "commune": commune or "-",
-                    "latitude": None,
-                    "longitude": None,
-                    "surface_ha": round(surface_ha, 2) if surface_ha is not None else None,
-                    "alerte": alerte,
-                    "cause": cause,
-                    "date": _utc_iso(dt),
-                    "departement": dep or None,
-                    "insee": insee or None,
-                }
-            )
-
-        # Newest first
-        fires.sort(key=lambda f: f.get("date", ""), reverse=True)
-        max_records = int(os.getenv("MAX_FIRES", "500"))
-        return fires[:max_records]
-
-
 def _metrics_by_insee_from_csv(path: str, *, filters: dict | None = None) -> dict[str, dict]:
-    """Aggregate metrics by INSEE directly from the CSV.
+    """Aggregate metrics by INSEE in CSV mode, from the in-memory fire store.
 
-    This is used for choropleths / joins without requiring Postgres.
+    FireStore.metrics_by_insee sums the cells of its pre-aggregated cube
+    (FireCube) rather than re-reading the CSV. This is used for choropleths
+    / joins without requiring Postgres.
     """
 
-    filters = filters or {}
-    dep_filter = (filters.get("departement") or "").strip()
-    alerte_filter = (filters.get("alerte") or "").strip()
-    year_filter = (filters.get("year") or "").strip()
-    min_surface = filters.get("min_surface")
-
-    try:
-        min_surface_f = float(min_surface) if min_surface not in (None, "") else None
-    except (TypeError, ValueError):
-        min_surface_f = None
-
-    allowed_deps = os.getenv("DEPARTEMENTS", "04,05,06,13,83,84")
-    allowed = {x.strip() for x in allowed_deps.split(",") if x.strip()}
-
-    out: dict[str, dict] = {}
-
-    with open(path, "r", encoding="latin-1", newline="") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        if reader.fieldnames is None:
-            return {}
-
-        header_map = {_norm_key(h): h for h in reader.fieldnames}
-
-        def col(*candidates: str) -> str | None:
-            for c in candidates:
-                key = _norm_key(c)
-                if key in header_map:
-                    return header_map[key]
-            return None
-
-        c_departement = col("departement")
-        c_insee = col("codeinsee", "insee", "codinsee")
-        c_surf_ha = col("surfha")
-        c_surface_m2 = col("surfaceparcouruem2")
-        c_date_alerte = col("alerte")
-        c_annee = col("annee")
-
-        for row in reader:
-            dep = (row.get(c_departement) if c_departement else "")
-            dep = (dep or "").strip()
-            if allowed and dep and dep not in allowed:
-                continue
-            if dep_filter and dep_filter != "all" and dep != dep_filter:
-                continue
-
-            insee = (row.get(c_insee) if c_insee else "")
-            insee = (insee or "").strip()
-            if not insee:
-                continue
-
-            surface_ha = None
-            if c_surf_ha:
-                raw = (row.get(c_surf_ha) or "").replace(",", ".").strip()
-                try:
-                    surface_ha = float(raw) if raw else None
-                except ValueError:
-                    surface_ha = None
-
-            if surface_ha is None and c_surface_m2:
-                raw = (row.get(c_surface_m2) or "").replace(",", ".").strip()
-                try:
-                    m2 = float(raw) if raw else None
-                    surface_ha = (m2 / 10000.0) if m2 is not None else None
-                except ValueError:
-                    surface_ha = None
+    return get_fire_store(path).metrics_by_insee(filters)
 
-            alerte = _alerte_from_surface(surface_ha)
-            if alerte_filter and alerte_filter != "all" and alerte != alerte_filter:
-                continue
 
-            if year_filter and year_filter != "all":
-                dt = _parse_dt(row.get(c_date_alerte, "") if c_date_alerte else "")
-                if dt is None and c_annee:
-                    y = (row.get(c_annee) or "").strip()
-                    try:
-                        dt = datetime(int(y), 1, 1, tzinfo=timezone.utc)
-                    except ValueError:
-                        dt = None
-                if dt is None or str(dt.year) != year_filter:
-                    continue
+def _ndjson_chunks(records: Iterable[dict], batch: int = 500) -> Iterator[str]:
+    buf: list[str] = []
+    for rec in records:
+        buf.append(json.dumps(rec, ensure_ascii=False))
+        if len(buf) >= batch:
+            yield "\n".join(buf) + "\n"
+            buf = []
+    if buf:
+        yield "\n".join(buf) + "\n"
 
-            if min_surface_f is not None:
-                s = surface_ha if surface_ha is not None else 0.0
-                if s < min_surface_f:
-                    continue
 
-            agg = out.get(insee)
-            if not agg:
-                agg = {"fires": 0, "surface_ha": 0.0}
-                out[insee] = agg
-            agg["fires"] += 1
-            agg["surface_ha"] = round(float(agg["surface_ha"]) + float(surface_ha or 0.0), 2)
+def _json_array_chunks(records: Iterable[dict], *, wrap: bool, batch: int = 500) -> Iterator[str]:
+    """Stream ``[...]``, or ``{"value": [...], "Count": n}`` when ``wrap``."""
 
-    return out
+    yield '{"value": [' if wrap else "["
+    count = 0
+    buf: list[str] = []
+    for rec in records:
+        buf.append(json.dumps(rec, ensure_ascii=False))
+        count += 1
+        if len(buf) >= batch:
+            yield ("" if count == len(buf) else ", ") + ", ".join(buf)
+            buf = []
+    if buf:
+        yield ("" if count == len(buf) else ", ") + ", ".join(buf)
+    yield f'], "Count": {count}}}' if wrap else "]"
 
 
 def _generate_mock_fires(count: int = 30) -> list[dict]:
@@ -371,6 +223,60 @@ def create_app() -> Flask:
     default_csv = os.path.join(base_dir, "data", "liste_incendies_all.csv")
 
     cartes_dir = os.path.join(base_dir, "data", "cartes")
+    # Files derived from the exports (compressed assets, layer manifests),
+    # kept out of the export folders: writing there would bump the mtimes
+    # the latest-export selection and the caches rely on.
+    qgis2web_cache_dir = os.getenv("QGIS2WEB_CACHE_DIR") or os.path.join(base_dir, "data", "qgis2web_cache")
+
+    # Serialised /api/qgis2web/layers/<id> responses (LAYER_CACHE_MB, 0 disables).
+    layer_cache = ResponseCache(float(os.getenv("LAYER_CACHE_MB", "128")) * 1024 * 1024)
+
+    # Compiled layer lists, persisted as <export>/manifest.json under
+    # qgis2web_cache_dir. Bump the version whenever the compiled output
+    # changes.
+    qgis2web_manifest_version = 1
+    qgis2web_manifests: dict[str, dict] = {}
+
+    # Shared-arc topologies of recently simplified layers (?zoom= / ?tolerance=).
+    layer_topologies: OrderedDict[tuple, tuple[object, Topology]] = OrderedDict()
+    layer_topologies_max = 4
+    layer_topologies_lock = threading.Lock()
+    # One lock per layer key, so building one topology does not hold up
+    # requests for the others.
+    layer_topology_build_locks: dict[tuple, threading.Lock] = {}
+
+    # Static boundary layers shared with the dashboard (public/geo).
+    geo_dir = os.getenv("GEO_DIR") or os.path.join(base_dir, "..", "nextjs-dashboard", "public", "geo")
+    geo_layers = {
+        "communes": os.getenv("COMMUNES_GEOJSON") or os.path.join(geo_dir, "CommunesPromethee.simplified.geojson"),
+        "zones": os.path.join(geo_dir, "zonePromethee.simplified.geojson"),
+        "departements": os.path.join(geo_dir, "departements.simplified.geojson"),
+    }
+
+    # Polygon indexes (point-in-polygon, bbox queries) of the same layers, read
+    # from the shapefiles in data/Commune (SHAPEFILE_DIR) when their .shp is
+    # there and from the GeoJSON above otherwise.
+    shapefile_dir = os.getenv("SHAPEFILE_DIR") or os.path.join(base_dir, "..", "data", "Commune")
+    shapefiles = {
+        "communes": os.path.join(shapefile_dir, "CommunesPromethee.shp"),
+        "zones": os.path.join(shapefile_dir, "zonePromethee.shp"),
+        "departements": os.path.join(shapefile_dir, "déparetements.shp"),
+    }
+    polygon_layers: dict[str, tuple[object, PolygonLayer]] = {}
+    polygon_layers_lock = threading.Lock()
+    polygon_layer_build_locks = {name: threading.Lock() for name in shapefiles}
+    locate_max_points = int(os.getenv("LOCATE_MAX_POINTS", "100000"))
+
+    # Vector tiles cut so far (TILE_CACHE=0 keeps them in memory only), up to
+    # TILE_CACHE_MAX_ZOOM and TILE_CACHE_MB on disk.
+    tile_cache_dir = None
+    if (os.getenv("TILE_CACHE") or "1").strip().lower() not in {"0", "false", "no"}:
+        tile_cache_dir = os.getenv("TILE_CACHE_DIR") or os.path.join(base_dir, "data", "tiles")
+    tile_store = TileStore(
+        tile_cache_dir,
+        max_disk_zoom=int(os.getenv("TILE_CACHE_MAX_ZOOM", str(TILE_DISK_MAX_ZOOM))),
+        max_disk_bytes=int(float(os.getenv("TILE_CACHE_MB", "256")) * 1024 * 1024),
+    )
 
     def _maybe_bootstrap_qgis2web_exports() -> None:
         """Optionally download a QGIS2Web export ZIP into backend/data/cartes.
@@ -530,15 +436,7 @@ def create_app() -> Flask:
         return os.path.join(export_dir, "data")
 
     def _parse_qgis2web_styles(export_dir: str) -> dict[str, dict]:
-        """Best-effort parse of QGIS2Web style_* functions from index.html.
-
-        Supports:
-        - Simple styles: return { color, weight, fillColor, fillOpacity, opacity }
-        - Categorized styles: switch(String(feature.properties['FIELD'])) { case 'x': return {...}; default: ... }
-        - Graduated styles: repeated if(...) { return {...} } blocks (range rules)
-
-        Returns mapping: layer_id -> style dict
-        """
+        """Styles of the export's layers (see qgis2web_styles), by layer id."""
 
         index_path = os.path.join(export_dir, "index.html")
         if not os.path.isfile(index_path):
@@ -550,169 +448,7 @@ def create_app() -> Flask:
         except OSError:
             return {}
 
-        def _extract_number(obj_text: str, key: str) -> float | None:
-            m = re.search(rf"\b{re.escape(key)}\s*:\s*([0-9]+(?:\.[0-9]+)?)", obj_text)
-            if not m:
-                return None
-            try:
-                return float(m.group(1))
-            except ValueError:
-                return None
-
-        def _extract_bool(obj_text: str, key: str) -> bool | None:
-            m = re.search(rf"\b{re.escape(key)}\s*:\s*(true|false)\b", obj_text)
-            if not m:
-                return None
-            return m.group(1) == "true"
-
-        def _extract_string(obj_text: str, key: str) -> str | None:
-            m = re.search(rf"\b{re.escape(key)}\s*:\s*'([^']*)'", obj_text)
-            if not m:
-                return None
-            return m.group(1)
-
-        def _extract_style_obj(obj_text: str) -> dict:
-            """Extract a subset of style keys from a qgis2web return { ... } object."""
-
-            # QGIS2Web commonly uses:
-            # - color: stroke color
-            # - fillColor: fill color
-            # - weight/opacity/fillOpacity
-            # - stroke/fill booleans
-            return {
-                "stroke": _extract_string(obj_text, "color"),
-                "fill": _extract_string(obj_text, "fillColor"),
-                "weight": _extract_number(obj_text, "weight"),
-                "opacity": _extract_number(obj_text, "opacity"),
-                "fillOpacity": _extract_number(obj_text, "fillOpacity"),
-                "strokeEnabled": _extract_bool(obj_text, "stroke"),
-                "fillEnabled": _extract_bool(obj_text, "fill"),
-            }
-
-        out: dict[str, dict] = {}
-
-        # Capture each style function block
-        for m in re.finditer(r"function\s+style_([A-Za-z0-9_]+)_0\s*\([^)]*\)\s*\{", html):
-            layer_id = m.group(1)
-            start = m.end()
-            # naive brace match for function body
-            depth = 1
-            i = start
-            while i < len(html) and depth > 0:
-                ch = html[i]
-                if ch == "{":
-                    depth += 1
-                elif ch == "}":
-                    depth -= 1
-                i += 1
-            body = html[start : i - 1]
-
-            # Categorized / rule-based
-            field_m = re.search(r"feature\.properties\['([^']+)'\]", body)
-            has_switch = "switch" in body and field_m is not None
-
-            if has_switch:
-                field = field_m.group(1)
-                cases: dict[str, dict] = {}
-
-                for cm in re.finditer(
-                    r"case\s+'([^']*)'\s*:\s*return\s*\{(.*?)\}\s*;?",
-                    body,
-                    flags=re.DOTALL,
-                ):
-                    value = cm.group(1)
-                    obj = cm.group(2)
-                    cases[value] = _extract_style_obj(obj)
-
-                default_m = re.search(
-                    r"default\s*:\s*return\s*\{(.*?)\}\s*;?",
-                    body,
-                    flags=re.DOTALL,
-                )
-                default_obj = default_m.group(1) if default_m else ""
-
-                default_style = _extract_style_obj(default_obj)
-
-                out[layer_id] = {
-                    "kind": "categorical",
-                    "property": field,
-                    "stroke": {
-                        "default": default_style.get("stroke"),
-                        "values": {k: v.get("stroke") for (k, v) in cases.items() if v.get("stroke")},
-                    },
-                    "fill": {
-                        "default": default_style.get("fill"),
-                        "values": {k: v.get("fill") for (k, v) in cases.items() if v.get("fill")},
-                    },
-                    "weight": default_style.get("weight"),
-                    "opacity": default_style.get("opacity"),
-                    "fillOpacity": default_style.get("fillOpacity"),
-                    "strokeEnabled": default_style.get("strokeEnabled"),
-                    "fillEnabled": default_style.get("fillEnabled"),
-                }
-                continue
-
-            # Graduated / range rules: if (...) return { ... }
-            # Example:
-            # if (feature.properties['FIELD'] >= 1 && feature.properties['FIELD'] <= 3) { return {...} }
-            grad_rules: list[dict] = []
-            grad_field: str | None = None
-            for im in re.finditer(
-                r"if\s*\(\s*feature\.properties\['([^']+)'\]\s*([<>]=?)\s*([0-9]+(?:\.[0-9]+)?)\s*&&\s*feature\.properties\['([^']+)'\]\s*([<>]=?)\s*([0-9]+(?:\.[0-9]+)?)\s*\)\s*\{\s*return\s*\{(.*?)\}\s*\}",
-                body,
-                flags=re.DOTALL,
-            ):
-                field = im.group(1)
-                field2 = im.group(4)
-                if field2 != field:
-                    continue
-                op1 = im.group(2)
-                v1 = float(im.group(3))
-                op2 = im.group(5)
-                v2 = float(im.group(6))
-                obj = im.group(7)
-
-                grad_field = grad_field or field
-                if grad_field != field:
-                    # Mixed-field rules are unexpected; skip to avoid wrong styling.
-                    continue
-
-                # Determine min/max from the operators.
-                # Common case: >= v1 && <= v2
-                min_v, max_v = (v1, v2)
-                if (op1.startswith("<") and op2.startswith(">")) or (
-                    op1.startswith("<=") and op2.startswith(">=")
-                ):
-                    min_v, max_v = (v2, v1)
-                if min_v > max_v:
-                    min_v, max_v = (max_v, min_v)
-
-                style_obj = _extract_style_obj(obj)
-                grad_rules.append({"min": min_v, "max": max_v, **style_obj})
-
-            if grad_rules and grad_field:
-                # Best-effort global defaults from the first rule (QGIS2Web commonly repeats these).
-                first = grad_rules[0]
-                out[layer_id] = {
-                    "kind": "graduated",
-                    "property": grad_field,
-                    "rules": grad_rules,
-                    "weight": first.get("weight"),
-                    "opacity": first.get("opacity"),
-                    "fillOpacity": first.get("fillOpacity"),
-                    "strokeEnabled": first.get("strokeEnabled"),
-                    "fillEnabled": first.get("fillEnabled"),
-                }
-                continue
-
-            # Simple style (first return { ... })
-            ret_m = re.search(r"return\s*\{(.*?)\}\s*;?", body, flags=re.DOTALL)
-            obj_text = ret_m.group(1) if ret_m else ""
-            if obj_text:
-                style_obj = _extract_style_obj(obj_text)
-                out[layer_id] = {"kind": "simple", **style_obj}
-
-        return out
+        return parse_qgis2web_styles(html)
 
     def _list_qgis2web_layers(export_dir: str) -> list[dict]:
         layers_path = _qgis2web_layers_dir(export_dir)
@@ -763,6 +499,62 @@ def create_app() -> Flask:
         out.sort(key=lambda x: (x.get("order", 1_000_000_000), x.get("name", ""), x.get("id", "")))
         return out
 
+    def _qgis2web_manifest_source(export_dir: str) -> dict:
+        # The layer list depends on index.html (order, styles) and on the
+        # .js files present in data/.
+        out: dict[str, object] = {"version": qgis2web_manifest_version}
+        for name, path in (
+            ("index", os.path.join(export_dir, "index.html")),
+            ("data", _qgis2web_layers_dir(export_dir)),
+        ):
+            try:
+                st = os.stat(path)
+                out[name] = [st.st_mtime_ns, st.st_size]
+            except OSError:
+                out[name] = None
+        return out
+
+    def _qgis2web_manifest(export_dir: str) -> dict:
+        """Compiled layer list of an export: {"source", "etag", "layers"}.
+
+        Memoised per process and persisted as manifest.json under
+        QGIS2WEB_CACHE_DIR; both are rebuilt when index.html or data/ change.
+        """
+
+        source = _qgis2web_manifest_source(export_dir)
+        manifest = qgis2web_manifests.get(export_dir)
+        if manifest is not None and manifest.get("source") == source:
+            return manifest
+
+        manifest_dir = os.path.join(qgis2web_cache_dir, os.path.basename(export_dir))
+        manifest_path = os.path.join(manifest_dir, "manifest.json")
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+
+        if not isinstance(manifest, dict) or manifest.get("source") != source:
+            layers = _list_qgis2web_layers(export_dir)
+            digest = hashlib.sha256(json.dumps(layers, sort_keys=True).encode("utf-8")).hexdigest()
+            manifest = {"source": source, "etag": digest[:32], "layers": layers}
+            tmp = None
+            try:
+                os.makedirs(manifest_dir, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(prefix=".manifest-", suffix=".json", dir=manifest_dir)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(manifest, f, ensure_ascii=False)
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, manifest_path)
+            except OSError as e:
+                # Read-only cache dir: keep the in-memory copy only.
+                print(f"[qgis2web] Could not write {manifest_path}: {e}")
+                if tmp is not None and os.path.exists(tmp):
+                    os.remove(tmp)
+
+        qgis2web_manifests[export_dir] = manifest
+        return manifest
+
     def _load_qgis2web_layer_geojson(export_dir: str, layer_id: str) -> dict:
         layers_path = _qgis2web_layers_dir(export_dir)
         # Prevent path traversal
@@ -787,30 +579,223 @@ def create_app() -> Flask:
         except json.JSONDecodeError as e:
             raise ValueError(f"Failed to parse GeoJSON from JS: {e}")
 
+    def _load_geojson_file(path: str) -> dict:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse GeoJSON: {e}")
+
+    def _simplify_level(args) -> int | None:
+        """Simplification level asked by ?zoom= or ?tolerance= (degrees); None for full resolution."""
+
+        zoom = (args.get("zoom") or "").strip()
+        if zoom:
+            level = int(zoom)
+            if level < 0:
+                raise ValueError("zoom must be >= 0")
+            return min(level, MAX_LEVEL)
+        tolerance = (args.get("tolerance") or "").strip()
+        if tolerance:
+            value = float(tolerance)
+            if not value >= 0:
+                raise ValueError("tolerance must be >= 0")
+            return tolerance_level(value) if value else None
+        return None
+
+    def _bbox_arg(args) -> tuple[float, float, float, float] | None:
+        """?bbox=minx,miny,maxx,maxy in lon/lat, or None; raises ValueError."""
+
+        raw = (args.get("bbox") or "").strip()
+        if not raw:
+            return None
+        parts = raw.split(",")
+        if len(parts) != 4:
+            raise ValueError("bbox must be minx,miny,maxx,maxy")
+        minx, miny, maxx, maxy = (float(p) for p in parts)
+        if not (minx <= maxx and miny <= maxy):
+            raise ValueError("bbox must have minx <= maxx and miny <= maxy")
+        return minx, miny, maxx, maxy
+
+    def _commune_insees_in_bbox(bbox: tuple[float, float, float, float]) -> list[str]:
+        """INSEE codes of the communes whose centroid lies in ``bbox``."""
+
+        try:
+            layer = _polygon_layer("communes")
+        except OSError as e:
+            raise ValueError(f"bbox filtering needs the communes layer: {e}")
+        codes = {str(layer.properties[i].get("insee") or "") for i in layer.centroids_in_bbox(*bbox).tolist()}
+        codes.discard("")
+        return sorted(codes)
+
+    def _layer_format(args) -> str:
+        fmt = (args.get("format") or "geojson").strip().lower()
+        if fmt not in {"geojson", "topojson"}:
+            raise ValueError("format must be geojson or topojson")
+        return fmt
+
+    def _layer_topology(key: tuple, version: object, load) -> Topology:
+        """Shared-arc topology of the layer ``load()`` returns, memoised per ``key``."""
+
+        with layer_topologies_lock:
+            hit = layer_topologies.get(key)
+            if hit is not None and hit[0] == version:
+                layer_topologies.move_to_end(key)
+                return hit[1]
+            build_lock = layer_topology_build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with layer_topologies_lock:
+                hit = layer_topologies.get(key)
+                if hit is not None and hit[0] == version:
+                    layer_topologies.move_to_end(key)
+                    return hit[1]
+
+            topology = Topology(load())
+
+            with layer_topologies_lock:
+                layer_topologies[key] = (version, topology)
+                while len(layer_topologies) > layer_topologies_max:
+                    layer_topologies.popitem(last=False)
+            return topology
+
+    def _polygon_layer(name: str) -> PolygonLayer:
+        """Spatial index of a boundary layer, rebuilt when its source changes.
+
+        Raises OSError if neither the shapefile nor the GeoJSON is readable.
+        """
+
+        shp = shapefiles[name]
+        source = shp if os.path.exists(shp) else geo_layers[name]
+        st = os.stat(source)
+        version = (source, st.st_mtime_ns, st.st_size)
+        with polygon_layers_lock:
+            hit = polygon_layers.get(name)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+
+        # Built under the layer's own lock: the other layers stay available
+        # while a shapefile is read.
+        with polygon_layer_build_locks[name]:
+            with polygon_layers_lock:
+                hit = polygon_layers.get(name)
+            if hit is not None and hit[0] == version:
+                return hit[1]
+            if source == shp:
+                layer = PolygonLayer.from_shapefile(name, shp)
+            else:
+                layer = PolygonLayer.from_geojson(name, _load_geojson_file(source))
+            with polygon_layers_lock:
+                polygon_layers[name] = (version, layer)
+            print(f"[geo] Indexed {name}: {len(layer)} features from {os.path.basename(source)}")
+            return layer
+
+    def _preload_polygon_layers() -> None:
+        for name in geo_layers:
+            try:
+                _polygon_layer(name)
+            except (OSError, ValueError) as e:
+                print(f"[geo] Could not index {name}: {e}")
+
+    def _cached_body_response(entry: CachedBody) -> Response:
+        encoding = negotiate_encoding(request.accept_encodings)
+        data = entry.encoded(encoding)
+        if data is None:
+            encoding = None
+        resp = _not_modified(entry.etag, "no-cache")
+        if resp is not None:
+            return resp
+        resp = Response(entry.identity() if data is None else data, mimetype=entry.mimetype)
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+        resp.set_etag(encoded_etag(entry.etag, encoding))
+        resp.headers["Cache-Control"] = "no-cache"
+        resp.vary.add("Accept-Encoding")
+        return resp
+
+    def _not_modified(etag: str, cache_control: str | None = None) -> Response | None:
+        """A 304 when If-None-Match holds ``etag`` (identity or the encoding
+        the client accepts), else None.
+
+        Lets routes with a cheap validator answer before building the body.
+        """
+
+        for encoding in (None, negotiate_encoding(request.accept_encodings)):
+            tag = encoded_etag(etag, encoding)
+            if request.if_none_match.contains(tag):
+                resp = Response(status=304)
+                resp.set_etag(tag)
+                resp.vary.add("Accept-Encoding")
+                if cache_control:
+                    resp.headers["Cache-Control"] = cache_control
+                return resp
+        return None
+
+    def _fire_store_etag(path: str) -> str:
+        # Same CSV snapshot and same query: same body (bar generated_at).
+        watcher = get_fire_store_watcher(path)
+        watcher.current()
+        raw = json.dumps(
+            [
+                os.path.abspath(path),
+                list(watcher.fingerprint),
+                sorted(_allowed_departements()),
+                request.path,
+                sorted(request.args.items(multi=True)),
+            ]
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
     def _db_enabled() -> bool:
         return bool(get_database_url())
 
-    def _alerte_case_sql() -> str:
-        # Mirrors _alerte_from_surface thresholds
-        return (
-            "case "
-            "when surface_ha is null then '?' "
-            "when surface_ha < 1 then 'Jaune' "
-            "when surface_ha < 10 then 'Orange' "
-            "when surface_ha < 50 then 'Rouge' "
-            "else 'Noir' end"
-        )
+    def _db_prepare() -> bool:
+        # Hot API queries are prepared server-side; psycopg caches them per
+        # connection, so they are reused by every request served by a pooled
+        # connection. Set DB_PREPARE=0 behind PgBouncer in transaction mode.
+        return (os.getenv("DB_PREPARE") or "1").strip().lower() not in {"0", "false", "no"}
+
+    def _fires_db_sql(limit: int | None, query: dict) -> tuple[str, list[object]]:
+        """SELECT for /api/fires: filters from ``query``, newest first.
+
+        Fires are listed by FIRE_SORT_SQL (alert date, else Jan 1st of
+        annee, unknown last), then id, and pages are keyed on that pair so
+        that fires_sort_idx serves both the order and the cursor.
+        """
 
-    def _fires_from_db(limit: int) -> list[dict]:
         allowed_deps = os.getenv("DEPARTEMENTS", "04,05,06,13,83,84")
         allowed = [x.strip() for x in allowed_deps.split(",") if x.strip()]
 
-        where = ""
+        clauses: list[str] = []
         params: list[object] = []
         if allowed:
-            where = "where departement = any(%s)"
+            clauses.append("departement = any(%s)")
             params.append(allowed)
-
+        if query.get("departement"):
+            clauses.append("departement = %s")
+            params.append(query["departement"])
+        if query.get("insee"):
+            clauses.append("insee = %s")
+            params.append(query["insee"])
+        if query.get("insee_in") is not None:
+            clauses.append("insee = any(%s)")
+            params.append(list(query["insee_in"]))
+        if query.get("alerte"):
+            clauses.append(f"{ALERTE_CASE_SQL} = %s")
+            params.append(query["alerte"])
+        if query.get("date_from") is not None:
+            clauses.append("date_alerte >= %s")
+            params.append(query["date_from"])
+        if query.get("date_to") is not None:
+            clauses.append("date_alerte <= %s")
+            params.append(query["date_to"])
+        if query.get("before") is not None:
+            before_dt, before_id = query["before"]
+            before_sql = "coalesce(%s::timestamptz, '-infinity'::timestamptz)"
+            clauses.append(f"{FIRE_SORT_SQL} <= {before_sql} and ({FIRE_SORT_SQL}, id) < ({before_sql}, %s)")
+            params.extend([before_dt, before_dt, before_id])
+
+        where = ("where " + " and ".join(clauses)) if clauses else ""
         sql = f"""
             select
               coalesce(numero, id)::bigint as id,
@@ -818,58 +803,93 @@ def create_app() -> Flask:
               null::double precision as latitude,
               null::double precision as longitude,
               surface_ha,
-              {_alerte_case_sql()} as alerte,
+              {ALERTE_CASE_SQL} as alerte,
               'Inconnue' as cause,
-              date_alerte,
+              {FIRE_TS_SQL} as fire_ts,
               departement,
-              insee
+              insee,
+              id as row_key
             from fires
             {where}
-            order by date_alerte desc nulls last, id desc
-            limit %s
+            order by {FIRE_SORT_SQL} desc, id desc
         """
-        params.append(limit)
+        if limit is not None:
+            sql += " limit %s"
+            params.append(limit)
+        return sql, params
+
+    def _fire_from_db_row(row: tuple) -> tuple[dict, tuple[datetime | None, int]]:
+        """API record for a _fires_db_sql row, plus its keyset cursor key."""
+
+        (
+            fire_id,
+            commune,
+            lat,
+            lon,
+            surface_ha,
+            alerte,
+            cause,
+            fire_ts,
+            departement,
+            insee,
+            row_key,
+        ) = row
+        dt = fire_ts
+        if isinstance(dt, datetime):
+            dt = dt.astimezone(timezone.utc)
+            date_iso = _utc_iso(dt)
+        else:
+            dt = None
+            date_iso = _utc_iso(datetime.now(timezone.utc))
+        key = (dt, int(row_key))
+
+        fire = {
+            "id": int(fire_id),
+            "commune": commune,
+            "latitude": lat,
+            "longitude": lon,
+            "surface_ha": round(float(surface_ha), 2)
+            if surface_ha is not None
+            else None,
+            "alerte": str(alerte),
+            "cause": str(cause),
+            "date": date_iso,
+            "departement": departement,
+            "insee": insee,
+        }
+        return fire, key
 
-        out: list[dict] = []
+    def _fires_from_db(limit: int, **query) -> tuple[list[dict], str | None]:
+        """One page of fires, newest first, plus the cursor of the next page."""
+
+        sql, params = _fires_db_sql(limit + 1, query)
         with db_conn() as conn:
             with conn.cursor() as cur:
+                cur.execute(sql, params, prepare=_db_prepare())
+                rows = cur.fetchall()
+
+        out: list[dict] = []
+        last_key: tuple[datetime | None, int] | None = None
+        for row in rows[:limit]:
+            fire, last_key = _fire_from_db_row(row)
+            out.append(fire)
+
+        next_cursor = None
+        if len(rows) > limit and last_key is not None:
+            last_dt, last_id = last_key
+            next_cursor = f"{_utc_iso(last_dt) if last_dt is not None else NO_DATE_CURSOR},{last_id}"
+        return out, next_cursor
+
+    def _iter_fires_from_db(limit: int | None, **query) -> Iterator[dict]:
+        """Like _fires_from_db, but through a server-side cursor for exports."""
+
+        sql, params = _fires_db_sql(limit, query)
+        with db_conn() as conn:
+            with conn.cursor(name="fires_export") as cur:
+                cur.itersize = 2000
                 cur.execute(sql, params)
-                for (
-                    fire_id,
-                    commune,
-                    lat,
-                    lon,
-                    surface_ha,
-                    alerte,
-                    cause,
-                    date_alerte,
-                    departement,
-                    insee,
-                ) in cur.fetchall():
-                    dt = date_alerte
-                    if isinstance(dt, datetime):
-                        dt = dt.astimezone(timezone.utc)
-                        date_iso = _utc_iso(dt)
-                    else:
-                        date_iso = _utc_iso(datetime.now(timezone.utc))
-
-                    out.append(
-                        {
-                            "id": int(fire_id),
-                            "commune": commune,
-                            "latitude": lat,
-                            "longitude": lon,
-                            "surface_ha": round(float(surface_ha), 2)
-                            if surface_ha is not None
-                            else None,
-                            "alerte": str(alerte),
-                            "cause": str(cause),
-                            "date": date_iso,
-                            "departement": departement,
-                            "insee": insee,
-                        }
-                    )
-        return out
+                for row in cur:
+                    yield _fire_from_db_row(row)[0]
 
     def _stats_from_db() -> dict:
         allowed_deps = os.getenv("DEPARTEMENTS", "04,05,06,13,83,84")
@@ -880,20 +900,37 @@ def create_app() -> Flask:
             where = "where departement = any(%s)"
             params.append(allowed)
 
-        alerte_sql = f"select {_alerte_case_sql()} as key, count(*)::int as n from fires {where} group by 1"
-        commune_sql = f"select coalesce(commune,'?') as key, count(*)::int as n from fires {where} group by 1"
-        totals_sql = f"select count(*)::int as n, coalesce(sum(coalesce(surface_ha,0)),0)::double precision as s from fires {where}"
+        # One scan: totals, per-alerte and per-commune counts via GROUPING SETS.
+        # grouping(alerte, commune) tells the sets apart: 3 = (), 1 = (alerte),
+        # 2 = (commune).
+        sql = f"""
+            select
+              grouping(alerte, commune)::int as g,
+              alerte,
+              commune,
+              count(*)::int as n,
+              coalesce(sum(coalesce(surface_ha,0)),0)::double precision as s
+            from (
+              select {ALERTE_CASE_SQL} as alerte, coalesce(commune,'?') as commune, surface_ha
+              from fires
+              {where}
+            ) f
+            group by grouping sets ((), (alerte), (commune))
+        """
 
+        count, total_surface = 0, 0.0
+        by_alerte: dict[str, int] = {}
+        by_commune: dict[str, int] = {}
         with db_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute(totals_sql, params)
-                count, total_surface = cur.fetchone()
-
-                cur.execute(alerte_sql, params)
-                by_alerte = {str(k): int(n) for (k, n) in cur.fetchall()}
-
-                cur.execute(commune_sql, params)
-                by_commune = {str(k): int(n) for (k, n) in cur.fetchall()}
+                cur.execute(sql, params, prepare=_db_prepare())
+                for g, alerte, commune, n, s in cur.fetchall():
+                    if g == 3:
+                        count, total_surface = n, s
+                    elif g == 1:
+                        by_alerte[str(alerte)] = int(n)
+                    else:
+                        by_commune[str(commune)] = int(n)
 
         return {
             "count": int(count),
@@ -904,40 +941,94 @@ def create_app() -> Flask:
             "source": "postgres",
         }
 
-    def _metrics_by_insee_from_db() -> dict:
-        # For choropleths / joins in the frontend by INSEE code.
-        allowed_deps = os.getenv("DEPARTEMENTS", "04,05,06,13,83,84")
-        allowed = [x.strip() for x in allowed_deps.split(",") if x.strip()]
+    # fires_insee_agg is filled by scripts/import_fires_csv.py. Until an
+    # import (or --refresh-agg) has run, the table may be missing or empty:
+    # metrics then scan fires. Once seen populated it stays so, since the
+    # refresh replaces it within one transaction.
+    insee_agg_state = {"ready": False}
+
+    def _insee_agg_ready(cur) -> bool:
+        if insee_agg_state["ready"]:
+            return True
+        cur.execute("select to_regclass('fires_insee_agg') is not null")
+        if cur.fetchone()[0]:
+            cur.execute("select exists (select 1 from fires_insee_agg)")
+            insee_agg_state["ready"] = bool(cur.fetchone()[0])
+        return insee_agg_state["ready"]
+
+    def _metrics_by_insee_from_db(filters: dict | None = None) -> dict:
+        """Metrics by INSEE for choropleths, with the CSV mode filters.
+
+        Reads the fires_insee_agg summary table; min_surface, which the
+        summary cannot answer, and a summary not built yet fall back to
+        scanning fires.
+        """
 
-        where = ""
-        params: list[object] = []
-        if allowed:
-            where = "where departement = any(%s)"
-            params.append(allowed)
+        filters = filters or {}
+        dep_filter = (filters.get("departement") or "").strip()
+        alerte_filter = (filters.get("alerte") or "").strip()
+        year_filter = (filters.get("year") or "").strip()
+        min_surface = filters.get("min_surface")
 
-        sql = f"""
-          select
-            insee,
-            count(*)::int as fires,
-            coalesce(sum(coalesce(surface_ha,0)),0)::double precision as surface_ha
-          from fires
-          {where}
-          and insee is not null
-          group by insee
-        """ if where else """
-          select
-            insee,
-            count(*)::int as fires,
-            coalesce(sum(coalesce(surface_ha,0)),0)::double precision as surface_ha
-          from fires
-          where insee is not null
-          group by insee
-        """
+        try:
+            min_surface_f = float(min_surface) if min_surface not in (None, "") else None
+        except (TypeError, ValueError):
+            min_surface_f = None
+        if min_surface_f is not None and min_surface_f != min_surface_f:
+            min_surface_f = None
+
+        if year_filter and year_filter != "all":
+            # Compared as text in CSV mode: "1990" matches, "01990" doesn't.
+            if not (year_filter.isdigit() and str(int(year_filter)) == year_filter):
+                return {}
+
+        allowed_deps = os.getenv("DEPARTEMENTS", "04,05,06,13,83,84")
+        allowed = [x.strip() for x in allowed_deps.split(",") if x.strip()]
 
         out: dict[str, dict] = {}
         with db_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, params)
+                use_agg = min_surface_f is None and _insee_agg_ready(cur)
+                year_sql = "annee" if use_agg else FIRE_YEAR_SQL
+                alerte_sql = "alerte" if use_agg else ALERTE_CASE_SQL
+
+                clauses = ["insee is not null", "insee <> ''"]
+                params: list[object] = []
+                if allowed:
+                    clauses.append("departement = any(%s)")
+                    params.append(allowed)
+                if dep_filter and dep_filter != "all":
+                    clauses.append("departement = %s")
+                    params.append(dep_filter)
+                if alerte_filter and alerte_filter != "all":
+                    clauses.append(f"{alerte_sql} = %s")
+                    params.append(alerte_filter)
+                if year_filter and year_filter != "all":
+                    clauses.append(f"{year_sql} = %s")
+                    params.append(int(year_filter))
+                if min_surface_f is not None:
+                    clauses.append("coalesce(surface_ha,0) >= %s")
+                    params.append(min_surface_f)
+
+                if use_agg:
+                    sql = f"""
+                      select insee, sum(fires)::int, sum(surface_ha)::double precision
+                      from fires_insee_agg
+                      where {" and ".join(clauses)}
+                      group by insee
+                    """
+                else:
+                    sql = f"""
+                      select
+                        insee,
+                        count(*)::int as fires,
+                        coalesce(sum(coalesce(surface_ha,0)),0)::double precision as surface_ha
+                      from fires
+                      where {" and ".join(clauses)}
+                      group by insee
+                    """
+
+                cur.execute(sql, params, prepare=_db_prepare())
                 for insee, fires_n, surf in cur.fetchall():
                     if not insee:
                         continue
@@ -948,23 +1039,148 @@ def create_app() -> Flask:
         return out
 
     def get_fires_data() -> list[dict]:
+        data, _next_cursor = get_fires_page(int(os.getenv("MAX_FIRES", "500")))
+        return data
+
+    def get_fires_page(limit: int, **query) -> tuple[list[dict], str | None]:
+        """Fires newest first and the ``before`` cursor of the next page (or None)."""
+
+        if _db_enabled():
+            return _fires_from_db(limit, **query)
+        path = os.getenv("FIRE_CSV_PATH", default_csv)
+        if path and os.path.exists(path):
+            store = get_fire_store(path)
+            rows, has_more = store.query(limit=limit, **query)
+            data = store.records(rows)
+            # CSV cursors are keyed on the row number within the file.
+            next_cursor = None
+            if has_more and data:
+                no_date = int(store.ts_us[rows[-1]]) == MISSING_INT
+                next_cursor = f"{NO_DATE_CURSOR if no_date else data[-1]['date']},{int(rows[-1])}"
+            return data, next_cursor
+        return _generate_mock_fires(int(os.getenv("FIRE_COUNT", "30"))), None
+
+    def iter_fires(limit: int | None, **query) -> Iterator[dict]:
+        """Fires newest first, produced lazily (``limit`` None means all)."""
+
         if _db_enabled():
-            limit = int(os.getenv("MAX_FIRES", "500"))
-            return _fires_from_db(limit)
+            yield from _iter_fires_from_db(limit, **query)
+            return
         path = os.getenv("FIRE_CSV_PATH", default_csv)
         if path and os.path.exists(path):
-            return _read_fires_from_csv(path)
-        return _generate_mock_fires(int(os.getenv("FIRE_COUNT", "30")))
+            store = get_fire_store(path)
+            rows, _has_more = store.query(limit=len(store) if limit is None else limit, **query)
+            for i in range(0, len(rows), 1000):
+                yield from store.records(rows[i : i + 1000])
+            return
+        yield from _generate_mock_fires(int(os.getenv("FIRE_COUNT", "30")))[:limit]
+
+    def _fires_query_from_args(args, *, streaming: bool = False) -> tuple[int | None, dict]:
+        """(limit, filters) for /api/fires; raises ValueError on bad input.
+
+        Streamed formats are not capped by MAX_FIRES_PAGE and accept
+        ``limit=all`` (limit None) for full-history exports.
+        """
+
+        limit: int | None = int(os.getenv("MAX_FIRES", "500"))
+        raw_limit = (args.get("limit") or "").strip().lower()
+        if streaming and raw_limit == "all":
+            limit = None
+        elif raw_limit:
+            limit = int(raw_limit)
+            if limit < 1:
+                raise ValueError("limit must be >= 1")
+        if not streaming and limit is not None:
+            limit = min(limit, int(os.getenv("MAX_FIRES_PAGE", "5000")))
+
+        query: dict = {}
+        if (args.get("before") or "").strip():
+            query["before"] = _parse_fires_cursor(args["before"])
+        if (args.get("from") or "").strip():
+            query["date_from"] = _parse_iso_datetime(args["from"])
+        if (args.get("to") or "").strip():
+            query["date_to"] = _parse_iso_datetime(args["to"], end_of_day=True)
+        for key in ("departement", "insee", "alerte"):
+            value = (args.get(key) or "").strip()
+            if value and value != "all":
+                query[key] = value
+        bbox = _bbox_arg(args)
+        if bbox is not None:
+            # Fires have no coordinates of their own: keep those of the
+            # communes whose centroid falls in the box.
+            query["insee_in"] = _commune_insees_in_bbox(bbox)
+        return limit, query
+
+    @app.after_request
+    def _encode_api_response(resp: Response):
+        # JSON / tile bodies: strong ETag over the uncompressed bytes, br or
+        # gzip when accepted, 304 when the client already has them.
+        if (
+            request.method != "GET"
+            or not request.path.startswith("/api/")
+            or resp.status_code != 200
+            or resp.is_streamed
+            or resp.direct_passthrough
+            or "Content-Encoding" in resp.headers
+            or resp.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return resp
+
+        body = resp.get_data()
+        etag, _weak = resp.get_etag()
+        if not etag:
+            etag = hashlib.sha256(body).hexdigest()[:32]
+        encoding = negotiate_encoding(request.accept_encodings) if len(body) >= GZIP_MIN_BYTES else None
+        resp.vary.add("Accept-Encoding")
+        resp.set_etag(encoded_etag(etag, encoding))
+        if request.if_none_match.contains(encoded_etag(etag, encoding)):
+            return resp.make_conditional(request)
+        if encoding:
+            resp.set_data(compress(body, encoding))
+            resp.headers["Content-Encoding"] = encoding
+        return resp
 
     @app.get("/api/health")
     def health():
-        return jsonify({"status": "ok", "git": _get_git_sha_short(base_dir)})
+        out = {"status": "ok", "git": _get_git_sha_short(base_dir)}
+        stats = pool_stats()
+        if stats is not None:
+            out["db_pool"] = stats
+        out["layer_cache"] = layer_cache.stats()
+        return jsonify(out)
 
     @app.get("/api/fires")
     def fires():
-        data = get_fires_data()
-
+        # Keyset pagination: ?limit=&before=<date>,<id> (from the previous
+        # page's "next"), plus from/to/departement/insee/alerte/bbox filters.
+        fmt = (request.args.get("format") or "").strip().lower()
         mode = (request.args.get("mode") or "").strip().lower()
+        streaming = fmt in {"ndjson", "json-stream"}
+        try:
+            limit, query = _fires_query_from_args(request.args, streaming=streaming)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid query: {e}"}), 400
+
+        # Bulk exports: ?format=ndjson (one record per line) or
+        # ?format=json-stream (same JSON shape as below), encoded while the
+        # rows are read so memory stays flat. No cursor: use limit=all.
+        if streaming:
+            records = iter_fires(limit, **query)
+            if fmt == "ndjson":
+                return Response(_ndjson_chunks(records), mimetype="application/x-ndjson")
+            as_list = mode in {"list", "array", "raw"}
+            return Response(_json_array_chunks(records, wrap=not as_list), mimetype="application/json")
+
+        csv_path = os.getenv("FIRE_CSV_PATH", default_csv)
+        etag = None
+        if not _db_enabled() and csv_path and os.path.exists(csv_path):
+            etag = _fire_store_etag(csv_path)
+            not_modified = _not_modified(etag, "no-cache")
+            if not_modified is not None:
+                return not_modified
+
+        data, next_cursor = get_fires_page(limit, **query)
+
         pretty = (request.args.get("pretty") or "").strip().lower() in {"1", "true", "yes"}
 
         # Backward compatible default: { value: [...], Count: n }
@@ -972,22 +1188,46 @@ def create_app() -> Flask:
         if mode in {"list", "array", "raw"}:
             payload = data
         else:
-            payload = {"value": data, "Count": len(data)}
+            payload = {"value": data, "Count": len(data), "next": next_cursor}
 
         # Optional: ?pretty=1 for human-readable JSON in the browser
         if pretty:
-            return Response(
+            resp = Response(
                 json.dumps(payload, ensure_ascii=False, indent=2),
                 mimetype="application/json",
             )
-
-        return jsonify(payload)
+        else:
+            resp = jsonify(payload)
+        if next_cursor:
+            resp.headers["X-Next-Cursor"] = next_cursor
+        if etag:
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "no-cache"
+        return resp
 
     @app.get("/api/stats")
     def stats():
         if _db_enabled():
             return jsonify(_stats_from_db())
 
+        # CSV mode aggregates the whole file, not the MAX_FIRES newest fires.
+        path = os.getenv("FIRE_CSV_PATH", default_csv)
+        if path and os.path.exists(path):
+            etag = _fire_store_etag(path)
+            not_modified = _not_modified(etag, "no-cache")
+            if not_modified is not None:
+                return not_modified
+            resp = jsonify(
+                {
+                    **get_fire_store(path).stats(),
+                    "generated_at": _utc_iso(datetime.now(timezone.utc)),
+                    "source": "csv",
+                }
+            )
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+
         data = get_fires_data()
         total_surface = sum(float(x.get("surface_ha") or 0) for x in data)
 
@@ -1019,17 +1259,22 @@ def create_app() -> Flask:
             "min_surface": request.args.get("min_surface"),
         }
 
+        etag = None
         if _db_enabled():
-            metrics = _metrics_by_insee_from_db()
+            metrics = _metrics_by_insee_from_db(filters)
             source = "postgres"
         else:
             path = os.getenv("FIRE_CSV_PATH", default_csv)
             if not path or not os.path.exists(path):
                 return jsonify({"error": "FIRE_CSV_PATH not found"}), 400
+            etag = _fire_store_etag(path)
+            not_modified = _not_modified(etag, "no-cache")
+            if not_modified is not None:
+                return not_modified
             metrics = _metrics_by_insee_from_csv(path, filters=filters)
             source = "csv"
 
-        return jsonify(
+        resp = jsonify(
             {
                 "generated_at": _utc_iso(datetime.now(timezone.utc)),
                 "source": source,
@@ -1037,6 +1282,10 @@ def create_app() -> Flask:
                 "metrics": metrics,
             }
         )
+        if etag:
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "no-cache"
+        return resp
 
     # -----------------
     # QGIS2Web exports
@@ -1064,13 +1313,20 @@ def create_app() -> Flask:
         if not export_dir:
             return jsonify({"error": "No QGIS2Web export found"}), 404
 
-        layers = _list_qgis2web_layers(export_dir)
-        return jsonify(
+        manifest = _qgis2web_manifest(export_dir)
+        etag = f"{os.path.basename(export_dir)}-{manifest['etag']}"
+        not_modified = _not_modified(etag, "no-cache")
+        if not_modified is not None:
+            return not_modified
+        resp = jsonify(
             {
                 "export": os.path.basename(export_dir),
-                "layers": layers,
+                "layers": manifest["layers"],
             }
         )
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
 
     @app.get("/api/qgis2web/layers/<layer_id>")
     def qgis2web_layer(layer_id: str):
@@ -1080,27 +1336,239 @@ def create_app() -> Flask:
             return jsonify({"error": "No QGIS2Web export found"}), 404
 
         try:
-            geojson_obj = _load_qgis2web_layer_geojson(export_dir, layer_id)
+            level = _simplify_level(request.args)
+            fmt = _layer_format(request.args)
+            bbox = _bbox_arg(request.args)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid query: {e}"}), 400
+
+        # Layers are tens of MB of GeoJSON that only change with the export:
+        # keep the final (gzipped) response bytes, versioned by the file mtime.
+        key = (export_dir, os.path.basename(layer_id), level, fmt)
+        js_path = os.path.join(_qgis2web_layers_dir(export_dir), f"{key[1]}.js")
+        try:
+            st = os.stat(js_path)
+            version = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            version = None
+        # Viewport (?bbox=) responses are not kept: there are as many as pans.
+        entry = layer_cache.get(key, version) if version is not None and bbox is None else None
+        if entry is not None:
+            return _cached_body_response(entry)
+
+        payload = {
+            "export": os.path.basename(export_dir),
+            "id": os.path.basename(layer_id),
+        }
+        try:
+            if level is None and fmt == "geojson" and bbox is None:
+                payload["geojson"] = _load_qgis2web_layer_geojson(export_dir, layer_id)
+            else:
+                # Shared borders are simplified once, so neighbours still meet.
+                topology = _layer_topology(
+                    key[:2], version, lambda: _load_qgis2web_layer_geojson(export_dir, layer_id)
+                )
+                features = topology.query_bbox(*bbox) if bbox is not None else None
+                if fmt == "topojson":
+                    payload["topojson"] = topology.to_topojson(key[1], level, features)
+                else:
+                    payload["geojson"] = topology.simplify(level, features)
         except FileNotFoundError:
             return jsonify({"error": "Layer not found"}), 404
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
 
-        return jsonify(
-            {
-                "export": os.path.basename(export_dir),
-                "id": os.path.basename(layer_id),
-                "geojson": geojson_obj,
-            }
-        )
+        if level is not None:
+            payload["simplification"] = {"zoom": level, "tolerance": level_tolerance(level)}
+        if bbox is not None:
+            payload["bbox"] = list(bbox)
+        resp = jsonify(payload)
+        if version is None or bbox is not None or not layer_cache.max_bytes:
+            return resp
+        return _cached_body_response(layer_cache.put(key, version, resp.get_data(), resp.mimetype))
+
+    @app.route("/api/geo/locate", methods=["GET", "POST"])
+    def geo_locate():
+        """Boundary features containing points: ?lon=&lat= for one point, or a
+        POST {"points": [[lon, lat], ...]} body for a bulk join. ?layers=
+        (comma-separated) restricts the layers looked up."""
+
+        names = [n.strip() for n in (request.args.get("layers") or "").split(",") if n.strip()] or list(geo_layers)
+        unknown = [n for n in names if n not in geo_layers]
+        if unknown:
+            return jsonify({"error": f"Unknown layer(s): {', '.join(unknown)}"}), 400
+
+        single = request.method == "GET"
+        try:
+            if single:
+                points = [[float(request.args["lon"]), float(request.args["lat"])]]
+            else:
+                points = (request.get_json(silent=True) or {}).get("points")
+                if not isinstance(points, list) or len(points) > locate_max_points:
+                    raise ValueError(f"points must be a list of at most {locate_max_points} [lon, lat] pairs")
+                points = [[float(p[0]), float(p[1])] for p in points]
+        except KeyError:
+            return jsonify({"error": "lon and lat are required"}), 400
+        except (TypeError, ValueError, IndexError) as e:
+            return jsonify({"error": f"Invalid query: {e}"}), 400
+
+        lons = [p[0] for p in points]
+        lats = [p[1] for p in points]
+        out: dict[str, object] = {"lon": points[0][0], "lat": points[0][1]} if single else {"count": len(points)}
+        for name in names:
+            try:
+                layer = _polygon_layer(name)
+            except OSError:
+                return jsonify({"error": f"Layer not found: {name}"}), 404
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            found = layer.locate(lons, lats)
+            matches = [layer.properties[i] if i >= 0 else None for i in found.tolist()]
+            out[name] = matches[0] if single else matches
+        return jsonify(out)
+
+    @app.get("/api/geo/<name>")
+    def geo_layer(name: str):
+        """Boundary layer (communes, zones, departements) as GeoJSON, or as
+        TopoJSON with ?format=topojson; ?zoom= / ?tolerance= simplify it and
+        ?bbox= keeps the features whose bounding box meets the given one."""
+
+        path = geo_layers.get(name)
+        if not path:
+            return jsonify({"error": "Layer not found"}), 404
+        try:
+            level = _simplify_level(request.args)
+            fmt = _layer_format(request.args)
+            bbox = _bbox_arg(request.args)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid query: {e}"}), 400
+
+        key = ("geo", name, level, fmt)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return jsonify({"error": "Layer not found"}), 404
+        version = (st.st_mtime_ns, st.st_size)
+        entry = layer_cache.get(key, version) if bbox is None else None
+        if entry is not None:
+            return _cached_body_response(entry)
+
+        try:
+            if level is None and fmt == "geojson" and bbox is None:
+                with open(path, "rb") as f:
+                    body = f.read()
+            else:
+                topology = _layer_topology(key[:2], version, lambda: _load_geojson_file(path))
+                features = topology.query_bbox(*bbox) if bbox is not None else None
+                if fmt == "topojson":
+                    obj = topology.to_topojson(name, level, features)
+                else:
+                    obj = topology.simplify(level, features)
+                body = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        except OSError:
+            return jsonify({"error": "Layer not found"}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        mimetype = "application/json" if fmt == "topojson" else "application/geo+json"
+        if bbox is not None or not layer_cache.max_bytes:
+            return Response(body, mimetype=mimetype)
+        return _cached_body_response(layer_cache.put(key, version, body, mimetype))
+
+    @app.get("/api/tiles/<layer>/<int:z>/<int:x>/<int:y>.pbf")
+    def vector_tile(layer: str, z: int, x: int, y: int):
+        """Mapbox Vector Tile of a boundary layer (communes, zones,
+        departements) or of a QGIS2Web layer (?export=, latest by default)."""
+
+        if z > MAX_ZOOM or x >= 1 << z or y >= 1 << z:
+            return jsonify({"error": "Invalid tile"}), 400
+
+        name = os.path.basename(layer)
+        if name in geo_layers:
+            key = ("geo", name)
+            source = geo_layers[name]
+            load = lambda: _load_geojson_file(source)
+        else:
+            export_dir = _qgis2web_export_dir(request.args.get("export"))
+            if not export_dir:
+                return jsonify({"error": "No QGIS2Web export found"}), 404
+            key = (os.path.basename(export_dir), name)
+            source = os.path.join(_qgis2web_layers_dir(export_dir), f"{name}.js")
+            load = lambda: _load_qgis2web_layer_geojson(export_dir, name)
+
+        version = tile_version(source)
+        not_modified = _not_modified(version, "public, max-age=3600") if version else None
+        if not_modified is not None:
+            return not_modified
+
+        try:
+            data, version = tile_store.tile(key, source, load, z, x, y)
+        except FileNotFoundError:
+            return jsonify({"error": "Layer not found"}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        resp = Response(data, status=200 if data else 204, mimetype=MVT_MIME_TYPE)
+        resp.set_etag(version)
+        resp.headers["Cache-Control"] = "public, max-age=3600"
+        return resp
 
     @app.get("/qgis2web/<export>/<path:asset_path>")
     def qgis2web_static(export: str, asset_path: str):
-        """Serve static QGIS2Web export assets (for iframe embedding)."""
+        """Serve static QGIS2Web export assets (for iframe embedding).
+
+        Text assets are sent from .br / .gz copies compressed once per
+        export, under QGIS2WEB_CACHE_DIR. A named export never changes, so its assets are immutable;
+        "latest" is revalidated.
+        """
         export_dir = _qgis2web_export_dir(export)
         if not export_dir:
             return jsonify({"error": "Export not found"}), 404
-        return send_from_directory(export_dir, asset_path)
+        if export.strip().lower() in {"latest", "default"}:
+            cache_control = "no-cache"
+        else:
+            cache_control = "public, max-age=31536000, immutable"
+
+        path = safe_join(export_dir, asset_path)
+        try:
+            st = os.stat(path) if path else None
+        except OSError:
+            st = None
+        if st is None or not os.path.isfile(path):
+            return send_from_directory(export_dir, asset_path)
+
+        etag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        encoding = negotiate_encoding(request.accept_encodings)
+        sibling = None
+        if encoding:
+            cache_path = os.path.join(
+                qgis2web_cache_dir, os.path.basename(export_dir), os.path.relpath(path, export_dir)
+            )
+            sibling = precompressed_path(path, encoding, cache_path)
+        if sibling is None:
+            encoding = None
+        not_modified = _not_modified(etag, cache_control)
+        if not_modified is not None:
+            return not_modified
+
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        resp = send_file(
+            sibling or path,
+            mimetype=mimetype,
+            etag=encoded_etag(etag, encoding),
+            conditional=True,
+            max_age=None,
+        )
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+        resp.vary.add("Accept-Encoding")
+        resp.headers["Cache-Control"] = cache_control
+        return resp
+
+    # Build the boundary indexes in the background so the first lookup does
+    # not pay for reading the shapefiles (SPATIAL_PRELOAD=0 disables).
+    if (os.getenv("SPATIAL_PRELOAD") or "1").strip().lower() not in {"0", "false", "no"}:
+        threading.Thread(target=_preload_polygon_layers, name="polygon-layers", daemon=True).start()
 
     @app.get("/")
     def root():
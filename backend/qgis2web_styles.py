@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import bisect
+import re
+
+# Single-pass reader of the style_<layer>_0 functions QGIS2Web writes into
+# index.html. The page is tokenized in one pass (style function headers,
+# braces, case/default/if/return openers); braces are matched with a stack
+# and each function body is then read from its slice of the token list, so
+# the cost stays linear in the page size however many categories a layer
+# has.
+#
+# The output matches the former regex-per-function parser, quirks included:
+# style objects end at their first "}", braces are counted even inside
+# strings, and a graduated rule's object ends at the first "}" followed by
+# another "}".
+
+_NUM = r"([0-9]+(?:\.[0-9]+)?)"
+
+# Candidate token starts. All branches begin with a literal, which lets the
+# regex engine skip ahead to them; the full token is then matched in place.
+_CANDIDATE_RE = re.compile(r"[{}]|function|if|case|default|return")
+
+_TOKENS = {
+    "function": ("func", re.compile(r"function\s+style_([A-Za-z0-9_]+)_0\s*\([^)]*\)\s*(?=\{)")),
+    "if": (
+        "grad",
+        re.compile(
+            r"if\s*\(\s*feature\.properties\['([^']+)'\]\s*([<>]=?)\s*" + _NUM
+            + r"\s*&&\s*feature\.properties\['([^']+)'\]\s*([<>]=?)\s*" + _NUM
+            + r"\s*\)\s*\{\s*return\s*(?=\{)"
+        ),
+    ),
+    "case": ("case", re.compile(r"case\s+'([^']*)'\s*:\s*return\s*(?=\{)")),
+    "default": ("default", re.compile(r"default\s*:\s*return\s*(?=\{)")),
+    "return": ("ret", re.compile(r"return\s*(?=\{)")),
+}
+
+_GRAD_END_RE = re.compile(r"\}\s*\}")
+_PROP_RE = re.compile(r"feature\.properties\['([^']+)'\]")
+
+# QGIS2Web commonly uses:
+# - color: stroke color
+# - fillColor: fill color
+# - weight/opacity/fillOpacity
+# - stroke/fill booleans
+_STYLE_KEYS = {
+    "color": ("stroke", re.compile(r"'([^']*)'")),
+    "fillColor": ("fill", re.compile(r"'([^']*)'")),
+    "weight": ("weight", re.compile(_NUM)),
+    "opacity": ("opacity", re.compile(_NUM)),
+    "fillOpacity": ("fillOpacity", re.compile(_NUM)),
+    "stroke": ("strokeEnabled", re.compile(r"(true|false)\b")),
+    "fill": ("fillEnabled", re.compile(r"(true|false)\b")),
+}
+# The leading \b is checked by hand: without it the regex engine can skip
+# straight to the first letters of the keys.
+_STYLE_KEY_RE = re.compile(r"(color|fillColor|weight|opacity|fillOpacity|stroke|fill)\s*:\s*")
+_STYLE_FIELDS = ("stroke", "fill", "weight", "opacity", "fillOpacity", "strokeEnabled", "fillEnabled")
+
+
+def _extract_style_obj(obj_text: str) -> dict:
+    """Extract a subset of style keys from a qgis2web return { ... } object.
+
+    Each key takes the first value of the right type, in one scan.
+    """
+
+    out: dict[str, object] = dict.fromkeys(_STYLE_FIELDS)
+    missing = len(_STYLE_KEYS)
+    for m in _STYLE_KEY_RE.finditer(obj_text):
+        start = m.start()
+        if start and (obj_text[start - 1].isalnum() or obj_text[start - 1] == "_"):
+            continue
+        name, value_re = _STYLE_KEYS[m.group(1)]
+        if out[name] is not None:
+            continue
+        v = value_re.match(obj_text, m.end())
+        if not v:
+            continue
+        raw = v.group(1)
+        if name in ("strokeEnabled", "fillEnabled"):
+            out[name] = raw == "true"
+        elif name in ("stroke", "fill"):
+            out[name] = raw
+        else:
+            out[name] = float(raw)
+        missing -= 1
+        if not missing:
+            break
+    return out
+
+
+class _Event:
+    __slots__ = ("pos", "end", "kind", "match")
+
+    def __init__(self, pos: int, end: int, kind: str, match: re.Match) -> None:
+        self.pos = pos
+        self.end = end  # for all but "func": the "{" opening the returned object
+        self.kind = kind
+        self.match = match
+
+
+def _tokenize(html: str) -> tuple[list[_Event], dict[int, int]]:
+    """Events of interest in document order, and "{" position -> matching "}"."""
+
+    events: list[_Event] = []
+    closing: dict[int, int] = {}
+    stack: list[int] = []
+
+    def braces_in(start: int, end: int) -> None:
+        # Braces swallowed by a larger token still count, as in a naive scan.
+        for i in range(start, end):
+            ch = html[i]
+            if ch == "{":
+                stack.append(i)
+            elif ch == "}" and stack:
+                closing[stack.pop()] = i
+
+    search = _CANDIDATE_RE.search
+    nested = False
+    pos = 0
+    while True:
+        c = search(html, pos)
+        if c is None:
+            break
+        start = c.start()
+        word = c.group()
+        if word == "{":
+            stack.append(start)
+            pos = start + 1
+            continue
+        if word == "}":
+            if stack:
+                closing[stack.pop()] = start
+            pos = start + 1
+            continue
+
+        kind, token_re = _TOKENS[word]
+        m = token_re.match(html, start)
+        if m is None:
+            pos = start + 1
+            continue
+        end = m.end()
+        if kind == "func" or kind == "grad" or kind == "case":
+            text = m.group(0)
+            if "{" in text or "}" in text:
+                braces_in(start, end)
+            events.append(_Event(start, end, kind, m))
+            # Other tokens starting inside this one (e.g. a style header in a
+            # case label) are still found, since each token kind used to be
+            # searched for on its own. The trailing "return" of a case/if
+            # token opens the same object as the token itself.
+            inner_end = end if kind == "func" else start + len(text.rstrip()) - len("return")
+            c = search(html, start + 1, inner_end)
+            while c is not None:
+                word = c.group()
+                if word in _TOKENS and _TOKENS[word][0] != kind:
+                    inner = _TOKENS[word][1].match(html, c.start())
+                    if inner is not None:
+                        events.append(_Event(c.start(), inner.end(), _TOKENS[word][0], inner))
+                        nested = True
+                        if word == "function" and inner_end != end:
+                            # ... unless that object belongs to a nested function.
+                            inner_end = end
+                c = search(html, c.start() + 1, inner_end)
+        else:
+            events.append(_Event(start, end, kind, m))
+        pos = end
+
+    if nested:
+        events.sort(key=lambda ev: ev.pos)
+    return events, closing
+
+
+def _object_text(html: str, brace: int, limit: int) -> tuple[str, int] | None:
+    # Lazy "{(.*?)}" within the body: up to the first "}".
+    end = html.find("}", brace + 1, limit)
+    if end == -1:
+        return None
+    return html[brace + 1 : end], end + 1
+
+
+def _parse_function(html: str, body_start: int, body_end: int, events: list[_Event]) -> dict | None:
+    # Categorized / rule-based
+    field_m = _PROP_RE.search(html, body_start, body_end)
+    has_switch = html.find("switch", body_start, body_end) != -1 and field_m is not None
+
+    if has_switch:
+        field = field_m.group(1)
+        cases: dict[str, dict] = {}
+        resume = body_start
+        default_style = _extract_style_obj("")
+        default_found = False
+        for ev in events:
+            if ev.kind == "case" and ev.pos >= resume:
+                obj = _object_text(html, ev.end, body_end)
+                if obj is None:
+                    continue
+                text, resume = obj
+                cases[ev.match.group(1)] = _extract_style_obj(text)
+            elif ev.kind == "default" and not default_found:
+                obj = _object_text(html, ev.end, body_end)
+                if obj is not None:
+                    default_found = True
+                    default_style = _extract_style_obj(obj[0])
+
+        return {
+            "kind": "categorical",
+            "property": field,
+            "stroke": {
+                "default": default_style.get("stroke"),
+                "values": {k: v.get("stroke") for (k, v) in cases.items() if v.get("stroke")},
+            },
+            "fill": {
+                "default": default_style.get("fill"),
+                "values": {k: v.get("fill") for (k, v) in cases.items() if v.get("fill")},
+            },
+            "weight": default_style.get("weight"),
+            "opacity": default_style.get("opacity"),
+            "fillOpacity": default_style.get("fillOpacity"),
+            "strokeEnabled": default_style.get("strokeEnabled"),
+            "fillEnabled": default_style.get("fillEnabled"),
+        }
+
+    # Graduated / range rules:
+    # if (feature.properties['FIELD'] >= 1 && feature.properties['FIELD'] <= 3) { return {...} }
+    grad_rules: list[dict] = []
+    grad_field: str | None = None
+    resume = body_start
+    for ev in events:
+        if ev.kind != "grad" or ev.pos < resume:
+            continue
+        end_m = _GRAD_END_RE.search(html, ev.end + 1, body_end)
+        if end_m is None:
+            continue
+        resume = end_m.end()
+
+        field, op1, v1, field2, op2, v2 = ev.match.groups()
+        if field2 != field:
+            continue
+        v1 = float(v1)
+        v2 = float(v2)
+
+        grad_field = grad_field or field
+        if grad_field != field:
+            # Mixed-field rules are unexpected; skip to avoid wrong styling.
+            continue
+
+        # Determine min/max from the operators.
+        # Common case: >= v1 && <= v2
+        min_v, max_v = (v1, v2)
+        if (op1.startswith("<") and op2.startswith(">")) or (op1.startswith("<=") and op2.startswith(">=")):
+            min_v, max_v = (v2, v1)
+        if min_v > max_v:
+            min_v, max_v = (max_v, min_v)
+
+        style_obj = _extract_style_obj(html[ev.end + 1 : end_m.start()])
+        grad_rules.append({"min": min_v, "max": max_v, **style_obj})
+
+    if grad_rules and grad_field:
+        # Best-effort global defaults from the first rule (QGIS2Web commonly repeats these).
+        first = grad_rules[0]
+        return {
+            "kind": "graduated",
+            "property": grad_field,
+            "rules": grad_rules,
+            "weight": first.get("weight"),
+            "opacity": first.get("opacity"),
+            "fillOpacity": first.get("fillOpacity"),
+            "strokeEnabled": first.get("strokeEnabled"),
+            "fillEnabled": first.get("fillEnabled"),
+        }
+
+    # Simple style (first return { ... }, possibly nested in another token)
+    first = min((ev for ev in events if ev.kind != "func"), key=lambda ev: ev.end, default=None)
+    if first is not None:
+        obj = _object_text(html, first.end, body_end)
+        if obj is not None and obj[0]:
+            return {"kind": "simple", **_extract_style_obj(obj[0])}
+    return None
+
+
+def parse_qgis2web_styles(html: str) -> dict[str, dict]:
+    """Best-effort parse of QGIS2Web style_* functions from index.html.
+
+    Supports:
+    - Simple styles: return { color, weight, fillColor, fillOpacity, opacity }
+    - Categorized styles: switch(String(feature.properties['FIELD'])) { case 'x': return {...}; default: ... }
+    - Graduated styles: repeated if(...) { return {...} } blocks (range rules)
+
+    Returns mapping: layer_id -> style dict
+    """
+
+    events, closing = _tokenize(html)
+    positions = [ev.pos for ev in events]
+
+    out: dict[str, dict] = {}
+    for ev in events:
+        if ev.kind != "func":
+            continue
+        layer_id = ev.match.group(1)
+        body_start = ev.end + 1
+        # An unclosed body runs to the end of the page (minus its last char).
+        body_end = closing.get(ev.end, len(html) - 1)
+        lo = bisect.bisect_left(positions, body_start)
+        hi = bisect.bisect_left(positions, body_end)
+        # Tokens must lie inside the body, like matches on the body text.
+        inner = [e for e in events[lo:hi] if e.end < body_end]
+        style = _parse_function(html, body_start, body_end, inner)
+        if style is not None:
+            out[layer_id] = style
+    return out
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+try:
+    import brotli
+except ImportError:
+    # Brotli is optional: without it only gzip is offered.
+    brotli = None
+
+# Bodies smaller than this are kept as-is: gzip would barely shrink them.
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+# Dynamic bodies favour speed; static files are compressed once, harder.
+BROTLI_QUALITY = 5
+BROTLI_STATIC_QUALITY = 11
+BROTLI_STATIC_MAX_BYTES = 1 << 20  # above this, BROTLI_QUALITY (q11 is slow)
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/geo+json",
+    "application/vnd.mapbox-vector-tile",
+}
+STATIC_COMPRESSIBLE_SUFFIXES = {
+    ".html", ".htm", ".js", ".mjs", ".css", ".json", ".geojson", ".svg",
+    ".txt", ".xml", ".csv", ".map", ".ttf", ".otf", ".eot", ".ico",
+}
+
+_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def negotiate_encoding(accept) -> str | None:
+    """br or gzip, whichever the client's Accept-Encoding prefers; None for identity."""
+
+    return accept.best_match(["br", "gzip"] if brotli is not None else ["gzip"])
+
+
+def compress(body: bytes, encoding: str, *, quality: int | None = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY if quality is None else quality)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encoded_etag(etag: str, encoding: str | None) -> str:
+    """Strong ETag of the ``encoding`` variant of a body tagged ``etag``."""
+
+    return f"{etag}{_SUFFIXES[encoding].replace('.', '-')}" if encoding else etag
+
+
+def precompressed_path(path: str, encoding: str, cache_path: str) -> str | None:
+    """Compressed copy of ``path``: ``cache_path``.gz / .br, written the
+    first time it is needed.
+
+    ``cache_path`` should live outside the served tree, which is never
+    written to. The copy carries the source's mtime and is rewritten when
+    the two differ. Returns None for files not worth compressing, or when
+    the copy cannot be written.
+    """
+
+    if encoding not in _SUFFIXES or (encoding == "br" and brotli is None):
+        return None
+    if os.path.splitext(path)[1].lower() not in STATIC_COMPRESSIBLE_SUFFIXES:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if st.st_size < GZIP_MIN_BYTES:
+        return None
+
+    target = cache_path + _SUFFIXES[encoding]
+    try:
+        if os.stat(target).st_mtime_ns == st.st_mtime_ns:
+            return target
+    except OSError:
+        pass
+
+    tmp = None
+    try:
+        with open(path, "rb") as f:
+            body = f.read()
+        quality = BROTLI_STATIC_QUALITY if len(body) <= BROTLI_STATIC_MAX_BYTES else BROTLI_QUALITY
+        data = compress(body, encoding, quality=quality)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".precompress-", dir=os.path.dirname(target))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, target)
+    except OSError as e:
+        print(f"[qgis2web] Could not write {target}: {e}")
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+        return None
+    return target
+
+
+class CachedBody:
+    """A serialised response body, stored gzip-compressed when worth it.
+
+    With brotli installed a br copy is kept too. ``etag`` is a strong
+    validator of the uncompressed bytes (see encoded_etag for the variants).
+    """
+
+    __slots__ = ("data", "gzipped", "br", "etag", "mimetype", "version")
+
+    def __init__(self, body: bytes, mimetype: str, version: Hashable = None) -> None:
+        self.version = version
+        self.gzipped = len(body) >= GZIP_MIN_BYTES
+        self.data = compress(body, "gzip") if self.gzipped else body
+        self.br = compress(body, "br") if self.gzipped and brotli is not None else None
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.mimetype = mimetype
+
+    @property
+    def size(self) -> int:
+        return len(self.data) + len(self.br or b"")
+
+    def encoded(self, encoding: str | None) -> bytes | None:
+        """The body in ``encoding`` if stored that way, else None."""
+
+        if encoding == "br":
+            return self.br
+        if encoding == "gzip" and self.gzipped:
+            return self.data
+        return None
+
+    def identity(self) -> bytes:
+        return gzip.decompress(self.data) if self.gzipped else self.data
+
+
+class ResponseCache:
+    """Thread-safe LRU of CachedBody entries bounded by their total size.
+
+    Each entry carries a version (e.g. the source file mtime): a lookup with
+    another version is a miss, and the next put replaces the stale entry.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: Hashable = None) -> CachedBody | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: Hashable, body: bytes, mimetype: str) -> CachedBody:
+        """Cache ``body`` under ``key`` at ``version`` and return the entry to serve.
+
+        Entries larger than the whole budget are returned but not kept.
+        """
+
+        entry = CachedBody(body, mimetype, version)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            if entry.size > self.max_bytes:
+                return entry
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
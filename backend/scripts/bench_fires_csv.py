@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fires_csv
+from fires_csv import ENCODING, read_fires_csv
+
+HEADER = "Année;Numéro;Département;Code INSEE;Commune;Alerte;Origine de l'alerte;Surface parcourue (m2);surf_ha\n"
+
+
+def _write_csv(path: str, size: int) -> None:
+    # Synthetic rows shaped like the Prométhée export, until ``size`` bytes.
+    rnd = random.Random(0)
+    with open(path, "w", encoding=ENCODING, newline="") as f:
+        f.write(HEADER)
+        written = 0
+        n = 0
+        while written < size:
+            dep = rnd.choice(("04", "05", "06", "13", "83", "84"))
+            insee = f"{dep}{rnd.randint(1, 150):03d}"
+            line = (
+                f"{rnd.randint(1973, 2024)};{n};{dep};{insee};\"Commune {insee}\";"
+                f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(1973, 2024)} "
+                f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d};Particulier;"
+                f"{rnd.randint(0, 500000)};" + f"{rnd.random() * 50:.2f}".replace(".", ",") + "\n"
+            )
+            f.write(line)
+            written += len(line)
+            n += 1
+
+
+def _pool_startup(workers: int) -> float:
+    # Time for spawn workers to start and import fires_csv (numpy), no parsing.
+    start = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        list(pool.map(fires_csv._header_columns, [[]] * workers))
+    return time.perf_counter() - start
+
+
+def _best(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time read_fires_csv in-process and with worker processes.")
+    parser.add_argument("--csv", help="parse this file (default: synthetic files of --sizes MB)")
+    parser.add_argument("--sizes", default="4,8,16,32,64", help="synthetic file sizes in MB")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # The library clamps to the CPU count; the benchmark asks for exactly this.
+    fires_csv._cpus = lambda: args.workers
+    threshold = fires_csv.PARALLEL_MIN_BYTES
+    fires_csv.PARALLEL_MIN_BYTES = 0
+
+    print(f"{os.cpu_count()} CPUs, {args.workers} workers")
+    print(f"pool startup: {_pool_startup(args.workers) * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.csv:
+            paths = [args.csv]
+        else:
+            paths = []
+            for mb in args.sizes.split(","):
+                path = os.path.join(tmp, f"fires_{mb}mb.csv")
+                _write_csv(path, int(float(mb) * 1024 * 1024))
+                paths.append(path)
+
+        for path in paths:
+            size = os.path.getsize(path)
+            serial = _best(lambda: read_fires_csv(path, workers=1), args.repeat)
+            parallel = _best(lambda: read_fires_csv(path, workers=args.workers), args.repeat)
+            print(
+                f"  {size / 1024 / 1024:6.1f} MB  in-process {serial * 1000:7.0f} ms"
+                f"  {args.workers} workers {parallel * 1000:7.0f} ms  x{serial / parallel:.2f}"
+            )
+
+    print(f"PARALLEL_MIN_BYTES = {threshold / 1024 / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import random
+import timeit
+from datetime import datetime, timezone
+
+from fires_csv import DELIMITER, ENCODING, _header_columns, _parse_dt
+
+
+def _parse_dt_strptime(value: str) -> datetime | None:
+    # The previous implementation: strptime chain only.
+    value = (value or "").strip()
+    if not value:
+        return None
+
+    for fmt in ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ"):
+        try:
+            dt = datetime.strptime(value, fmt)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.astimezone(timezone.utc)
+        except ValueError:
+            continue
+
+    return None
+
+
+# Shapes the fast path must hand back to strptime (or reject like it does).
+EDGE_CASES = [
+    "",
+    "  ",
+    "09/01/1973 13:50",
+    " 09/01/1973 13:50 ",
+    "09/01/1973 13:50:07",
+    "9/1/1973 13:50",
+    "09/01/1973  13:50",
+    "31/02/1990 10:00",
+    "00/01/1990 10:00",
+    "01/13/1990 10:00",
+    "01/01/0000 10:00",
+    "01/01/1990 24:00",
+    "01/01/1990 23:60",
+    "01/01/1990 23:59:60",
+    "01/01/1990 23:59:61",
+    "01/01/1990 2:05",
+    "01/01/1990 12:05:",
+    "01/01/1990 12:05:5",
+    "01/01/1990T12:05",
+    "٠١/٠١/١٩٩٠ ١٢:٠٥",
+    "2023-07-14T12:30:00.000Z",
+    "garbage",
+]
+
+
+def _alert_dates(csv_path: str | None, n: int) -> list[str]:
+    if csv_path and os.path.exists(csv_path):
+        with open(csv_path, "r", encoding=ENCODING, newline="") as f:
+            reader = csv.reader(f, delimiter=DELIMITER)
+            c_date = _header_columns(next(reader, []))["date_alerte"]
+            if c_date is not None:
+                values = [row[c_date] if c_date < len(row) else "" for row in reader if row]
+                if values:
+                    return values
+
+    rnd = random.Random(0)
+    values = []
+    for _ in range(n):
+        values.append(
+            f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(1973, 2024)} "
+            f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}"
+        )
+    return values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare _parse_dt with the strptime-only parser.")
+    parser.add_argument("--csv", help="take the Alerte column of this CSV (default: FIRE_CSV_PATH)")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic dates when no CSV is found")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for value in EDGE_CASES:
+        assert _parse_dt(value) == _parse_dt_strptime(value), value
+
+    values = _alert_dates(args.csv or os.getenv("FIRE_CSV_PATH"), args.rows)
+    assert [_parse_dt(v) for v in values] == [_parse_dt_strptime(v) for v in values]
+
+    def memoised() -> None:
+        memo: dict[str, datetime | None] = {}
+        for v in values:
+            if v not in memo:
+                memo[v] = _parse_dt(v)
+
+    timings = {
+        "strptime chain": lambda: [_parse_dt_strptime(v) for v in values],
+        "fast path": lambda: [_parse_dt(v) for v in values],
+        "fast path + memo": memoised,
+    }
+    print(f"{len(values)} values, {len(set(values))} distinct")
+    base = None
+    for name, fn in timings.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        base = base or best
+        print(f"  {name:<18} {best * 1000:8.1f} ms  {len(values) / best:10.0f} values/s  x{base / best:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import random
+import re
+import timeit
+
+from qgis2web_styles import parse_qgis2web_styles
+
+
+def _parse_styles_regex(html: str) -> dict[str, dict]:
+    """The previous parser: regex searches per function, case and key.
+
+    Supports:
+    - Simple styles: return { color, weight, fillColor, fillOpacity, opacity }
+    - Categorized styles: switch(String(feature.properties['FIELD'])) { case 'x': return {...}; default: ... }
+    - Graduated styles: repeated if(...) { return {...} } blocks (range rules)
+
+    Returns mapping: layer_id -> style dict
+    """
+
+    def _extract_number(obj_text: str, key: str) -> float | None:
+        m = re.search(rf"\b{re.escape(key)}\s*:\s*([0-9]+(?:\.[0-9]+)?)", obj_text)
+        if not m:
+            return None
+        try:
+            return float(m.group(1))
+        except ValueError:
+            return None
+
+    def _extract_bool(obj_text: str, key: str) -> bool | None:
+        m = re.search(rf"\b{re.escape(key)}\s*:\s*(true|false)\b", obj_text)
+        if not m:
+            return None
+        return m.group(1) == "true"
+
+    def _extract_string(obj_text: str, key: str) -> str | None:
+        m = re.search(rf"\b{re.escape(key)}\s*:\s*'([^']*)'", obj_text)
+        if not m:
+            return None
+        return m.group(1)
+
+    def _extract_style_obj(obj_text: str) -> dict:
+        """Extract a subset of style keys from a qgis2web return { ... } object."""
+
+        # QGIS2Web commonly uses:
+        # - color: stroke color
+        # - fillColor: fill color
+        # - weight/opacity/fillOpacity
+        # - stroke/fill booleans
+        return {
+            "stroke": _extract_string(obj_text, "color"),
+            "fill": _extract_string(obj_text, "fillColor"),
+            "weight": _extract_number(obj_text, "weight"),
+            "opacity": _extract_number(obj_text, "opacity"),
+            "fillOpacity": _extract_number(obj_text, "fillOpacity"),
+            "strokeEnabled": _extract_bool(obj_text, "stroke"),
+            "fillEnabled": _extract_bool(obj_text, "fill"),
+        }
+
+    out: dict[str, dict] = {}
+
+    # Capture each style function block
+    for m in re.finditer(r"function\s+style_([A-Za-z0-9_]+)_0\s*\([^)]*\)\s*\{", html):
+        layer_id = m.group(1)
+        start = m.end()
+        # naive brace match for function body
+        depth = 1
+        i = start
+        while i < len(html) and depth > 0:
+            ch = html[i]
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+            i += 1
+        body = html[start : i - 1]
+
+        # Categorized / rule-based
+        field_m = re.search(r"feature\.properties\['([^']+)'\]", body)
+        has_switch = "switch" in body and field_m is not None
+
+        if has_switch:
+            field = field_m.group(1)
+            cases: dict[str, dict] = {}
+
+            for cm in re.finditer(
+                r"case\s+'([^']*)'\s*:\s*return\s*\{(.*?)\}\s*;?",
+                body,
+                flags=re.DOTALL,
+            ):
+                value = cm.group(1)
+                obj = cm.group(2)
+                cases[value] = _extract_style_obj(obj)
+
+            default_m = re.search(
+                r"default\s*:\s*return\s*\{(.*?)\}\s*;?",
+                body,
+                flags=re.DOTALL,
+            )
+            default_obj = default_m.group(1) if default_m else ""
+
+            default_style = _extract_style_obj(default_obj)
+
+            out[layer_id] = {
+                "kind": "categorical",
+                "property": field,
+                "stroke": {
+                    "default": default_style.get("stroke"),
+                    "values": {k: v.get("stroke") for (k, v) in cases.items() if v.get("stroke")},
+                },
+                "fill": {
+                    "default": default_style.get("fill"),
+                    "values": {k: v.get("fill") for (k, v) in cases.items() if v.get("fill")},
+                },
+                "weight": default_style.get("weight"),
+                "opacity": default_style.get("opacity"),
+                "fillOpacity": default_style.get("fillOpacity"),
+                "strokeEnabled": default_style.get("strokeEnabled"),
+                "fillEnabled": default_style.get("fillEnabled"),
+            }
+            continue
+
+        # Graduated / range rules: if (...) return { ... }
+        # Example:
+        # if (feature.properties['FIELD'] >= 1 && feature.properties['FIELD'] <= 3) { return {...} }
+        grad_rules: list[dict] = []
+        grad_field: str | None = None
+        for im in re.finditer(
+            r"if\s*\(\s*feature\.properties\['([^']+)'\]\s*([<>]=?)\s*([0-9]+(?:\.[0-9]+)?)\s*&&\s*feature\.properties\['([^']+)'\]\s*([<>]=?)\s*([0-9]+(?:\.[0-9]+)?)\s*\)\s*\{\s*return\s*\{(.*?)\}\s*\}",
+            body,
+            flags=re.DOTALL,
+        ):
+            field = im.group(1)
+            field2 = im.group(4)
+            if field2 != field:
+                continue
+            op1 = im.group(2)
+            v1 = float(im.group(3))
+            op2 = im.group(5)
+            v2 = float(im.group(6))
+            obj = im.group(7)
+
+            grad_field = grad_field or field
+            if grad_field != field:
+                # Mixed-field rules are unexpected; skip to avoid wrong styling.
+                continue
+
+            # Determine min/max from the operators.
+            # Common case: >= v1 && <= v2
+            min_v, max_v = (v1, v2)
+            if (op1.startswith("<") and op2.startswith(">")) or (
+                op1.startswith("<=") and op2.startswith(">=")
+            ):
+                min_v, max_v = (v2, v1)
+            if min_v > max_v:
+                min_v, max_v = (max_v, min_v)
+
+            style_obj = _extract_style_obj(obj)
+            grad_rules.append({"min": min_v, "max": max_v, **style_obj})
+
+        if grad_rules and grad_field:
+            # Best-effort global defaults from the first rule (QGIS2Web commonly repeats these).
+            first = grad_rules[0]
+            out[layer_id] = {
+                "kind": "graduated",
+                "property": grad_field,
+                "rules": grad_rules,
+                "weight": first.get("weight"),
+                "opacity": first.get("opacity"),
+                "fillOpacity": first.get("fillOpacity"),
+                "strokeEnabled": first.get("strokeEnabled"),
+                "fillEnabled": first.get("fillEnabled"),
+            }
+            continue
+
+        # Simple style (first return { ... })
+        ret_m = re.search(r"return\s*\{(.*?)\}\s*;?", body, flags=re.DOTALL)
+        obj_text = ret_m.group(1) if ret_m else ""
+        if obj_text:
+            style_obj = _extract_style_obj(obj_text)
+            out[layer_id] = {"kind": "simple", **style_obj}
+
+    return out
+
+
+_STYLE_OBJ = """{{
+                pane: 'pane_{layer}',
+                opacity: 1,
+                color: '{stroke}',
+                dashArray: '',
+                lineCap: 'butt',
+                lineJoin: 'miter',
+                weight: {weight},
+                fill: true,
+                fillOpacity: 1,
+                fillColor: '{fill}',
+                interactive: true,
+            }}"""
+
+
+def _rgba(rnd: random.Random) -> str:
+    return f"rgba({rnd.randint(0, 255)},{rnd.randint(0, 255)},{rnd.randint(0, 255)},1.0)"
+
+
+def _synthetic_index(categories: int, seed: int = 0) -> str:
+    """index.html-like page with categorized, graduated, rule-based and simple layers."""
+
+    rnd = random.Random(seed)
+    parts = ["<!doctype html><html><head><title>qgis2web</title></head><body><script>"]
+
+    def obj(layer: str) -> str:
+        return _STYLE_OBJ.format(layer=layer, stroke=_rgba(rnd), fill=_rgba(rnd), weight=rnd.choice([0, 1, 2.5]))
+
+    layer = "CLC12Categories_0"
+    cases = "".join(
+        f"\n                case '{100 + i}':\n                    return {obj(layer)}\n                    break;"
+        for i in range(categories)
+    )
+    parts.append(
+        f"function style_{layer}_0(feature) {{\n"
+        f"            switch(String(feature.properties['code_12'])) {{{cases}\n"
+        f"                default:\n                    return {obj(layer)};\n                    break;\n"
+        f"            }}\n        }}\n"
+    )
+
+    layer = "Graduated_1"
+    field = "Nombre de feux"
+    rules = []
+    lo = 0.0
+    for _ in range(max(categories // 10, 1)):
+        hi = round(lo + rnd.uniform(0.5, 5.0), 6)
+        rules.append(
+            f"            if (feature.properties['{field}'] >= {lo:.6f} && feature.properties['{field}'] <= {hi:.6f} ) {{\n"
+            f"                return {obj(layer)}\n            }}\n"
+        )
+        lo = hi
+    parts.append(f"function style_{layer}_0(feature) {{\n{''.join(rules)}        }}\n")
+
+    layer = "RuleBased_2"
+    branches = "\n                else ".join(
+        f"if (exp_{layer}rule{i}_eval_expression(context)) {{\n                  return {obj(layer)};\n                }}"
+        for i in range(max(categories // 10, 1))
+    )
+    parts.append(
+        f"function style_{layer}_0(feature) {{\n"
+        f"            var context = {{\n                feature: feature,\n                variables: {{}}\n            }};\n"
+        f"            {branches}\n        }}\n"
+    )
+
+    layer = "Simple_3"
+    parts.append(f"function style_{layer}_0() {{\n            return {obj(layer)}\n        }}\n")
+
+    parts.append("</script></body></html>")
+    return "".join(parts)
+
+
+def _default_index() -> str | None:
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    found = sorted(glob.glob(os.path.join(base_dir, "data", "cartes", "qgis2web_*", "index.html")))
+    return found[-1] if found else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the single-pass style parser with the regex one.")
+    parser.add_argument("--index", help="index.html to check (default: latest bundled export)")
+    parser.add_argument("--categories", type=int, default=5000, help="cases in the synthetic categorized layer")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = []
+    index_path = args.index or _default_index()
+    if index_path:
+        with open(index_path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((index_path, f.read()))
+    pages.append((f"synthetic, {args.categories} categories", _synthetic_index(args.categories)))
+
+    for name, html in pages:
+        expected = _parse_styles_regex(html)
+        assert parse_qgis2web_styles(html) == expected, name
+        print(f"{name}: {len(html) / 1024:.0f} KB, {len(expected)} styled layers, identical output")
+        for label, fn in (("regex", _parse_styles_regex), ("single pass", parse_qgis2web_styles)):
+            best = min(timeit.repeat(lambda: fn(html), number=1, repeat=args.repeat))
+            print(f"  {label:<12} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
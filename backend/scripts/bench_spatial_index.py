@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import timeit
+
+import numpy as np
+
+from spatial import PolygonLayer
+
+
+def _linear_bbox(layer: PolygonLayer, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+    # Baseline: test every feature's bounding box.
+    b = layer.bounds
+    return np.flatnonzero((b[:, 0] <= maxx) & (b[:, 2] >= minx) & (b[:, 1] <= maxy) & (b[:, 3] >= miny))
+
+
+def _linear_locate(layer: PolygonLayer, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # Baseline: every point against every feature whose bbox holds it.
+    found = np.full(len(x), -1, dtype=np.int64)
+    for i, (px, py) in enumerate(zip(x, y)):
+        for index in _linear_bbox(layer, px, py, px, py):
+            if layer.contains(index, [px], [py])[0]:
+                found[i] = index
+                break
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the boundary spatial index (load, bbox queries, point joins).")
+    parser.add_argument("--points", type=int, default=100_000, help="random points for the bulk join")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    communes_path = os.path.join(base_dir, "..", "nextjs-dashboard", "public", "geo", "CommunesPromethee.simplified.geojson")
+    zones_path = os.path.join(base_dir, "..", "data", "Commune", "zonePromethee.shp")
+
+    with open(communes_path, "r", encoding="utf-8") as f:
+        communes_geojson = json.load(f)
+    for label, load in (
+        ("communes (GeoJSON)", lambda: PolygonLayer.from_geojson("communes", communes_geojson)),
+        ("zones (shapefile)", lambda: PolygonLayer.from_shapefile("zones", zones_path)),
+    ):
+        best = min(timeit.repeat(load, number=1, repeat=args.repeat))
+        layer = load()
+        print(f"{label}: {len(layer)} features, {len(layer.coords)} vertices, built in {best * 1000:.1f} ms")
+
+    communes = PolygonLayer.from_geojson("communes", communes_geojson)
+    rng = np.random.default_rng(0)
+    minx, miny = communes.bounds[:, :2].min(axis=0)
+    maxx, maxy = communes.bounds[:, 2:].max(axis=0)
+
+    boxes = []
+    for _ in range(1000):
+        x, y = rng.uniform(minx, maxx), rng.uniform(miny, maxy)
+        boxes.append((x, y, x + 0.05, y + 0.05))
+    for box in boxes:
+        assert np.array_equal(communes.query_bbox(*box), _linear_bbox(communes, *box))
+    print(f"bbox queries ({len(boxes)}, ~5 km): identical results")
+    for label, fn in (("linear scan", _linear_bbox), ("STR-tree", PolygonLayer.query_bbox)):
+        best = min(timeit.repeat(lambda: [fn(communes, *box) for box in boxes], number=1, repeat=args.repeat))
+        print(f"  {label:<12} {best / len(boxes) * 1e6:8.1f} us/query")
+
+    x = rng.uniform(minx, maxx, args.points)
+    y = rng.uniform(miny, maxy, args.points)
+    sample = min(args.points, 2000)
+    assert np.array_equal(communes.locate(x[:sample], y[:sample]), _linear_locate(communes, x[:sample], y[:sample]))
+    print(f"point-in-polygon join: identical on {sample} points")
+    best = min(timeit.repeat(lambda: _linear_locate(communes, x[:sample], y[:sample]), number=1, repeat=1))
+    print(f"  {'per point':<12} {best / sample * 1e6:8.1f} us/point ({sample} points)")
+    best = min(timeit.repeat(lambda: communes.locate(x, y), number=1, repeat=args.repeat))
+    print(f"  {'bulk':<12} {best / args.points * 1e6:8.1f} us/point ({args.points} points, {best * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
 import os
 
@@ -7,6 +9,14 @@ from db import db_conn
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Import commune INSEE codes and names into Postgres.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip unchanged files and upsert only new or renamed communes",
+    )
+    args = parser.parse_args()
+
     root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     geo_path = os.getenv(
         "COMMUNES_GEOJSON",
@@ -44,14 +54,38 @@ def main() -> None:
                 cur.execute(sf.read())
             conn.commit()
 
-            cur.execute("truncate table communes;")
-            conn.commit()
-
-            cur.executemany(
-                "insert into communes (insee, nom) values (%s, %s) on conflict (insee) do update set nom = excluded.nom",
-                rows,
+            checksum = hashlib.sha256(repr(rows).encode("utf-8")).hexdigest()
+            cur.execute(
+                "select checksum from import_checksums where source = 'communes' and part = 'all'"
             )
-            conn.commit()
+            previous = cur.fetchone()
+
+            if args.incremental and previous and previous[0] == checksum:
+                print("Communes unchanged since last import")
+            else:
+                if args.incremental:
+                    cur.execute(
+                        "delete from communes where not (insee = any(%s))",
+                        ([insee for (insee, _nom) in rows],),
+                    )
+                else:
+                    cur.execute("truncate table communes;")
+
+                cur.executemany(
+                    "insert into communes (insee, nom) values (%s, %s) on conflict (insee) do update set nom = excluded.nom"
+                    " where communes.nom is distinct from excluded.nom",
+                    rows,
+                )
+                cur.execute(
+                    """
+                    insert into import_checksums (source, part, checksum, rows, imported_at)
+                    values ('communes', 'all', %s, %s, now())
+                    on conflict (source, part) do update
+                      set checksum = excluded.checksum, rows = excluded.rows, imported_at = excluded.imported_at
+                    """,
+                    (checksum, len(rows)),
+                )
+                conn.commit()
 
             cur.execute("select count(*) from communes;")
             n = cur.fetchone()[0]
@@ -1,91 +1,324 @@
 from __future__ import annotations
 
-import csv
+import argparse
+import hashlib
 import os
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
 
-from db import db_conn
+from db import FIRE_SORT_SQL, FIRE_YEAR_SQL, db_conn, refresh_fires_insee_agg
+from fires_csv import MISSING_INT, iter_fires_csv
 
+FIRE_COLUMNS = ("annee", "numero", "departement", "insee", "commune", "date_alerte", "surface_ha")
 
-def _parse_dt(value: str) -> datetime | None:
-    value = (value or "").strip()
-    if not value:
-        return None
+# fires_csv column -> header name reported when it is missing.
+REQUIRED_COLUMNS = {
+    "annee": "Année",
+    "numero": "Numéro",
+    "departement": "Département",
+    "insee": "Code INSEE",
+    "commune": "Commune",
+    "date_alerte": "Alerte",
+}
 
-    for fmt in ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S"):
-        try:
-            dt = datetime.strptime(value, fmt)
-            return dt.replace(tzinfo=timezone.utc)
-        except ValueError:
-            pass
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
-    return None
+# A fire is identified by (annee, numero, departement) in incremental mode.
+# Plain equality on coalesced values (rather than IS NOT DISTINCT FROM) keeps
+# the merge joins hashable; fires_key_coalesced_idx indexes these expressions.
+KEY_COLUMNS_SQL = "(coalesce(annee, 0)), (coalesce(numero, -1)), (coalesce(departement, ''))"
+KEY_MATCH_SQL = (
+    "coalesce(f.annee, 0) = coalesce(i.annee, 0) "
+    "and coalesce(f.numero, -1) = coalesce(i.numero, -1) "
+    "and coalesce(f.departement, '') = coalesce(i.departement, '')"
+)
+
+# Built on fires_staging after COPY, renamed to the schema.sql names on swap.
+STAGING_INDEXES = {
+    "fires_staging_insee_idx": ("fires_insee_idx", "(insee)"),
+    "fires_staging_departement_idx": ("fires_departement_idx", "(departement)"),
+    "fires_staging_date_idx": ("fires_date_idx", "(date_alerte)"),
+    "fires_staging_sort_idx": ("fires_sort_idx", f"(({FIRE_SORT_SQL}) desc, id desc)"),
+    "fires_staging_key_idx": ("fires_key_coalesced_idx", f"({KEY_COLUMNS_SQL})"),
+}
+
+VALUES_DIFFER_SQL = (
+    "(f.insee, f.commune, f.date_alerte, f.surface_ha) "
+    "is distinct from (i.insee, i.commune, i.date_alerte, i.surface_ha)"
+)
+
+
+def _iter_rows(csv_path: str) -> Iterator[tuple]:
+    """Yield fires table tuples (FIRE_COLUMNS order) as the CSV is read.
+
+    Rows are streamed, never all held in memory.
+    """
+
+    found, records = iter_fires_csv(csv_path)
+    if not found:
+        raise SystemExit("CSV has no header")
+    # expected columns from your dataset
+    # Année;Numéro;Département;Code INSEE;Commune;Alerte;surf_ha
+    for name, label in REQUIRED_COLUMNS.items():
+        if name not in found:
+            raise SystemExit(f"Missing column '{label}'")
+
+    for (annee, n, us, s, dep, insee, commune, _origine) in records:
+        yield (
+            annee or None,
+            (n or None) if n != MISSING_INT else None,
+            dep or None,
+            insee or None,
+            commune or None,
+            (_EPOCH + timedelta(microseconds=us)) if us != MISSING_INT else None,
+            s if s == s else None,  # NaN -> NULL
+        )
+
+
+class _YearChecksums:
+    """Running SHA-256 and row count of the parsed rows, per annee."""
+
+    def __init__(self) -> None:
+        self.hashes = {}  # annee -> hashlib.sha256()
+        self.rows: dict[int, int] = {}
+
+    def add(self, row: tuple) -> None:
+        year = row[0] or 0
+        h = self.hashes.get(year)
+        if h is None:
+            h = self.hashes[year] = hashlib.sha256()
+            self.rows[year] = 0
+        h.update(repr(row).encode("utf-8"))
+        self.rows[year] += 1
+
+    def tracked(self, rows: Iterator[tuple]) -> Iterator[tuple]:
+        for row in rows:
+            self.add(row)
+            yield row
+
+    def digests(self) -> dict[int, str]:
+        return {year: h.hexdigest() for (year, h) in self.hashes.items()}
+
+
+def _copy_rows(cur, table: str, rows: Iterator[tuple], *, progress_every: int = 50_000) -> int:
+    """COPY ``rows`` into ``table``; psycopg sends them in buffered chunks."""
+
+    n = 0
+    started = time.perf_counter()
+    with cur.copy(f"copy {table} ({', '.join(FIRE_COLUMNS)}) from stdin") as copy:
+        for row in rows:
+            copy.write_row(row)
+            n += 1
+            if n % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"  {n} rows ({n / elapsed:.0f} rows/s)")
+    return n
+
+
+def _duplicate_keys(cur, table: str, limit: int = 5) -> list[tuple]:
+    """Fire keys occurring more than once in ``table`` (first ``limit``)."""
+
+    cur.execute(
+        f"""
+        select {KEY_COLUMNS_SQL}, count(*)
+        from {table}
+        group by 1, 2, 3
+        having count(*) > 1
+        order by 1, 2, 3
+        limit %s
+        """,
+        (limit,),
+    )
+    return cur.fetchall()
+
+
+def _save_checksums(cur, checksums: _YearChecksums, years: list[int] | None = None) -> None:
+    digests = checksums.digests()
+    if years is None:
+        cur.execute("delete from import_checksums where source = 'fires'")
+        years = sorted(digests)
+    for year in years:
+        cur.execute(
+            """
+            insert into import_checksums (source, part, checksum, rows, imported_at)
+            values ('fires', %s, %s, %s, now())
+            on conflict (source, part) do update
+              set checksum = excluded.checksum, rows = excluded.rows, imported_at = excluded.imported_at
+            """,
+            (str(year), digests[year], checksums.rows[year]),
+        )
+
+
+def _import_full(conn, cur, csv_path: str) -> None:
+    """Reload every fire through a staging table swapped in atomically."""
+
+    # Load into a staging copy of fires; the API keeps reading the
+    # current table until the swap below commits.
+    cur.execute("drop table if exists fires_staging;")
+    cur.execute("create table fires_staging (like fires including defaults);")
+
+    # The CSV is parsed as COPY consumes it.
+    checksums = _YearChecksums()
+    started = time.perf_counter()
+    n = _copy_rows(cur, "fires_staging", checksums.tracked(_iter_rows(csv_path)))
+    elapsed = time.perf_counter() - started
+    print(f"Copied {n} rows in {elapsed:.1f}s ({n / max(elapsed, 1e-9):.0f} rows/s)")
+
+    duplicates = _duplicate_keys(cur, "fires_staging")
+    if duplicates:
+        print(
+            f"Warning: duplicate fire keys (annee, numero, departement, count), e.g. {duplicates}; "
+            "--incremental will refuse this CSV until they are fixed"
+        )
+
+    cur.execute("alter table fires_staging add constraint fires_staging_pkey primary key (id);")
+    for name, (_final, cols) in STAGING_INDEXES.items():
+        cur.execute(f"create index {name} on fires_staging {cols};")
+    conn.commit()
+
+    # Atomic swap: readers see either the old or the new table.
+    cur.execute("alter table fires rename to fires_old;")
+    cur.execute("alter table fires_staging rename to fires;")
+    cur.execute("alter sequence fires_id_seq owned by fires.id;")
+    cur.execute("drop table fires_old;")
+    cur.execute("alter index fires_staging_pkey rename to fires_pkey;")
+    for name, (final, _cols) in STAGING_INDEXES.items():
+        cur.execute(f"alter index {name} rename to {final};")
+    refresh_fires_insee_agg(cur)
+    _save_checksums(cur, checksums)
+    conn.commit()
+
+
+def _import_incremental(conn, cur, csv_path: str) -> None:
+    """Upsert only the annee partitions whose checksum changed.
+
+    The CSV is streamed twice rather than held in memory: a first pass
+    hashes the rows per annee, a second one COPYs only the rows of changed
+    partitions into a temp table, which is merged into fires (delete
+    vanished keys, update changed rows, insert new ones). Partitions gone
+    from the CSV are deleted. Aggregates are refreshed for the affected
+    alert years only.
+    """
+
+    started = time.perf_counter()
+    checksums = _YearChecksums()
+    for row in _iter_rows(csv_path):
+        checksums.add(row)
+    digests = checksums.digests()
+
+    cur.execute("select part, checksum from import_checksums where source = 'fires'")
+    previous = {int(part): checksum for (part, checksum) in cur.fetchall()}
+    changed = sorted(y for (y, d) in digests.items() if previous.get(y) != d)
+    removed = sorted(y for y in previous if y not in digests)
+    print(f"Partitions: {len(digests)} in CSV, {len(changed)} changed, {len(removed)} removed")
+    if not changed and not removed:
+        print("Nothing to import")
+        return
+
+    cur.execute(
+        """
+        create temp table fires_incoming (
+          annee int, numero int, departement text, insee text,
+          commune text, date_alerte timestamptz, surface_ha double precision
+        ) on commit drop
+        """
+    )
+    changed_set = set(changed)
+    n = _copy_rows(
+        cur,
+        "fires_incoming",
+        (row for row in _iter_rows(csv_path) if (row[0] or 0) in changed_set),
+    )
+    # The merge matches rows by key: two incoming rows with the same key
+    # would both update (or both replace) the same fire.
+    duplicates = _duplicate_keys(cur, "fires_incoming")
+    if duplicates:
+        raise SystemExit(
+            f"Duplicate fire keys (annee, numero, departement, count) in the CSV, e.g. {duplicates}; "
+            "fix them or run a full import"
+        )
+    cur.execute("analyze fires_incoming")
+
+    touched = changed + removed
+    cur.execute(
+        f"""
+        select distinct coalesce({FIRE_YEAR_SQL}, 0) from fires where coalesce(annee, 0) = any(%s)
+        union
+        select distinct coalesce({FIRE_YEAR_SQL}, 0) from fires_incoming
+        """,
+        (touched,),
+    )
+    alert_years = [y for (y,) in cur.fetchall()]
+
+    cur.execute(
+        f"""
+        delete from fires f
+        where coalesce(f.annee, 0) = any(%s)
+          and not exists (select 1 from fires_incoming i where {KEY_MATCH_SQL})
+        """,
+        (touched,),
+    )
+    deleted = cur.rowcount
+    cur.execute(
+        f"""
+        update fires f
+        set insee = i.insee, commune = i.commune, date_alerte = i.date_alerte, surface_ha = i.surface_ha
+        from fires_incoming i
+        where coalesce(f.annee, 0) = any(%s) and {KEY_MATCH_SQL} and {VALUES_DIFFER_SQL}
+        """,
+        (changed,),
+    )
+    updated = cur.rowcount
+    cur.execute(
+        f"""
+        insert into fires ({', '.join(FIRE_COLUMNS)})
+        select {', '.join('i.' + c for c in FIRE_COLUMNS)}
+        from fires_incoming i
+        where not exists (
+          select 1 from fires f where coalesce(f.annee, 0) = any(%s) and {KEY_MATCH_SQL}
+        )
+        """,
+        (changed,),
+    )
+    inserted = cur.rowcount
+
+    refresh_fires_insee_agg(cur, years=alert_years)
+    _save_checksums(cur, checksums, changed)
+    cur.execute(
+        "delete from import_checksums where source = 'fires' and part = any(%s)",
+        ([str(y) for y in removed],),
+    )
+    conn.commit()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Incremental import: {n} rows staged, {inserted} inserted, {updated} updated, "
+        f"{deleted} deleted in {elapsed:.1f}s"
+    )
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Import the Prométhée fires CSV into Postgres.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only upsert years whose content changed since the last import",
+    )
+    parser.add_argument(
+        "--refresh-agg",
+        action="store_true",
+        help="apply the schema and rebuild fires_insee_agg from the fires already loaded, without reading the CSV",
+    )
+    args = parser.parse_args()
+
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     default_csv = os.path.join(base_dir, "data", "liste_incendies_all.csv")
     csv_path = os.getenv("FIRE_CSV_PATH", default_csv)
 
-    if not os.path.exists(csv_path):
+    if not args.refresh_agg and not os.path.exists(csv_path):
         raise SystemExit(f"CSV not found: {csv_path}")
 
-    with open(csv_path, "r", encoding="latin-1", newline="") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        if not reader.fieldnames:
-            raise SystemExit("CSV has no header")
-
-        # expected columns from your dataset
-        # Année;Numéro;Département;Code INSEE;Commune;Alerte;surf_ha
-        def col(name: str) -> str:
-            if name in reader.fieldnames:
-                return name
-            raise SystemExit(f"Missing column '{name}'")
-
-        c_annee = col("Année")
-        c_numero = col("Numéro")
-        c_dep = col("Département")
-        c_insee = col("Code INSEE")
-        c_commune = col("Commune")
-        c_date = col("Alerte")
-        c_surf_ha = "surf_ha" if "surf_ha" in reader.fieldnames else None
-        c_surface_m2 = "Surface parcourue (m2)" if "Surface parcourue (m2)" in reader.fieldnames else None
-
-        rows = []
-        for r in reader:
-            try:
-                annee = int((r.get(c_annee) or "").strip() or 0) or None
-            except ValueError:
-                annee = None
-
-            try:
-                numero = int((r.get(c_numero) or "").strip() or 0) or None
-            except ValueError:
-                numero = None
-
-            dep = (r.get(c_dep) or "").strip() or None
-            insee = (r.get(c_insee) or "").strip() or None
-            commune = (r.get(c_commune) or "").strip() or None
-            dt = _parse_dt(r.get(c_date) or "")
-
-            surface_ha = None
-            if c_surf_ha:
-                raw = (r.get(c_surf_ha) or "").replace(",", ".").strip()
-                try:
-                    surface_ha = float(raw) if raw else None
-                except ValueError:
-                    surface_ha = None
-
-            if surface_ha is None and c_surface_m2:
-                raw = (r.get(c_surface_m2) or "").replace(",", ".").strip()
-                try:
-                    m2 = float(raw) if raw else None
-                    surface_ha = (m2 / 10000.0) if m2 is not None else None
-                except ValueError:
-                    surface_ha = None
-
-            rows.append((annee, numero, dep, insee, commune, dt, surface_ha))
-
     with db_conn() as conn:
         with conn.cursor() as cur:
             # schema
@@ -94,17 +327,18 @@ def main() -> None:
                 cur.execute(sf.read())
             conn.commit()
 
-            # load
-            cur.execute("truncate table fires;")
-            conn.commit()
+            if args.refresh_agg:
+                refresh_fires_insee_agg(cur)
+                conn.commit()
+                cur.execute("select count(*) from fires_insee_agg;")
+                print(f"Rebuilt fires_insee_agg: {cur.fetchone()[0]} rows")
+                return
+            if args.incremental:
+                _import_incremental(conn, cur, csv_path)
+            else:
+                _import_full(conn, cur, csv_path)
 
-            cur.executemany(
-                """
-                insert into fires (annee, numero, departement, insee, commune, date_alerte, surface_ha)
-                values (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                rows,
-            )
+            cur.execute("analyze fires;")
             conn.commit()
 
             cur.execute("select count(*) from fires;")
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import datetime as _dt
+import math
+import os
+import re
+import struct
+
+import numpy as np
+
+# Minimal ESRI shapefile reader (.shp geometry, .dbf attributes, .prj CRS).
+#
+# Only x/y are read (Z and M values are skipped), and the one projected CRS
+# the Prométhée data uses, Lambert conformal conic (Lambert-93), is inverted
+# to lon/lat. RGF93 and WGS84 agree to well under a metre, so no datum shift
+# is applied.
+
+NULL, POINT, POLYLINE, POLYGON, MULTIPOINT = 0, 1, 3, 5, 8
+# Z and M variants share the 2D layout up to the end of the x/y block.
+_BASE_TYPE = {0: NULL, 1: POINT, 3: POLYLINE, 5: POLYGON, 8: MULTIPOINT, 11: POINT, 13: POLYLINE, 15: POLYGON, 18: MULTIPOINT, 21: POINT, 23: POLYLINE, 25: POLYGON, 28: MULTIPOINT}
+
+
+class Shape:
+    """One .shp record: ``coords`` (n, 2) and the start of each part in it."""
+
+    __slots__ = ("kind", "parts", "coords")
+
+    def __init__(self, kind: int, parts: np.ndarray, coords: np.ndarray) -> None:
+        self.kind = kind
+        self.parts = parts
+        self.coords = coords
+
+
+def read_shp(path: str) -> tuple[int, list[Shape]]:
+    """(shape type, records) of a .shp file; raises ValueError if malformed."""
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 100 or struct.unpack(">i", data[:4])[0] != 9994:
+        raise ValueError(f"Not a shapefile: {path}")
+    shape_type = _BASE_TYPE.get(struct.unpack("<i", data[32:36])[0])
+    if shape_type is None:
+        raise ValueError(f"Unsupported shape type in {path}")
+
+    shapes: list[Shape] = []
+    pos = 100
+    while pos + 8 <= len(data):
+        _number, words = struct.unpack(">ii", data[pos : pos + 8])
+        start = pos + 8
+        end = start + 2 * words
+        pos = end
+        if end > len(data) or words < 2:
+            raise ValueError(f"Truncated record in {path}")
+        kind = _BASE_TYPE.get(struct.unpack("<i", data[start : start + 4])[0])
+        body = start + 4
+        if kind == NULL or kind is None:
+            shapes.append(Shape(NULL, np.zeros(0, dtype=np.int64), np.empty((0, 2))))
+        elif kind == POINT:
+            xy = np.frombuffer(data, dtype="<f8", count=2, offset=body).reshape(1, 2)
+            shapes.append(Shape(POINT, np.zeros(1, dtype=np.int64), xy.astype(np.float64)))
+        elif kind == MULTIPOINT:
+            (n,) = struct.unpack("<i", data[body + 32 : body + 36])
+            xy = np.frombuffer(data, dtype="<f8", count=2 * n, offset=body + 36).reshape(n, 2)
+            shapes.append(Shape(MULTIPOINT, np.zeros(1, dtype=np.int64), xy.astype(np.float64)))
+        else:
+            nparts, npoints = struct.unpack("<ii", data[body + 32 : body + 40])
+            parts = np.frombuffer(data, dtype="<i4", count=nparts, offset=body + 40).astype(np.int64)
+            xy_at = body + 40 + 4 * nparts
+            xy = np.frombuffer(data, dtype="<f8", count=2 * npoints, offset=xy_at).reshape(npoints, 2)
+            shapes.append(Shape(kind, parts, xy.astype(np.float64)))
+    return shape_type, shapes
+
+
+def _dbf_encoding(path: str) -> str:
+    # The .cpg sidecar names the code page ("UTF-8", "1252", ...).
+    try:
+        with open(os.path.splitext(path)[0] + ".cpg", "r", encoding="ascii", errors="replace") as f:
+            name = f.read().strip()
+    except OSError:
+        return "latin-1"
+    if name.isdigit():
+        name = f"cp{name}"
+    try:
+        "".encode(name)
+    except LookupError:
+        return "latin-1"
+    return name
+
+
+def read_dbf(path: str, encoding: str | None = None) -> list[dict]:
+    """Records of a dBASE III table as dicts (deleted records included as None)."""
+
+    encoding = encoding or _dbf_encoding(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 32:
+        raise ValueError(f"Not a DBF file: {path}")
+    nrecords, header_len, record_len = struct.unpack("<IHH", data[4:12])
+
+    fields: list[tuple[str, str, int, int, int]] = []
+    pos, offset = 32, 1
+    while pos + 32 <= header_len and data[pos] != 0x0D:
+        name = data[pos : pos + 11].split(b"\0", 1)[0].decode(encoding, errors="replace")
+        ftype = chr(data[pos + 11])
+        length, decimals = data[pos + 16], data[pos + 17]
+        fields.append((name, ftype, offset, length, decimals))
+        offset += length
+        pos += 32
+
+    records: list[dict] = []
+    for i in range(nrecords):
+        rec = data[header_len + i * record_len : header_len + (i + 1) * record_len]
+        if len(rec) < record_len:
+            break
+        if rec[:1] == b"*":
+            records.append(None)  # type: ignore[arg-type]
+            continue
+        row: dict[str, object] = {}
+        for name, ftype, off, length, decimals in fields:
+            raw = rec[off : off + length]
+            text = raw.decode(encoding, errors="replace").strip()
+            value: object
+            if ftype in "NF":
+                try:
+                    value = int(text) if ftype == "N" and not decimals and re.fullmatch(r"[-+]?\d+", text) else float(text)
+                except ValueError:
+                    value = None
+            elif ftype == "L":
+                value = True if text[:1] in "YyTt" and text else False if text[:1] in "NnFf" and text else None
+            elif ftype == "D":
+                try:
+                    value = _dt.date(int(text[:4]), int(text[4:6]), int(text[6:8])).isoformat()
+                except ValueError:
+                    value = None
+            else:
+                value = text
+            row[name] = value
+        records.append(row)
+    return records
+
+
+def _lcc_inverse(params: dict[str, float], a: float, inv_f: float):
+    # Lambert conformal conic, two standard parallels (Snyder, Map
+    # Projections: A Working Manual, eq. 15-1 to 15-11 and 7-9).
+    f = 1 / inv_f if inv_f else 0.0
+    e = math.sqrt(2 * f - f * f)
+    phi1 = math.radians(params["standard_parallel_1"])
+    phi2 = math.radians(params.get("standard_parallel_2", params["standard_parallel_1"]))
+    phi0 = math.radians(params.get("latitude_of_origin", 0.0))
+    lam0 = math.radians(params.get("central_meridian", 0.0))
+    fe = params.get("false_easting", 0.0)
+    fn = params.get("false_northing", 0.0)
+
+    def m(phi: float) -> float:
+        return math.cos(phi) / math.sqrt(1 - (e * math.sin(phi)) ** 2)
+
+    def t(phi: float) -> float:
+        s = e * math.sin(phi)
+        return math.tan(math.pi / 4 - phi / 2) / ((1 - s) / (1 + s)) ** (e / 2)
+
+    if abs(phi1 - phi2) > 1e-12:
+        n = (math.log(m(phi1)) - math.log(m(phi2))) / (math.log(t(phi1)) - math.log(t(phi2)))
+    else:
+        n = math.sin(phi1)
+    big_f = m(phi1) / (n * t(phi1) ** n)
+    rho0 = a * big_f * t(phi0) ** n
+
+    def inverse(xy: np.ndarray) -> np.ndarray:
+        x = xy[:, 0] - fe
+        y = rho0 - (xy[:, 1] - fn)
+        rho = np.sign(n) * np.hypot(x, y)
+        theta = np.arctan2(np.sign(n) * x, np.sign(n) * y)
+        ts = (rho / (a * big_f)) ** (1 / n)
+        phi = np.pi / 2 - 2 * np.arctan(ts)
+        for _ in range(10):
+            s = e * np.sin(phi)
+            phi = np.pi / 2 - 2 * np.arctan(ts * ((1 - s) / (1 + s)) ** (e / 2))
+        return np.column_stack((np.degrees(theta / n + lam0), np.degrees(phi)))
+
+    return inverse
+
+
+def prj_to_lonlat(prj_text: str):
+    """Function mapping (n, 2) coordinates of this .prj CRS to lon/lat.
+
+    Raises ValueError for projections other than Lambert conformal conic.
+    """
+
+    text = prj_text.strip()
+    if not text or not text.upper().startswith("PROJCS"):
+        return lambda xy: xy
+    proj = re.search(r'PROJECTION\["([^"]+)"', text)
+    if not proj or "lambert_conformal_conic" not in proj.group(1).lower():
+        raise ValueError(f"Unsupported projection: {proj.group(1) if proj else '?'}")
+    spheroid = re.search(r'SPHEROID\["[^"]*",\s*([0-9.eE+-]+),\s*([0-9.eE+-]+)', text)
+    if not spheroid:
+        raise ValueError("Projection without spheroid")
+    params = {
+        name.lower(): float(value)
+        for name, value in re.findall(r'PARAMETER\["([^"]+)",\s*([0-9.eE+-]+)\]', text)
+    }
+    unit = re.findall(r'UNIT\["[^"]*",\s*([0-9.eE+-]+)\]', text)
+    to_metres = float(unit[-1]) if unit else 1.0
+    inverse = _lcc_inverse(params, float(spheroid.group(1)), float(spheroid.group(2)))
+    return lambda xy: inverse(xy * to_metres)
+
+
+def read_shapefile(path: str) -> tuple[int, list[Shape], list[dict]]:
+    """(shape type, shapes in lon/lat, attribute records) of ``path`` (.shp).
+
+    The .dbf sibling is optional (empty records), as is the .prj one
+    (coordinates taken as lon/lat).
+    """
+
+    shape_type, shapes = read_shp(path)
+    base = os.path.splitext(path)[0]
+    try:
+        with open(base + ".prj", "r", encoding="ascii", errors="replace") as f:
+            to_lonlat = prj_to_lonlat(f.read())
+    except OSError:
+        to_lonlat = prj_to_lonlat("")
+    for shape in shapes:
+        if len(shape.coords):
+            shape.coords = to_lonlat(shape.coords)
+
+    records: list[dict] = []
+    if os.path.exists(base + ".dbf"):
+        records = read_dbf(base + ".dbf")
+    records += [{}] * (len(shapes) - len(records))
+    return shape_type, shapes, records[: len(shapes)]
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from shapefile import POLYGON, read_shapefile
+
+# In-process spatial index over polygon layers (communes, Prométhée zones,
+# départements): coordinates packed into flat numpy arrays, feature bounding
+# boxes in a static STR-packed R-tree, and a vectorised even-odd
+# point-in-polygon test for bulk joins.
+
+NODE_CAPACITY = 16
+# Points x edges handled per crossing-number batch (bounds temporary memory).
+_PIP_BATCH = 1 << 21
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def _str_order(boxes: np.ndarray, capacity: int) -> np.ndarray:
+    # Sort-Tile-Recursive: vertical slices by centre x, then centre y within
+    # each slice, so runs of `capacity` entries are spatially compact.
+    n = len(boxes)
+    cx = boxes[:, 0] + boxes[:, 2]
+    cy = boxes[:, 1] + boxes[:, 3]
+    slices = math.ceil(math.sqrt(math.ceil(n / capacity)))
+    per_slice = slices * capacity
+    order = np.argsort(cx, kind="stable")
+    for s in range(0, n, per_slice):
+        chunk = order[s : s + per_slice]
+        order[s : s + per_slice] = chunk[np.argsort(cy[chunk], kind="stable")]
+    return order
+
+
+class STRTree:
+    """Static R-tree over (n, 4) [minx, miny, maxx, maxy] boxes, STR packed.
+
+    Packing is vectorised; queries walk the few nodes they touch in plain
+    Python, which beats numpy's per-call overhead at these sizes.
+    """
+
+    def __init__(self, boxes: np.ndarray, capacity: int = NODE_CAPACITY) -> None:
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.size = len(boxes)
+        order = _str_order(boxes, capacity) if self.size else _EMPTY
+        level = boxes[order]
+        self._items = [(*box, index) for box, index in zip(level.tolist(), order.tolist())]
+        # Levels from the root down; each node is its box plus the [start,
+        # end) run it covers in the level below (in _items for the last one).
+        self._levels: list[list[tuple]] = []
+        while len(level) > 1:
+            starts = np.arange(0, len(level), capacity)
+            ends = np.minimum(starts + capacity, len(level))
+            nodes = np.column_stack(
+                (
+                    np.minimum.reduceat(level[:, 0], starts),
+                    np.minimum.reduceat(level[:, 1], starts),
+                    np.maximum.reduceat(level[:, 2], starts),
+                    np.maximum.reduceat(level[:, 3], starts),
+                )
+            )
+            order = _str_order(nodes, capacity)
+            level = nodes[order]
+            self._levels.append(
+                [(*box, start, end) for box, start, end in zip(level.tolist(), starts[order].tolist(), ends[order].tolist())]
+            )
+        self._levels.reverse()
+
+    def query(self, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+        """Sorted indices of the boxes intersecting the query box."""
+
+        runs = [(0, len(self._levels[0]) if self._levels else self.size)]
+        for nodes in self._levels:
+            runs = [
+                (start, end)
+                for lo, hi in runs
+                for x0, y0, x1, y1, start, end in nodes[lo:hi]
+                if x0 <= maxx and x1 >= minx and y0 <= maxy and y1 >= miny
+            ]
+        hits = [
+            index
+            for lo, hi in runs
+            for x0, y0, x1, y1, index in self._items[lo:hi]
+            if x0 <= maxx and x1 >= minx and y0 <= maxy and y1 >= miny
+        ]
+        hits.sort()
+        return np.array(hits, dtype=np.int64)
+
+
+class PolygonLayer:
+    """Polygon features packed into flat arrays, with a bbox index.
+
+    ``coords`` holds every closed ring back to back; ring ``r`` is
+    ``coords[ring_offsets[r]:ring_offsets[r + 1]]`` and feature ``i`` owns
+    rings ``feature_rings[i]:feature_rings[i + 1]``. Holes are plain rings:
+    containment uses the even-odd rule over all rings of a feature.
+    """
+
+    def __init__(self, name: str, properties: list[dict], rings: list[list[np.ndarray]]) -> None:
+        self.name = name
+        self.properties = properties
+
+        ring_counts = np.array([len(feature) for feature in rings], dtype=np.int64)
+        self.feature_rings = np.concatenate(([0], np.cumsum(ring_counts)))
+        closed: list[np.ndarray] = []
+        for feature in rings:
+            for ring in feature:
+                if len(ring) and not np.array_equal(ring[0], ring[-1]):
+                    ring = np.vstack((ring, ring[:1]))
+                closed.append(ring)
+        lengths = np.array([len(r) for r in closed], dtype=np.int64)
+        self.ring_offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.coords = np.vstack(closed) if closed else np.empty((0, 2))
+
+        # Edges, minus the pseudo-edges joining one ring to the next.
+        keep = np.ones(max(len(self.coords) - 1, 0), dtype=bool)
+        keep[self.ring_offsets[1:-1] - 1] = False
+        first = np.flatnonzero(keep)
+        self._edges_x = self.coords[first, 0]
+        self._edges_y = self.coords[first, 1]
+        self._edges_y2 = self.coords[first + 1, 1]
+        dy = self._edges_y2 - self._edges_y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._edges_slope = np.where(dy != 0, (self.coords[first + 1, 0] - self._edges_x) / dy, 0.0)
+        self._feature_edges = np.searchsorted(first, self.ring_offsets[self.feature_rings])
+
+        bounds = np.full((len(properties), 4), [np.inf, np.inf, -np.inf, -np.inf])
+        starts = self.ring_offsets[self.feature_rings[:-1]]
+        ends = self.ring_offsets[self.feature_rings[1:]]
+        for i in np.flatnonzero(ends > starts):
+            pts = self.coords[starts[i] : ends[i]]
+            bounds[i, :2] = pts.min(axis=0)
+            bounds[i, 2:] = pts.max(axis=0)
+        self.bounds = bounds
+        self.tree = STRTree(bounds)
+
+        # Centroid of each feature's largest ring (its main part), for
+        # point-like lookups such as fires known only by their commune.
+        cross = self.coords[first, 0] * self.coords[first + 1, 1] - self.coords[first + 1, 0] * self.coords[first, 1]
+        ring_of_edge = np.searchsorted(self.ring_offsets, first, side="right") - 1
+        nrings = len(self.ring_offsets) - 1
+        area2 = np.bincount(ring_of_edge, cross, minlength=nrings)
+        cx = np.bincount(ring_of_edge, (self.coords[first, 0] + self.coords[first + 1, 0]) * cross, minlength=nrings)
+        cy = np.bincount(ring_of_edge, (self.coords[first, 1] + self.coords[first + 1, 1]) * cross, minlength=nrings)
+        centroids = np.full((len(properties), 2), np.nan)
+        for i in np.flatnonzero(ends > starts):
+            r0, r1 = self.feature_rings[i], self.feature_rings[i + 1]
+            r = r0 + int(np.argmax(np.abs(area2[r0:r1])))
+            if area2[r]:
+                centroids[i] = (cx[r] / (3 * area2[r]), cy[r] / (3 * area2[r]))
+            else:
+                centroids[i] = self.coords[self.ring_offsets[r] : self.ring_offsets[r + 1]].mean(axis=0)
+        self.centroids = centroids
+        self._centroid_tree: STRTree | None = None
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    @classmethod
+    def from_geojson(cls, name: str, geojson: dict) -> "PolygonLayer":
+        properties: list[dict] = []
+        rings: list[list[np.ndarray]] = []
+        for feature in geojson.get("features") or []:
+            geometry = feature.get("geometry") or {}
+            kind = geometry.get("type")
+            coordinates = geometry.get("coordinates") or []
+            if kind == "Polygon":
+                polygons = [coordinates]
+            elif kind == "MultiPolygon":
+                polygons = coordinates
+            else:
+                polygons = []
+            properties.append(feature.get("properties") or {})
+            rings.append(
+                [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon if len(ring)]
+            )
+        return cls(name, properties, rings)
+
+    @classmethod
+    def from_shapefile(cls, name: str, path: str) -> "PolygonLayer":
+        shape_type, shapes, records = read_shapefile(path)
+        if shape_type != POLYGON:
+            raise ValueError(f"{path} is not a polygon shapefile")
+        rings = [np.split(shape.coords, shape.parts[1:]) if len(shape.coords) else [] for shape in shapes]
+        return cls(name, [record or {} for record in records], rings)
+
+    def query_bbox(self, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+        """Indices of the features whose bounding box meets the given one."""
+
+        return self.tree.query(minx, miny, maxx, maxy)
+
+    def centroids_in_bbox(self, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+        """Indices of the features whose centroid lies in the given box."""
+
+        if self._centroid_tree is None:
+            c = np.where(np.isnan(self.centroids), np.inf, self.centroids)
+            self._centroid_tree = STRTree(np.hstack((c, c)))
+        return self._centroid_tree.query(minx, miny, maxx, maxy)
+
+    def contains(self, index: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Boolean mask of the points (x, y) inside feature ``index``."""
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        lo, hi = self._feature_edges[index], self._feature_edges[index + 1]
+        inside = np.zeros(len(x), dtype=bool)
+        if hi <= lo or not len(x):
+            return inside
+        ex, ey, ey2, slope = (a[lo:hi] for a in (self._edges_x, self._edges_y, self._edges_y2, self._edges_slope))
+        step = max(1, _PIP_BATCH // (hi - lo))
+        for s in range(0, len(x), step):
+            px = x[s : s + step, None]
+            py = y[s : s + step, None]
+            crosses = ((ey > py) != (ey2 > py)) & (px < ex + (py - ey) * slope)
+            inside[s : s + step] = np.count_nonzero(crosses, axis=1) & 1 == 1
+        return inside
+
+    def locate(self, x, y) -> np.ndarray:
+        """Index of the feature containing each point (x, y), -1 if none.
+
+        Features are swept once each: points are sorted by x so the ones in
+        a feature's bounding box are found by bisection before the exact test.
+        """
+
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        found = np.full(len(x), -1, dtype=np.int64)
+        valid = np.isfinite(x) & np.isfinite(y)
+        if not valid.any():
+            return found
+        order = np.flatnonzero(valid)
+        order = order[np.argsort(x[order], kind="stable")]
+        sorted_x = x[order]
+        candidates = self.query_bbox(sorted_x[0], y[order].min(), sorted_x[-1], y[order].max())
+        for index in candidates:
+            minx, miny, maxx, maxy = self.bounds[index]
+            lo = np.searchsorted(sorted_x, minx, side="left")
+            hi = np.searchsorted(sorted_x, maxx, side="right")
+            points = order[lo:hi]
+            points = points[(y[points] >= miny) & (y[points] <= maxy) & (found[points] < 0)]
+            if len(points):
+                found[points[self.contains(index, x[points], y[points])]] = index
+        return found
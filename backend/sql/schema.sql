@@ -16,6 +16,15 @@ create table if not exists fires (
 create index if not exists fires_insee_idx on fires (insee);
 create index if not exists fires_departement_idx on fires (departement);
 create index if not exists fires_date_idx on fires (date_alerte);
+-- /api/fires order and keyset cursor (db.FIRE_SORT_SQL, then id).
+create index if not exists fires_sort_idx on fires (
+  (coalesce(coalesce(date_alerte, case when annee between 1 and 9999
+    then make_timestamp(annee, 1, 1, 0, 0, 0) at time zone 'UTC' end), '-infinity'::timestamptz)) desc,
+  id desc
+);
+-- Fire key of incremental imports (scripts/import_fires_csv.py KEY_MATCH_SQL).
+create index if not exists fires_key_coalesced_idx
+  on fires ((coalesce(annee, 0)), (coalesce(numero, -1)), (coalesce(departement, '')));
 
 -- Communes reference (for INSEE join)
 create table if not exists communes (
@@ -26,3 +35,28 @@ create table if not exists communes (
 -- Optional geometries for later vector tiles / choropleths server-side
 -- Uncomment when you're ready to store geometry.
 -- alter table communes add column if not exists geom geometry(MultiPolygon, 4326);
+
+-- Fires pre-aggregated per commune / alert year / departement / alert class,
+-- read by /api/metrics/insee instead of scanning fires. Rebuilt by
+-- scripts/import_fires_csv.py (db.refresh_fires_insee_agg).
+-- annee is the alert year (date_alerte, else annee column), 0 when unknown.
+create table if not exists fires_insee_agg (
+  insee text not null,
+  annee int not null,
+  departement text not null,
+  alerte text not null,
+  fires int not null,
+  surface_ha double precision not null,
+  primary key (insee, annee, departement, alerte)
+);
+
+-- Checksums of the last imported rows per source partition (fires: one
+-- partition per annee), so incremental imports skip unchanged partitions.
+create table if not exists import_checksums (
+  source text not null,
+  part text not null,
+  checksum text not null,
+  rows int not null,
+  imported_at timestamptz not null default now(),
+  primary key (source, part)
+);
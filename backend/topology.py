@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+import math
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from spatial import STRTree
+from vector_tiles import dp_importance
+
+# Shared-arc topology of a GeoJSON FeatureCollection, and its simplification.
+#
+# Lines and rings are cut at junctions (points where two borders meet or
+# part) into arcs, each stored once: neighbouring communes reference the same
+# arc, the second one reversed (~index, as in TopoJSON). Arcs are simplified
+# with Douglas–Peucker from fixed end points, so shared borders stay shared
+# and no gap or overlap opens between neighbours at any tolerance.
+
+# Zoom levels served by simplify(); finer requests get the last one.
+MAX_LEVEL = 16
+
+# Grid size of TopoJSON coordinates over the layer bbox (~1 m for PACA).
+QUANTIZATION = 100_000
+
+
+def level_tolerance(level: int) -> float:
+    """Half a 256 px map pixel at ``level``, in degrees of longitude."""
+
+    return 180.0 / (256 << level)
+
+
+def tolerance_level(tolerance: float) -> int:
+    """Coarsest level whose tolerance does not exceed ``tolerance``."""
+
+    if tolerance <= 0:
+        return MAX_LEVEL
+    level = math.ceil(math.log2(180.0 / (256 * tolerance)) - 1e-9)
+    return min(max(level, 0), MAX_LEVEL)
+
+
+def level_decimals(level: int) -> int:
+    # Enough digits for a tenth of the level's tolerance.
+    return max(0, math.ceil(-math.log10(level_tolerance(level)))) + 1
+
+
+Point = tuple[float, float]
+
+
+def _positions(coords: object) -> list[Point]:
+    out: list[Point] = []
+    try:
+        for p in coords:  # type: ignore[union-attr]
+            q = (float(p[0]), float(p[1]))
+            if not out or out[-1] != q:
+                out.append(q)
+    except (TypeError, ValueError, IndexError):
+        return []
+    return out
+
+
+class Topology:
+    """Features of a FeatureCollection with their lines and rings as arc references.
+
+    ``geometries[i]`` mirrors the geometry of ``features[i]``: a TopoJSON-like
+    dict whose "arcs" replace "coordinates" for lines and polygons (points
+    keep their coordinates; None for a missing geometry).
+    """
+
+    def __init__(self, geojson: dict) -> None:
+        self.members = {k: v for (k, v) in geojson.items() if k != "features"}
+        self.features: list[dict] = []
+        geometries: list[dict | None] = []
+        lines: list[tuple[list[Point], bool]] = []
+
+        def collect(geom: object) -> dict | None:
+            # Replace each line/ring by the index of its entry in ``lines``.
+            if not isinstance(geom, dict):
+                return None
+            gtype = geom.get("type")
+            coords = geom.get("coordinates")
+
+            def add(c: object, ring: bool) -> int | None:
+                pts = _positions(c)
+                if ring:
+                    if pts and pts[0] != pts[-1]:
+                        pts.append(pts[0])
+                    if len(pts) < 4:
+                        return None
+                elif len(pts) < 2:
+                    return None
+                lines.append((pts, ring))
+                return len(lines) - 1
+
+            def rings(c: object) -> list[int]:
+                out = [add(r, True) for r in (c or [])]  # type: ignore[union-attr]
+                # A polygon without its exterior ring is dropped.
+                return [r for r in out if r is not None] if out and out[0] is not None else []
+
+            if gtype == "GeometryCollection":
+                subs = [collect(g) for g in geom.get("geometries") or []]
+                return {"type": gtype, "geometries": [g for g in subs if g is not None]}
+            if gtype in ("Point", "MultiPoint"):
+                return {"type": gtype, "coordinates": coords}
+            if gtype == "LineString":
+                i = add(coords, False)
+                return {"type": gtype, "lines": [] if i is None else [i]}
+            if gtype == "MultiLineString":
+                out = [add(c, False) for c in coords or []]
+                return {"type": gtype, "lines": [i for i in out if i is not None]}
+            if gtype == "Polygon":
+                return {"type": gtype, "lines": rings(coords)}
+            if gtype == "MultiPolygon":
+                polys = [rings(c) for c in coords or []]
+                return {"type": gtype, "lines": [p for p in polys if p]}
+            return None
+
+        for feature in geojson.get("features") or []:
+            if not isinstance(feature, dict):
+                continue
+            self.features.append({k: v for (k, v) in feature.items() if k != "geometry"})
+            geometries.append(collect(feature.get("geometry")))
+
+        junctions = self._junctions(lines)
+
+        self.arcs: list[np.ndarray] = []
+        arc_ids: dict[tuple[Point, ...], int] = {}
+
+        def arc_ref(pts: list[Point]) -> int:
+            key = tuple(pts)
+            i = arc_ids.get(key)
+            if i is not None:
+                return i
+            i = arc_ids.get(key[::-1])
+            if i is not None:
+                return ~i
+            arc_ids[key] = len(self.arcs)
+            self.arcs.append(np.array(pts, dtype=np.float64))
+            return len(self.arcs) - 1
+
+        line_arcs: list[list[int]] = []
+        for pts, ring in lines:
+            if ring:
+                open_ring = pts[:-1]
+                cuts = [i for i, p in enumerate(open_ring) if p in junctions]
+                if not cuts:
+                    # Isolated ring (island, enclave): start at its smallest
+                    # point so that the neighbour's copy, reversed, matches.
+                    start = open_ring.index(min(open_ring))
+                    rotated = open_ring[start:] + open_ring[:start]
+                    line_arcs.append([arc_ref(rotated + [rotated[0]])])
+                    continue
+                rotated = open_ring[cuts[0] :] + open_ring[: cuts[0]]
+                pts = rotated + [rotated[0]]
+                cuts = [c - cuts[0] for c in cuts] + [len(open_ring)]
+            else:
+                cuts = [0] + [i for i in range(1, len(pts) - 1) if pts[i] in junctions] + [len(pts) - 1]
+            line_arcs.append([arc_ref(pts[a : b + 1]) for a, b in zip(cuts, cuts[1:])])
+
+        def resolve(geom: dict | None) -> dict | None:
+            if geom is None:
+                return None
+            gtype = geom["type"]
+            if gtype == "GeometryCollection":
+                return {"type": gtype, "geometries": [resolve(g) for g in geom["geometries"]]}
+            if "lines" not in geom:
+                return geom
+            refs = geom["lines"]
+            if gtype == "LineString":
+                arcs: object = line_arcs[refs[0]] if refs else []
+            elif gtype == "MultiPolygon":
+                arcs = [[line_arcs[r] for r in poly] for poly in refs]
+            else:
+                arcs = [line_arcs[r] for r in refs]
+            return {"type": gtype, "arcs": arcs}
+
+        self.geometries = [resolve(g) for g in geometries]
+        self.importance = [dp_importance(a) for a in self.arcs]
+        self._tree: STRTree | None = None
+
+    @staticmethod
+    def _junctions(lines: list[tuple[list[Point], bool]]) -> set[Point]:
+        # A point is a junction when it is a line end, or when two passes
+        # through it come from or go to different points.
+        neighbours: dict[Point, tuple] = {}
+        junctions: set[Point] = set()
+        for pts, ring in lines:
+            n = len(pts) - 1 if ring else len(pts)
+            if not ring:
+                junctions.add(pts[0])
+                junctions.add(pts[-1])
+            for i in range(n):
+                p = pts[i]
+                prev = pts[i - 1] if i else (pts[-2] if ring else None)
+                nxt = pts[i + 1] if i + 1 < len(pts) else None
+                pair = (prev, nxt) if prev is None or (nxt is not None and prev <= nxt) else (nxt, prev)
+                seen = neighbours.setdefault(p, pair)
+                if seen != pair:
+                    junctions.add(p)
+        return junctions
+
+    def simplify(self, level: int | None, features: list[int] | None = None) -> dict:
+        """The FeatureCollection simplified and quantized for ``level``.
+
+        Rings that collapse at this tolerance are dropped; a feature that
+        would lose all of them keeps its full-resolution geometry instead.
+        ``level`` None keeps every vertex unrounded; ``features`` (indices,
+        e.g. from query_bbox) restricts the output.
+        """
+
+        sq_tol = level_tolerance(level) ** 2 if level is not None else -1.0
+        decimals = level_decimals(level) if level is not None else None
+
+        def rounded(pts: np.ndarray) -> np.ndarray:
+            return pts if decimals is None else np.round(pts, decimals)
+
+        def quantized(pts: np.ndarray) -> list[list[float]]:
+            out: list[list[float]] = []
+            for x, y in rounded(pts).tolist():
+                if not out or out[-1][0] != x or out[-1][1] != y:
+                    out.append([x, y])
+            return out
+
+        indices = range(len(self.features)) if features is None else features
+        needed = None if features is None else self._arc_ids(indices)
+        arcs = [
+            quantized(a[imp > sq_tol]) if needed is None or i in needed else []
+            for i, (a, imp) in enumerate(zip(self.arcs, self.importance))
+        ]
+        full: list[list[list[float]]] | None = None
+
+        def line(refs: list[int], source: list[list[list[float]]]) -> list[list[float]]:
+            out: list[list[float]] = []
+            for r in refs:
+                pts = source[r] if r >= 0 else source[~r][::-1]
+                out.extend(pts[1:] if out and pts and out[-1] == pts[0] else pts)
+            return out
+
+        def polygon(rings: list[list[int]], source: list[list[list[float]]]) -> list[list[list[float]]]:
+            out = []
+            for i, refs in enumerate(rings):
+                ring = line(refs, source)
+                if len(ring) < 4:
+                    if not i:
+                        return []
+                    continue
+                out.append(ring)
+            return out
+
+        def geometry(geom: dict | None, source: list[list[list[float]]]) -> dict | None:
+            if geom is None:
+                return None
+            gtype = geom["type"]
+            if gtype == "GeometryCollection":
+                subs = [geometry(g, source) for g in geom["geometries"]]
+                return {"type": gtype, "geometries": [g for g in subs if g is not None]}
+            if "arcs" not in geom:
+                try:
+                    coords = rounded(np.asarray(geom["coordinates"], dtype=np.float64))
+                except (TypeError, ValueError):
+                    return geom
+                return {"type": gtype, "coordinates": coords.tolist()}
+            arcs_ = geom["arcs"]
+            if gtype == "LineString":
+                coords: list = line(arcs_, source)
+                empty = len(coords) < 2
+            elif gtype == "MultiLineString":
+                coords = [c for c in (line(refs, source) for refs in arcs_) if len(c) >= 2]
+                empty = not coords
+            elif gtype == "Polygon":
+                coords = polygon(arcs_, source)
+                empty = not coords
+            else:
+                coords = [p for p in (polygon(rings, source) for rings in arcs_) if p]
+                empty = not coords
+            return None if empty else {"type": gtype, "coordinates": coords}
+
+        out_features = []
+        for i in indices:
+            geom = self.geometries[i]
+            out = geometry(geom, arcs)
+            if out is None and geom is not None:
+                if full is None:
+                    full = [a.tolist() for a in self.arcs]
+                out = geometry(geom, full)
+            out_features.append({**self.features[i], "geometry": out})
+        return {**self.members, "features": out_features}
+
+    @staticmethod
+    def _refs(arcs: object) -> Iterator[int]:
+        # Arc indices of a (nested) "arcs" member, reversed ones included.
+        for a in arcs:  # type: ignore[union-attr]
+            if isinstance(a, int):
+                yield a
+            else:
+                yield from Topology._refs(a)
+
+    def _walk(self, geom: dict | None, refs: list[int], points: list[np.ndarray]) -> None:
+        if geom is None:
+            return
+        if geom["type"] == "GeometryCollection":
+            for g in geom["geometries"]:
+                self._walk(g, refs, points)
+        elif "arcs" in geom:
+            refs.extend(r if r >= 0 else ~r for r in self._refs(geom["arcs"]))
+        else:
+            try:
+                points.append(np.asarray(geom["coordinates"], dtype=np.float64).reshape(-1, 2))
+            except (TypeError, ValueError):
+                pass
+
+    def _arc_ids(self, features: Iterable[int]) -> set[int]:
+        refs: list[int] = []
+        for i in features:
+            self._walk(self.geometries[i], refs, [])
+        return set(refs)
+
+    def feature_bounds(self) -> np.ndarray:
+        """(n, 4) [minx, miny, maxx, maxy] of each feature (inf/-inf if empty)."""
+
+        arc_bounds = np.array(
+            [(*a.min(axis=0), *a.max(axis=0)) if len(a) else (np.inf, np.inf, -np.inf, -np.inf) for a in self.arcs]
+        ).reshape(-1, 4)
+        bounds = np.full((len(self.features), 4), [np.inf, np.inf, -np.inf, -np.inf])
+        for i, geom in enumerate(self.geometries):
+            refs: list[int] = []
+            points: list[np.ndarray] = []
+            self._walk(geom, refs, points)
+            parts = [arc_bounds[refs]] if refs else []
+            parts += [np.hstack((p, p)) for p in points if len(p)]
+            if parts:
+                b = np.vstack(parts)
+                bounds[i] = (*b[:, :2].min(axis=0), *b[:, 2:].max(axis=0))
+        return bounds
+
+    def query_bbox(self, minx: float, miny: float, maxx: float, maxy: float) -> list[int]:
+        """Indices of the features whose bounding box meets the given one."""
+
+        if self._tree is None:
+            self._tree = STRTree(self.feature_bounds())
+        return self._tree.query(minx, miny, maxx, maxy).tolist()
+
+    def _bbox(self) -> tuple[float, float, float, float] | None:
+        chunks = [a for a in self.arcs if len(a)]
+
+        def points(geom: dict | None) -> None:
+            if geom is None:
+                return
+            if geom["type"] == "GeometryCollection":
+                for g in geom["geometries"]:
+                    points(g)
+            elif "arcs" not in geom:
+                try:
+                    pts = np.asarray(geom["coordinates"], dtype=np.float64).reshape(-1, 2)
+                except (TypeError, ValueError):
+                    return
+                chunks.append(pts)
+
+        for geom in self.geometries:
+            points(geom)
+        if not chunks:
+            return None
+        allpts = np.concatenate(chunks)
+        return (*allpts.min(axis=0).tolist(), *allpts.max(axis=0).tolist())
+
+    def to_topojson(self, name: str, level: int | None = None, features: list[int] | None = None) -> dict:
+        """The layer as a quantized TopoJSON topology holding one object, ``name``.
+
+        Arcs are delta-encoded integers on a grid over the layer bbox
+        (QUANTIZATION steps, or about a quarter of the tolerance at
+        ``level``, whichever is coarser); with ``level`` they are simplified
+        first. Feature ids and properties are kept on the geometry objects.
+        ``features`` restricts the output to those features and the arcs
+        they use; the grid stays the whole layer's.
+        """
+
+        bbox = self._bbox() or (0.0, 0.0, 0.0, 0.0)
+        x0, y0, x1, y1 = bbox
+        q = QUANTIZATION
+        if level is not None:
+            step = level_tolerance(level) / 4
+            q = min(q, max(2, math.ceil(max(x1 - x0, y1 - y0) / step) + 1))
+        kx = (x1 - x0) / (q - 1) or 1.0
+        ky = (y1 - y0) / (q - 1) or 1.0
+        origin = np.array([x0, y0])
+        scale = np.array([kx, ky])
+
+        def grid(pts: np.ndarray) -> np.ndarray:
+            return np.round((pts - origin) / scale).astype(np.int64)
+
+        indices = range(len(self.features)) if features is None else features
+        if features is None:
+            kept = range(len(self.arcs))
+            renumber = None
+        else:
+            kept = sorted(self._arc_ids(indices))
+            renumber = {old: new for new, old in enumerate(kept)}
+
+        def refs(arcs_: object) -> object:
+            if renumber is None:
+                return arcs_
+            if isinstance(arcs_, int):
+                return renumber[arcs_] if arcs_ >= 0 else ~renumber[~arcs_]
+            return [refs(a) for a in arcs_]  # type: ignore[union-attr]
+
+        sq_tol = level_tolerance(level) ** 2 if level is not None else -1.0
+        arcs: list[list[list[int]]] = []
+        for a, imp in ((self.arcs[i], self.importance[i]) for i in kept):
+            qa = grid(a[imp > sq_tol])
+            keep = np.ones(len(qa), dtype=bool)
+            keep[1:] = np.any(qa[1:] != qa[:-1], axis=1)
+            qa = qa[keep]
+            if len(qa) < 2:
+                # Collapsed arc: still two positions, as the format requires.
+                qa = np.vstack([qa, qa[-1:]])
+            arcs.append(np.vstack([qa[:1], np.diff(qa, axis=0)]).tolist())
+
+        def obj(geom: dict | None) -> dict:
+            if geom is None:
+                return {"type": None}
+            gtype = geom["type"]
+            if gtype == "GeometryCollection":
+                return {"type": gtype, "geometries": [obj(g) for g in geom["geometries"]]}
+            if "arcs" in geom:
+                return {"type": gtype, "arcs": refs(geom["arcs"])} if geom["arcs"] else {"type": None}
+            try:
+                pts = np.asarray(geom["coordinates"], dtype=np.float64)
+                coords = grid(pts.reshape(-1, 2)).reshape(pts.shape).tolist()
+            except (TypeError, ValueError):
+                return {"type": None}
+            return {"type": gtype, "coordinates": coords}
+
+        geometries = []
+        for i in indices:
+            feature = self.features[i]
+            out = obj(self.geometries[i])
+            if "id" in feature:
+                out["id"] = feature["id"]
+            if feature.get("properties") is not None:
+                out["properties"] = feature["properties"]
+            geometries.append(out)
+
+        return {
+            "type": "Topology",
+            "bbox": list(bbox),
+            "transform": {"scale": [kx, ky], "translate": [x0, y0]},
+            "objects": {name: {"type": "GeometryCollection", "geometries": geometries}},
+            "arcs": arcs,
+        }
@@ -0,0 +1,727 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+# Mapbox Vector Tiles (spec 2.1) cut on the fly from GeoJSON layers.
+#
+# A layer is projected to Web Mercator once. Each line and ring vertex gets a
+# Douglas–Peucker importance at load time, so the geometry of any zoom is a
+# cheap mask over the same arrays. Features are found per tile through a grid
+# built lazily for each zoom up to INDEX_MAX_ZOOM, then clipped to the tile
+# plus a small buffer, quantized to the tile extent and encoded by hand.
+
+EXTENT = 4096
+BUFFER = 64  # tile units kept around each tile so that strokes join up
+TOLERANCE = 3.0  # simplification tolerance, in tile units at every zoom
+MAX_ZOOM = 24
+INDEX_MAX_ZOOM = 10
+TILE_FORMAT_VERSION = 1
+# Tiles are only written to disk up to this zoom, and the cache directory is
+# kept under DISK_CACHE_BYTES (least recently used tiles go first): deeper
+# zooms are cheap to cut from the in-memory index and unbounded in number.
+DISK_MAX_ZOOM = 14
+DISK_CACHE_BYTES = 256 * 1024 * 1024
+MIME_TYPE = "application/vnd.mapbox-vector-tile"
+
+_MAX_LAT = 85.0511287798
+
+# Geometry types of the MVT spec.
+POINT, LINESTRING, POLYGON = 1, 2, 3
+
+_MOVE_TO, _LINE_TO, _CLOSE_PATH = 1, 2, 7
+
+
+# -----------------
+# Protobuf encoding
+# -----------------
+
+
+def _varint(out: bytearray, n: int) -> None:
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _zigzag(n: int) -> int:
+    return n << 1 if n >= 0 else ((-n) << 1) - 1
+
+
+def _bytes_field(out: bytearray, field: int, data: bytes) -> None:
+    _varint(out, (field << 3) | 2)
+    _varint(out, len(data))
+    out += data
+
+
+def _packed_field(out: bytearray, field: int, values: list[int]) -> None:
+    packed = bytearray()
+    for v in values:
+        _varint(packed, v)
+    _bytes_field(out, field, packed)
+
+
+def _encode_value(value: object) -> bytes | None:
+    """A Layer.Value message for a GeoJSON property (None: left out)."""
+
+    out = bytearray()
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        out.append((7 << 3) | 0)
+        out.append(1 if value else 0)
+    elif isinstance(value, int) and 0 <= value < 1 << 64:
+        out.append((5 << 3) | 0)
+        _varint(out, value)
+    elif isinstance(value, int) and -(1 << 63) <= value < 0:
+        out.append((6 << 3) | 0)
+        _varint(out, _zigzag(value))
+    elif isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        out.append((3 << 3) | 1)
+        out += struct.pack("<d", value)
+    else:
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        _bytes_field(out, 1, value.encode("utf-8"))
+    return bytes(out)
+
+
+def _command(cmd: int, count: int) -> int:
+    return (cmd & 0x7) | (count << 3)
+
+
+def _encode_geometry(kind: int, parts: list[list[tuple[int, int]]]) -> list[int]:
+    """Command stream for points (one part), lines or rings in tile units."""
+
+    out: list[int] = []
+    cx = cy = 0
+    if kind == POINT:
+        points = parts[0]
+        out.append(_command(_MOVE_TO, len(points)))
+        for x, y in points:
+            out.append(_zigzag(x - cx))
+            out.append(_zigzag(y - cy))
+            cx, cy = x, y
+        return out
+
+    for part in parts:
+        x, y = part[0]
+        out.append(_command(_MOVE_TO, 1))
+        out.append(_zigzag(x - cx))
+        out.append(_zigzag(y - cy))
+        cx, cy = x, y
+        out.append(_command(_LINE_TO, len(part) - 1))
+        for x, y in part[1:]:
+            out.append(_zigzag(x - cx))
+            out.append(_zigzag(y - cy))
+            cx, cy = x, y
+        if kind == POLYGON:
+            out.append(_command(_CLOSE_PATH, 1))
+    return out
+
+
+class _LayerEncoder:
+    """Accumulates the features of one tile layer, deduplicating keys and values."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.features: list[bytes] = []
+        self.keys: dict[str, int] = {}
+        self.values: dict[bytes, int] = {}
+
+    def add(self, fid: int | None, tags: list[tuple[str, bytes]], kind: int, geometry: list[int]) -> None:
+        out = bytearray()
+        if fid is not None:
+            out.append((1 << 3) | 0)
+            _varint(out, fid)
+        if tags:
+            indices: list[int] = []
+            for key, value in tags:
+                indices.append(self.keys.setdefault(key, len(self.keys)))
+                indices.append(self.values.setdefault(value, len(self.values)))
+            _packed_field(out, 2, indices)
+        out.append((3 << 3) | 0)
+        out.append(kind)
+        _packed_field(out, 4, geometry)
+        self.features.append(bytes(out))
+
+    def encode(self) -> bytes:
+        layer = bytearray()
+        layer.append((15 << 3) | 0)
+        layer.append(2)
+        _bytes_field(layer, 1, self.name.encode("utf-8"))
+        for feature in self.features:
+            _bytes_field(layer, 2, feature)
+        for key in self.keys:
+            _bytes_field(layer, 3, key.encode("utf-8"))
+        for value in self.values:
+            _bytes_field(layer, 4, value)
+        _varint(layer, (5 << 3) | 0)
+        _varint(layer, EXTENT)
+
+        tile = bytearray()
+        _bytes_field(tile, 3, layer)
+        return bytes(tile)
+
+
+# ---------
+# Geometry
+# ---------
+
+
+def _project(coords: object) -> np.ndarray:
+    """lon/lat positions -> Web Mercator in [0, 1] (y pointing south)."""
+
+    try:
+        lonlat = np.array([(p[0], p[1]) for p in coords], dtype=np.float64)  # type: ignore[union-attr]
+    except (TypeError, ValueError, IndexError):
+        return np.empty((0, 2))
+    if not len(lonlat):
+        return np.empty((0, 2))
+    s = np.sin(np.radians(np.clip(lonlat[:, 1], -_MAX_LAT, _MAX_LAT)))
+    x = lonlat[:, 0] / 360.0 + 0.5
+    y = 0.5 - np.log((1 + s) / (1 - s)) / (4 * math.pi)
+    return np.column_stack((x, y))
+
+
+def _sq_seg_dist(pts: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    dx, dy = b - a
+    px = pts[:, 0] - a[0]
+    py = pts[:, 1] - a[1]
+    d2 = dx * dx + dy * dy
+    if d2 > 0:
+        t = np.clip((px * dx + py * dy) / d2, 0.0, 1.0)
+        px = px - t * dx
+        py = py - t * dy
+    return px * px + py * py
+
+
+# Spans shorter than this are scanned in plain Python, cheaper than numpy calls.
+_DP_NUMPY_SPAN = 48
+
+
+def _farthest(xs: list[float], ys: list[float], first: int, last: int) -> tuple[int, float]:
+    ax, ay = xs[first], ys[first]
+    dx = xs[last] - ax
+    dy = ys[last] - ay
+    d2 = dx * dx + dy * dy
+    best, best_d = first + 1, -1.0
+    for i in range(first + 1, last):
+        px = xs[i] - ax
+        py = ys[i] - ay
+        if d2 > 0:
+            t = (px * dx + py * dy) / d2
+            t = 0.0 if t < 0 else 1.0 if t > 1 else t
+            px -= t * dx
+            py -= t * dy
+        d = px * px + py * py
+        if d > best_d:
+            best, best_d = i, d
+    return best, best_d
+
+
+def dp_importance(pts: np.ndarray) -> np.ndarray:
+    """Squared Douglas–Peucker tolerance under which each vertex is kept.
+
+    End points are always kept (inf). A vertex never outranks the vertex that
+    split its span, so ``pts[imp > tol ** 2]`` is the simplification at
+    ``tol`` for every tolerance.
+    """
+
+    n = len(pts)
+    imp = np.zeros(n)
+    if not n:
+        return imp
+    imp[0] = imp[-1] = np.inf
+    xs = pts[:, 0].tolist()
+    ys = pts[:, 1].tolist()
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        first, last, cap = stack.pop()
+        if last - first < 2:
+            continue
+        if last - first > _DP_NUMPY_SPAN:
+            d = _sq_seg_dist(pts[first + 1 : last], pts[first], pts[last])
+            i = int(np.argmax(d))
+            split, dmax = first + 1 + i, float(d[i])
+        else:
+            split, dmax = _farthest(xs, ys, first, last)
+        imp[split] = min(dmax, cap)
+        stack.append((first, split, imp[split]))
+        stack.append((split, last, imp[split]))
+    return imp
+
+
+def _clip_ring(ring: list[tuple[float, float]], lo: float, hi: float) -> list[tuple[float, float]]:
+    """Sutherland–Hodgman clip of an open ring to the square [lo, hi]²."""
+
+    for axis in (0, 1):
+        for bound, keep_below in ((lo, False), (hi, True)):
+            if not ring:
+                return ring
+            out: list[tuple[float, float]] = []
+            prev = ring[-1]
+            prev_in = prev[axis] <= bound if keep_below else prev[axis] >= bound
+            for cur in ring:
+                cur_in = cur[axis] <= bound if keep_below else cur[axis] >= bound
+                if cur_in != prev_in:
+                    t = (bound - prev[axis]) / (cur[axis] - prev[axis])
+                    other = prev[1 - axis] + t * (cur[1 - axis] - prev[1 - axis])
+                    out.append((bound, other) if axis == 0 else (other, bound))
+                if cur_in:
+                    out.append(cur)
+                prev, prev_in = cur, cur_in
+            ring = out
+    return ring
+
+
+def _clip_segment(
+    a: tuple[float, float], b: tuple[float, float], lo: float, hi: float
+) -> tuple[tuple[float, float], tuple[float, float]] | None:
+    # Liang–Barsky; unclipped ends are returned as-is so pieces can be chained.
+    t0, t1 = 0.0, 1.0
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    for p, q in ((-dx, a[0] - lo), (dx, hi - a[0]), (-dy, a[1] - lo), (dy, hi - a[1])):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        r = q / p
+        if p < 0:
+            if r > t1:
+                return None
+            t0 = max(t0, r)
+        else:
+            if r < t0:
+                return None
+            t1 = min(t1, r)
+    start = a if t0 == 0.0 else (a[0] + t0 * dx, a[1] + t0 * dy)
+    end = b if t1 == 1.0 else (a[0] + t1 * dx, a[1] + t1 * dy)
+    return start, end
+
+
+def _clip_line(line: list[tuple[float, float]], lo: float, hi: float) -> list[list[tuple[float, float]]]:
+    pieces: list[list[tuple[float, float]]] = []
+    cur: list[tuple[float, float]] = []
+    for a, b in zip(line, line[1:]):
+        seg = _clip_segment(a, b, lo, hi)
+        if seg is None:
+            if cur:
+                pieces.append(cur)
+                cur = []
+            continue
+        if cur and cur[-1] is seg[0]:
+            cur.append(seg[1])
+        else:
+            if cur:
+                pieces.append(cur)
+            cur = [seg[0], seg[1]]
+    if cur:
+        pieces.append(cur)
+    return pieces
+
+
+def _quantize(points: list[tuple[float, float]]) -> list[tuple[int, int]]:
+    out: list[tuple[int, int]] = []
+    for x, y in points:
+        p = (int(round(x * EXTENT)), int(round(y * EXTENT)))
+        if not out or out[-1] != p:
+            out.append(p)
+    return out
+
+
+def _ring_area2(ring: list[tuple[int, int]]) -> int:
+    # Surveyor's formula in tile units (y down): > 0 for MVT exterior rings.
+    area = 0
+    x0, y0 = ring[-1]
+    for x1, y1 in ring:
+        area += x0 * y1 - x1 * y0
+        x0, y0 = x1, y1
+    return area
+
+
+class _Feature:
+    __slots__ = ("fid", "tags", "kind", "parts", "bbox")
+
+    def __init__(self, fid: int | None, tags: list[tuple[str, bytes]], kind: int, parts: list) -> None:
+        self.fid = fid
+        self.tags = tags
+        self.kind = kind
+        # POINT: one (n, 2) array; LINESTRING: [(pts, imp)];
+        # POLYGON: [[(pts, imp) per ring] per polygon], exterior ring first.
+        self.parts = parts
+        arrays = [parts[0]] if kind == POINT else [
+            pts for part in parts for pts, _imp in (part if kind == POLYGON else [part])
+        ]
+        allpts = np.concatenate(arrays)
+        self.bbox = (*allpts.min(axis=0), *allpts.max(axis=0))
+
+
+def _geometry_parts(geom: dict) -> list[tuple[int, list]]:
+    """(kind, parts) for a GeoJSON geometry, collections flattened."""
+
+    if not isinstance(geom, dict):
+        return []
+    gtype = geom.get("type")
+    coords = geom.get("coordinates") or []
+    if gtype == "GeometryCollection":
+        out: list[tuple[int, list]] = []
+        for sub in geom.get("geometries") or []:
+            out.extend(_geometry_parts(sub))
+        return out
+
+    def line(c: object) -> tuple[np.ndarray, np.ndarray] | None:
+        pts = _project(c)
+        return (pts, dp_importance(pts)) if len(pts) >= 2 else None
+
+    def polygon(c: list) -> list | None:
+        rings = [line(r) for r in c or []]
+        if not rings or rings[0] is None or len(rings[0][0]) < 4:
+            return None
+        return [r for r in rings if r is not None and len(r[0]) >= 4]
+
+    if gtype in ("Point", "MultiPoint"):
+        pts = _project([coords] if gtype == "Point" else coords)
+        return [(POINT, [pts])] if len(pts) else []
+    if gtype in ("LineString", "MultiLineString"):
+        lines = [line(c) for c in ([coords] if gtype == "LineString" else coords)]
+        lines = [x for x in lines if x is not None]
+        return [(LINESTRING, lines)] if lines else []
+    if gtype in ("Polygon", "MultiPolygon"):
+        polys = [polygon(c) for c in ([coords] if gtype == "Polygon" else coords)]
+        polys = [x for x in polys if x is not None]
+        return [(POLYGON, polys)] if polys else []
+    return []
+
+
+class TileIndex:
+    """One GeoJSON FeatureCollection, ready to be cut into tiles."""
+
+    def __init__(self, name: str, geojson: dict) -> None:
+        self.name = name
+        self.features: list[_Feature] = []
+        value_cache: dict[tuple[type, object], bytes | None] = {}
+        for feature in geojson.get("features") or []:
+            if not isinstance(feature, dict):
+                continue
+            fid = feature.get("id")
+            if not (isinstance(fid, int) and not isinstance(fid, bool) and 0 <= fid < 1 << 64):
+                fid = None
+            tags: list[tuple[str, bytes]] = []
+            for key, value in (feature.get("properties") or {}).items():
+                try:
+                    ck = (type(value), value)
+                    encoded = value_cache[ck] if ck in value_cache else value_cache.setdefault(ck, _encode_value(value))
+                except TypeError:  # unhashable (list, dict)
+                    encoded = _encode_value(value)
+                if encoded is not None:
+                    tags.append((str(key), encoded))
+            for kind, parts in _geometry_parts(feature.get("geometry")):
+                self.features.append(_Feature(fid, tags, kind, parts))
+
+        self.bboxes = np.array([f.bbox for f in self.features], dtype=np.float64).reshape(-1, 4)
+        self._grids: dict[int, dict[tuple[int, int], np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _grid(self, z: int) -> dict[tuple[int, int], np.ndarray]:
+        grid = self._grids.get(z)
+        if grid is not None:
+            return grid
+        with self._lock:
+            grid = self._grids.get(z)
+            if grid is not None:
+                return grid
+            n = 1 << z
+            pad = BUFFER / EXTENT
+            cells: dict[tuple[int, int], list[int]] = {}
+            lo = np.clip(np.floor(self.bboxes[:, :2] * n - pad), 0, n - 1).astype(np.int64)
+            hi = np.clip(np.floor(self.bboxes[:, 2:] * n + pad), 0, n - 1).astype(np.int64)
+            for i in range(len(self.features)):
+                for tx in range(lo[i, 0], hi[i, 0] + 1):
+                    for ty in range(lo[i, 1], hi[i, 1] + 1):
+                        cells.setdefault((tx, ty), []).append(i)
+            grid = {k: np.array(v, dtype=np.int64) for k, v in cells.items()}
+            self._grids[z] = grid
+            return grid
+
+    def candidates(self, z: int, x: int, y: int) -> np.ndarray:
+        """Indices of the features whose bbox touches the buffered tile."""
+
+        if z <= INDEX_MAX_ZOOM:
+            return self._grid(z).get((x, y), np.empty(0, dtype=np.int64))
+        shift = z - INDEX_MAX_ZOOM
+        rows = self._grid(INDEX_MAX_ZOOM).get((x >> shift, y >> shift))
+        if rows is None or not len(rows):
+            return np.empty(0, dtype=np.int64)
+        n = 1 << z
+        pad = BUFFER / EXTENT
+        b = self.bboxes[rows]
+        keep = (
+            (b[:, 0] <= (x + 1 + pad) / n)
+            & (b[:, 2] >= (x - pad) / n)
+            & (b[:, 1] <= (y + 1 + pad) / n)
+            & (b[:, 3] >= (y - pad) / n)
+        )
+        return rows[keep]
+
+    def tile(self, z: int, x: int, y: int) -> bytes:
+        """Encoded tile z/x/y; empty bytes when no feature shows in it."""
+
+        n = 1 << z
+        sq_tol = (TOLERANCE / (EXTENT * n)) ** 2
+        offset = np.array([x, y], dtype=np.float64)
+        lo = -BUFFER / EXTENT
+        hi = 1 + BUFFER / EXTENT
+
+        def to_tile(pts: np.ndarray) -> np.ndarray:
+            return pts * n - offset
+
+        def inside(t: np.ndarray) -> bool:
+            return bool(t.min() >= lo and t.max() <= hi)
+
+        def outside(t: np.ndarray) -> bool:
+            mn = t.min(axis=0)
+            mx = t.max(axis=0)
+            return bool(mn[0] > hi or mn[1] > hi or mx[0] < lo or mx[1] < lo)
+
+        layer = _LayerEncoder(self.name)
+        for i in self.candidates(z, x, y):
+            feature = self.features[i]
+            parts: list[list[tuple[int, int]]] = []
+
+            if feature.kind == POINT:
+                t = to_tile(feature.parts[0])
+                t = t[(t[:, 0] >= lo) & (t[:, 0] <= hi) & (t[:, 1] >= lo) & (t[:, 1] <= hi)]
+                points = [(int(round(px * EXTENT)), int(round(py * EXTENT))) for px, py in t.tolist()]
+                if points:
+                    parts.append(points)
+
+            elif feature.kind == LINESTRING:
+                for pts, imp in feature.parts:
+                    t = to_tile(pts[imp > sq_tol])
+                    if len(t) < 2 or outside(t):
+                        continue
+                    line = [tuple(p) for p in t.tolist()]
+                    for piece in [line] if inside(t) else _clip_line(line, lo, hi):
+                        q = _quantize(piece)
+                        if len(q) >= 2:
+                            parts.append(q)
+
+            else:
+                for polygon in feature.parts:
+                    for r, (pts, imp) in enumerate(polygon):
+                        t = to_tile(pts[imp > sq_tol])
+                        if len(t) < 4 or outside(t):
+                            if r == 0:
+                                break
+                            continue
+                        ring = [tuple(p) for p in t[:-1].tolist()]
+                        if not inside(t):
+                            ring = _clip_ring(ring, lo, hi)
+                        q = _quantize(ring)
+                        if len(q) > 1 and q[0] == q[-1]:
+                            q.pop()
+                        area = _ring_area2(q) if len(q) >= 3 else 0
+                        if not area:
+                            if r == 0:
+                                break
+                            continue
+                        # Exterior rings wind with a positive area, holes negative.
+                        if (area > 0) != (r == 0):
+                            q.reverse()
+                        parts.append(q)
+
+            if parts:
+                layer.add(feature.fid, feature.tags, feature.kind, _encode_geometry(feature.kind, parts))
+
+        return layer.encode() if layer.features else b""
+
+
+# ----------------
+# Indexes + cache
+# ----------------
+
+
+def tile_version(source: str) -> str | None:
+    """Key of the tiles cut from ``source`` in their current state (None if missing)."""
+
+    try:
+        st = os.stat(source)
+    except OSError:
+        return None
+    raw = json.dumps(
+        [TILE_FORMAT_VERSION, os.path.abspath(source), st.st_mtime_ns, st.st_size, EXTENT, BUFFER, TOLERANCE]
+    ).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+class TileStore:
+    """Tile indexes of recently used layers, plus the tiles already cut on disk.
+
+    Tiles live under ``<cache_dir>/<group>/<layer>/<version>/<z>/<x>/<y>.pbf``;
+    the version changes with the source file, and older versions are removed
+    when a layer is indexed again. Empty tiles and tiles deeper than
+    ``max_disk_zoom`` are never written, and the directory is trimmed to
+    ``max_disk_bytes`` by dropping the least recently used tiles.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None,
+        max_indexes: int = 8,
+        max_disk_zoom: int = DISK_MAX_ZOOM,
+        max_disk_bytes: int = DISK_CACHE_BYTES,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_indexes = max(1, int(max_indexes))
+        self.max_disk_zoom = int(max_disk_zoom)
+        self.max_disk_bytes = max(0, int(max_disk_bytes))
+        self._indexes: OrderedDict[tuple[str, str], tuple[str, TileIndex]] = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per layer, so a slow build only holds up that layer.
+        self._build_locks: dict[tuple[str, str], threading.Lock] = {}
+        # Tile files on disk -> size, least recently used first (read lazily
+        # from the directory, oldest mtime first).
+        self._files: OrderedDict[str, int] | None = None
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+
+    def _layer_dir(self, key: tuple[str, str]) -> str | None:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, *(os.path.basename(k) for k in key))
+
+    def index(self, key: tuple[str, str], version: str, load: Callable[[], dict]) -> TileIndex:
+        with self._lock:
+            hit = self._indexes.get(key)
+            if hit is not None and hit[0] == version:
+                self._indexes.move_to_end(key)
+                return hit[1]
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                hit = self._indexes.get(key)
+                if hit is not None and hit[0] == version:
+                    self._indexes.move_to_end(key)
+                    return hit[1]
+
+            index = TileIndex(key[1], load())
+
+            with self._lock:
+                self._indexes[key] = (version, index)
+                self._indexes.move_to_end(key)
+                while len(self._indexes) > self.max_indexes:
+                    self._indexes.popitem(last=False)
+
+            layer_dir = self._layer_dir(key)
+            if layer_dir and os.path.isdir(layer_dir):
+                for name in os.listdir(layer_dir):
+                    if name != version:
+                        stale = os.path.join(layer_dir, name)
+                        shutil.rmtree(stale, ignore_errors=True)
+                        self._forget(stale + os.sep)
+        return index
+
+    def _disk_files(self) -> OrderedDict[str, int]:
+        # Caller holds _disk_lock.
+        if self._files is None:
+            found: list[tuple[float, str, int]] = []
+            for root, _dirs, names in os.walk(self.cache_dir or ""):
+                for name in names:
+                    if not name.endswith(".pbf"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((st.st_mtime, path, st.st_size))
+            found.sort()
+            self._files = OrderedDict((path, size) for _mtime, path, size in found)
+            self._disk_bytes = sum(self._files.values())
+        return self._files
+
+    def _forget(self, prefix: str) -> None:
+        with self._disk_lock:
+            if self._files is None:
+                return
+            for path in [p for p in self._files if p.startswith(prefix)]:
+                self._disk_bytes -= self._files.pop(path)
+
+    def _touch(self, path: str) -> None:
+        with self._disk_lock:
+            files = self._disk_files()
+            if path in files:
+                files.move_to_end(path)
+
+    def _store(self, path: str, data: bytes) -> None:
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".tile-", dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[tiles] Could not write {path}: {e}")
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        with self._disk_lock:
+            files = self._disk_files()
+            self._disk_bytes += len(data) - files.pop(path, 0)
+            files[path] = len(data)
+            while self._disk_bytes > self.max_disk_bytes and files:
+                old, size = files.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+    def tile(
+        self, key: tuple[str, str], source: str, load: Callable[[], dict], z: int, x: int, y: int
+    ) -> tuple[bytes, str]:
+        """Tile z/x/y of layer ``key`` and its version (b"" for an empty tile).
+
+        ``source`` is the file the layer is read from (it versions the
+        tiles) and ``load`` returns its GeoJSON. Raises FileNotFoundError when
+        the source is gone.
+        """
+
+        version = tile_version(source)
+        if version is None:
+            raise FileNotFoundError(source)
+
+        layer_dir = self._layer_dir(key)
+        path = None
+        if layer_dir and self.max_disk_bytes and z <= self.max_disk_zoom:
+            path = os.path.join(layer_dir, version, str(z), str(x), f"{y}.pbf")
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                self._touch(path)
+                return data, version
+            except OSError:
+                pass
+
+        data = self.index(key, version, load).tile(z, x, y)
+        if path and data:
+            self._store(path, data)
+        return data, version
@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import dynamic from "next/dynamic";
 
 import HeaderBar from "./components/HeaderBar";
@@ -28,6 +28,23 @@ const MonthlyLine = dynamic(
   { ssr: false }
 );
 
+// Viewport as ?bbox= (lon/lat), widened by half its size on each side so
+// small pans stay inside what was already fetched.
+function paddedBbox(bounds, pad = 0.5) {
+  const dx = (bounds.east - bounds.west) * pad;
+  const dy = (bounds.north - bounds.south) * pad;
+  return [bounds.west - dx, bounds.south - dy, bounds.east + dx, bounds.north + dy];
+}
+
+function bboxCovers(outer, bounds) {
+  return (
+    outer[0] <= bounds.west &&
+    outer[1] <= bounds.south &&
+    outer[2] >= bounds.east &&
+    outer[3] >= bounds.north
+  );
+}
+
 function getApiBaseUrl() {
   const raw = process.env.NEXT_PUBLIC_API_URL || "";
   return raw.replace(/\/+$/, "");
@@ -50,6 +67,10 @@ export default function Home() {
   const [qgisLayersError, setQgisLayersError] = useState(null);
   const [layerEnabled, setLayerEnabled] = useState({});
   const [layerGeojson, setLayerGeojson] = useState({});
+  // Area and zoom each layer was last fetched for (?bbox= / ?zoom=).
+  const layerExtentRef = useRef({});
+  const layerSeqRef = useRef({});
+  const [viewport, setViewport] = useState(null);
 
   const [deptFilter, setDeptFilter] = useState("all");
   const [alerteFilter, setAlerteFilter] = useState("all");
@@ -213,17 +234,25 @@ export default function Home() {
     };
   }, [apiBaseUrl]);
 
-  async function toggleQgisLayer(id) {
-    if (!id) return;
-    const willEnable = !layerEnabled[id];
-    setLayerEnabled((prev) => ({ ...prev, [id]: willEnable }));
-    if (!willEnable) return;
-    if (layerGeojson[id]) return;
-    if (!apiBaseUrl) return;
-
+  // Only the features around the viewport are fetched, simplified for its
+  // zoom; without a viewport yet, the whole layer.
+  async function fetchQgisLayer(id, vp) {
+    const params = new URLSearchParams();
+    let extent = null;
+    if (vp?.bounds) {
+      extent = { bbox: paddedBbox(vp.bounds), zoom: Math.max(0, Math.floor(vp.zoom)) };
+      params.set("bbox", extent.bbox.map((v) => v.toFixed(5)).join(","));
+      params.set("zoom", String(extent.zoom));
+    }
+    const query = params.toString();
+    // Recorded up front so moveend + zoomend do not fetch twice; a newer
+    // request supersedes an older one still in flight.
+    const seq = (layerSeqRef.current[id] || 0) + 1;
+    layerSeqRef.current[id] = seq;
+    layerExtentRef.current[id] = extent;
     try {
       const res = await fetch(
-        `${apiBaseUrl}/api/qgis2web/layers/${encodeURIComponent(id)}`,
+        `${apiBaseUrl}/api/qgis2web/layers/${encodeURIComponent(id)}${query ? `?${query}` : ""}`,
         {
           method: "GET",
           headers: { Accept: "application/json" },
@@ -232,12 +261,50 @@ export default function Home() {
       if (!res.ok) throw new Error(`Layer ${id} fetch failed (${res.status})`);
       const data = await res.json();
       const gj = data?.geojson;
-      if (gj) setLayerGeojson((prev) => ({ ...prev, [id]: gj }));
+      if (gj && layerSeqRef.current[id] === seq) {
+        setLayerGeojson((prev) => ({ ...prev, [id]: gj }));
+      }
+    } catch (e) {
+      if (layerSeqRef.current[id] === seq) delete layerExtentRef.current[id];
+      throw e;
+    }
+  }
+
+  async function toggleQgisLayer(id) {
+    if (!id) return;
+    const willEnable = !layerEnabled[id];
+    setLayerEnabled((prev) => ({ ...prev, [id]: willEnable }));
+    if (!willEnable) return;
+    if (layerGeojson[id] && !needsRefetch(id, viewport)) return;
+    if (!apiBaseUrl) return;
+
+    try {
+      await fetchQgisLayer(id, viewport);
     } catch {
       setLayerEnabled((prev) => ({ ...prev, [id]: false }));
     }
   }
 
+  function needsRefetch(id, vp) {
+    if (!vp?.bounds) return false;
+    const extent = layerExtentRef.current[id];
+    if (!extent) return true;
+    return extent.zoom !== Math.max(0, Math.floor(vp.zoom)) || !bboxCovers(extent.bbox, vp.bounds);
+  }
+
+  // Refetch enabled layers once the map leaves the area (or zoom level)
+  // they were fetched for.
+  useEffect(() => {
+    if (!apiBaseUrl || !viewport?.bounds) return;
+    for (const id of Object.keys(layerEnabled)) {
+      if (!layerEnabled[id] || !needsRefetch(id, viewport)) continue;
+      fetchQgisLayer(id, viewport).catch(() => {
+        // keep the previous features
+      });
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [viewport, apiBaseUrl]);
+
   const firesStats = useMemo(() => {
     const totalSurface = fires.reduce((sum, f) => {
       const v = typeof f?.surface_ha === "number" ? f.surface_ha : Number(f?.surface_ha);
@@ -410,6 +477,7 @@ export default function Home() {
             showDeptOverlay={showDeptOverlay}
             mapMetric={mapMetric}
             qgisLayers={enabledQgisLayers}
+            onViewport={setViewport}
             filters={{
               departement: deptFilter,
               alerte: alerteFilter,